@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
-from .models import Supplier, AccountPayable, PayableTransaction, PaymentReminder
+from .models import Supplier, AccountPayable, PayableTransaction, PayableStatusHistory, PaymentReminder
 
 
 class PayableInline(admin.TabularInline):
@@ -16,14 +16,14 @@ class PayableInline(admin.TabularInline):
 
 @admin.register(Supplier)
 class SupplierAdmin(admin.ModelAdmin):
-    list_display = ('name', 'arabic_name', 'phone', 'email', 'payment_terms', 'total_outstanding', 'is_active')
-    list_filter = ('is_active', 'payment_terms', 'created_at')
+    list_display = ('name', 'arabic_name', 'phone', 'email', 'payment_terms', 'priority', 'outstanding_balance', 'is_active')
+    list_filter = ('is_active', 'priority', 'payment_terms', 'created_at')
     search_fields = ('name', 'arabic_name', 'phone', 'email', 'tax_number')
-    readonly_fields = ('created_by', 'created_at', 'updated_at', 'total_outstanding')
+    readonly_fields = ('created_by', 'created_at', 'updated_at', 'outstanding_balance')
     fieldsets = (
         (None, {'fields': ('name', 'arabic_name', 'is_active')}),
         (_('Contact Information'), {'fields': ('contact_person', 'phone', 'email', 'address')}),
-        (_('Financial Information'), {'fields': ('tax_number', 'payment_terms', 'total_outstanding')}),
+        (_('Financial Information'), {'fields': ('tax_number', 'payment_terms', 'priority', 'outstanding_balance')}),
         (_('Additional Information'), {'fields': ('notes',)}),
         (_('System Information'), {'fields': ('created_by', 'created_at', 'updated_at')}),
     )
@@ -53,10 +53,23 @@ class PaymentReminderInline(admin.TabularInline):
     max_num = 5
 
 
+class DueInListFilter(admin.SimpleListFilter):
+    title = _('due in')
+    parameter_name = 'due_in'
+    
+    def lookups(self, request, model_admin):
+        return AccountPayable.DUE_IN_BUCKETS
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.due_in([self.value()])
+        return queryset
+
+
 @admin.register(AccountPayable)
 class AccountPayableAdmin(admin.ModelAdmin):
     list_display = ('payment_number', 'supplier', 'bank', 'transaction_date', 'due_date', 'amount', 'status', 'days_until_due')
-    list_filter = ('status', 'transaction_date', 'due_date', 'bank')
+    list_filter = ('status', DueInListFilter, 'transaction_date', 'due_date', 'bank')
     search_fields = ('payment_number', 'check_number', 'supplier__name', 'invoice_number', 'notes')
     readonly_fields = ('payment_number', 'created_by', 'created_at', 'updated_at', 'days_until_due', 'last_reminder_date')
     date_hierarchy = 'transaction_date'
@@ -70,6 +83,13 @@ class AccountPayableAdmin(admin.ModelAdmin):
     )
     inlines = [PayableTransactionInline, PaymentReminderInline]
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_days_until_due()
+    
+    @admin.display(description=_('days until due'), ordering='days_to_due')
+    def days_until_due(self, obj):
+        return obj.days_until_due()
+    
     def save_model(self, request, obj, form, change):
         if not change:  # Only set created_by when creating a new object
             obj.created_by = request.user
@@ -96,6 +116,14 @@ class PayableTransactionAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
 
+@admin.register(PayableStatusHistory)
+class PayableStatusHistoryAdmin(admin.ModelAdmin):
+    list_display = ('payable', 'from_status', 'to_status', 'changed_at', 'changed_by')
+    list_filter = ('to_status', 'changed_at')
+    search_fields = ('payable__payment_number', 'payable__check_number', 'note')
+    date_hierarchy = 'changed_at'
+
+
 @admin.register(PaymentReminder)
 class PaymentReminderAdmin(admin.ModelAdmin):
     list_display = ('payable', 'reminder_type', 'reminder_date', 'sent', 'sent_date', 'sent_by')
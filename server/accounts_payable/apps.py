@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AccountsPayableConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts_payable'
+    
+    def ready(self):
+        # Import signal handlers
+        import accounts_payable.signals
@@ -0,0 +1,171 @@
+"""
+Batched payment reminder dispatch.
+
+Due reminders are claimed with one conditional UPDATE, so concurrent
+dispatchers never send the same reminder twice. They are rendered in one
+pass and sent through a Django email backend by a bounded pool of workers,
+each holding one connection. The outcome, which also releases the claim,
+is written back with one ``bulk_update`` for the reminders and one UPDATE
+for the payables' ``last_reminder_date``. The console and file email
+backends stand in for SMTP when working locally.
+"""
+import datetime
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db.models import Q
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import AccountPayable, PaymentReminder
+from .signals import invalidate_dashboard
+
+
+REMINDER_TEMPLATE = 'accounts_payable/payment_reminder_email.txt'
+
+
+def due_reminders(today=None):
+    """Unsent reminders of outstanding payables that are due by ``today``."""
+    today = today or datetime.date.today()
+    return PaymentReminder.objects.filter(
+        sent=False,
+        reminder_date__lte=today,
+        send_attempts__lt=settings.REMINDER_MAX_ATTEMPTS,
+        payable__status__in=AccountPayable.OUTSTANDING_STATUSES
+    )
+
+
+def claim_reminders(queryset, limit=None):
+    """
+    Claim up to ``limit`` reminders from ``queryset`` and return them ready to
+    render. Reminders claimed by another sender are skipped; a claim lapses
+    after ``REMINDER_CLAIM_TIMEOUT`` seconds in case its sender died.
+    """
+    now = timezone.now()
+    unclaimed = (
+        Q(claimed_at__isnull=True)
+        | Q(claimed_at__lt=now - datetime.timedelta(seconds=settings.REMINDER_CLAIM_TIMEOUT))
+    )
+    candidates = list(
+        queryset.filter(unclaimed).order_by('reminder_date', 'pk').values_list('pk', 'send_attempts')[:limit]
+    )
+    by_attempts = defaultdict(list)
+    for pk, attempts in candidates:
+        by_attempts[attempts].append(pk)
+    # A reminder another sender claimed, or claimed and finished (which bumps
+    # send_attempts), no longer matches, so only one sender wins each reminder
+    for attempts, pks in by_attempts.items():
+        PaymentReminder.objects.filter(unclaimed, pk__in=pks, send_attempts=attempts).update(claimed_at=now)
+    pks = [pk for pk, _attempts in candidates]
+    return list(
+        PaymentReminder.objects.filter(pk__in=pks, claimed_at=now)
+        .select_related('payable__supplier', 'payable__bank', 'payable__created_by')
+        .order_by('reminder_date', 'pk')
+    )
+
+
+def reminder_recipients(reminder):
+    if settings.PAYMENT_REMINDER_RECIPIENTS:
+        return list(settings.PAYMENT_REMINDER_RECIPIENTS)
+    creator = reminder.payable.created_by
+    return [creator.email] if creator and creator.email else []
+
+
+def render_reminder(reminder):
+    """Build the email for ``reminder``."""
+    payable = reminder.payable
+    subject = f"{reminder.get_reminder_type_display()}: {payable.payment_number} - {payable.supplier.name}"
+    body = render_to_string(REMINDER_TEMPLATE, {'reminder': reminder, 'payable': payable})
+    return EmailMessage(subject, body, to=reminder_recipients(reminder))
+
+
+def _send_chunk(chunk, backend):
+    """Send ``(reminder id, message)`` pairs over one connection; return id -> error."""
+    errors = {}
+    connection = get_connection(backend)
+    try:
+        connection.open()
+    except Exception as error:
+        return {reminder_id: str(error) for reminder_id, _message in chunk}
+    try:
+        for reminder_id, message in chunk:
+            try:
+                message.connection = connection
+                message.send()
+                errors[reminder_id] = None
+            except Exception as error:
+                errors[reminder_id] = str(error)
+    finally:
+        connection.close()
+    return errors
+
+
+def send_messages(messages, backend=None, workers=None):
+    """
+    Send ``(reminder id, message)`` pairs using up to ``workers`` threads and
+    return reminder id -> error message (``None`` when sent).
+    """
+    workers = max(1, min(workers or settings.REMINDER_DISPATCH_WORKERS, len(messages)))
+    chunks = [messages[index::workers] for index in range(workers)]
+    errors = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for chunk_errors in executor.map(lambda chunk: _send_chunk(chunk, backend), chunks):
+            errors.update(chunk_errors)
+    return errors
+
+
+def dispatch_reminders(reminders, user=None, backend=None, workers=None):
+    """
+    Send claimed ``reminders``, record the outcome and release the claims.
+    Returns one result dict per reminder with ``result`` set to ``sent``,
+    ``failed`` or ``skipped``; a skipped reminder uses up an attempt.
+    """
+    results = {}
+    messages = []
+    for reminder in reminders:
+        message = render_reminder(reminder)
+        if message.to:
+            messages.append((reminder.pk, message))
+
+    errors = send_messages(messages, backend=backend, workers=workers) if messages else {}
+
+    now = timezone.now()
+    sent_payables = set()
+    for reminder in reminders:
+        reminder.send_attempts += 1
+        reminder.claimed_at = None
+        if reminder.pk not in errors:
+            reminder.last_error = 'No recipient.'
+            results[reminder.pk] = {'id': reminder.pk, 'result': 'skipped', 'detail': reminder.last_error}
+            continue
+        error = errors[reminder.pk]
+        if error is None:
+            reminder.sent, reminder.sent_date, reminder.sent_by = True, now, user
+            reminder.last_error = ''
+            sent_payables.add(reminder.payable_id)
+            results[reminder.pk] = {'id': reminder.pk, 'result': 'sent'}
+        else:
+            reminder.last_error = error[:255]
+            results[reminder.pk] = {'id': reminder.pk, 'result': 'failed', 'detail': error}
+
+    PaymentReminder.objects.bulk_update(
+        reminders, ['sent', 'sent_date', 'sent_by', 'send_attempts', 'last_error', 'claimed_at']
+    )
+    if sent_payables:
+        AccountPayable.objects.filter(pk__in=sent_payables).update(last_reminder_date=now.date())
+    if reminders:
+        invalidate_dashboard()
+    return [results[reminder.pk] for reminder in reminders]
+
+
+def dispatch_due_reminders(today=None, limit=None, user=None, backend=None, workers=None):
+    """Dispatch one batch of due reminders and summarise the outcome."""
+    reminders = claim_reminders(due_reminders(today), limit or settings.REMINDER_DISPATCH_BATCH_SIZE)
+    results = dispatch_reminders(reminders, user=user, backend=backend, workers=workers)
+    summary = {outcome: 0 for outcome in ('sent', 'failed', 'skipped')}
+    for result in results:
+        summary[result['result']] += 1
+    summary['results'] = results
+    return summary
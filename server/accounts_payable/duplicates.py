@@ -0,0 +1,60 @@
+"""
+Fuzzy duplicate detection for supplier invoices.
+
+Exact repeats are stopped on entry by the unique (supplier, invoice
+fingerprint) constraint. This scan finds the looser case: payables of the same
+supplier for the same amount dated within a few days of each other, even
+when the invoice numbers differ. Payables are partitioned by (supplier,
+amount) and ordered by date in a window, so each one is compared with its
+predecessor through ``LAG`` in a single query instead of pairing rows in
+Python.
+"""
+from django.db.models import F, Window
+from django.db.models.functions import Coalesce, Lag
+
+from finance_system.functions import DaysUntil
+from .models import UNPAID_STATUSES, AccountPayable
+
+
+DEFAULT_WINDOW_DAYS = 7
+# Rejected and returned payables are not paid, so they cannot be paid twice
+SCANNED_EXCLUDED_STATUSES = UNPAID_STATUSES
+
+
+def fuzzy_duplicates(queryset=None, window_days=DEFAULT_WINDOW_DAYS):
+    """
+    Return one row per payable that follows another payable of the same
+    supplier and amount within ``window_days`` (by invoice date, falling
+    back to the transaction date), with the earlier payable as ``previous_*``.
+    """
+    if queryset is None:
+        queryset = AccountPayable.objects.exclude(status__in=SCANNED_EXCLUDED_STATUSES)
+    partition = {
+        'partition_by': [F('supplier_id'), F('amount')],
+        'order_by': [F('document_date').asc(), F('pk').asc()],
+    }
+    rows = queryset.annotate(
+        document_date=Coalesce('invoice_date', 'transaction_date')
+    ).annotate(
+        previous_id=Window(Lag('pk'), **partition),
+        previous_payment_number=Window(Lag('payment_number'), **partition),
+        previous_invoice_number=Window(Lag('invoice_number'), **partition),
+        previous_fingerprint=Window(Lag('invoice_fingerprint'), **partition),
+        previous_date=Window(Lag('document_date'), **partition),
+    ).annotate(
+        days_apart=DaysUntil('document_date', F('previous_date'))
+    ).filter(
+        previous_id__isnull=False, days_apart__lte=window_days
+    ).values(
+        'id', 'payment_number', 'supplier_id', 'amount', 'invoice_number', 'document_date', 'status',
+        'previous_id', 'previous_payment_number', 'previous_invoice_number', 'previous_date', 'days_apart',
+        'invoice_fingerprint', 'previous_fingerprint',
+        supplier_name=F('supplier__name'),
+    ).order_by('supplier_name', 'amount', 'document_date', 'id')
+
+    results = []
+    for row in rows:
+        fingerprint, previous_fingerprint = row.pop('invoice_fingerprint'), row.pop('previous_fingerprint')
+        row['same_invoice'] = bool(fingerprint) and fingerprint == previous_fingerprint
+        results.append(row)
+    return results
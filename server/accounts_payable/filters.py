@@ -0,0 +1,22 @@
+import django_filters
+from .models import AccountPayable
+
+
+class DueInFilter(django_filters.BaseInFilter, django_filters.ChoiceFilter):
+    """Comma-separated ``DUE_IN_BUCKETS`` values, e.g. ``?due_in=0-15,overdue``."""
+
+
+class AccountPayableFilter(django_filters.FilterSet):
+    """Filters for the payable list, including the due-date windows."""
+    
+    due_in = DueInFilter(
+        choices=AccountPayable.DUE_IN_BUCKETS,
+        method='filter_due_in'
+    )
+    
+    class Meta:
+        model = AccountPayable
+        fields = ['status', 'bank', 'supplier', 'transaction_date']
+    
+    def filter_due_in(self, queryset, name, value):
+        return queryset.due_in(value)
@@ -0,0 +1,161 @@
+"""
+Bulk import of payables from CSV or JSON batches.
+
+Rows are validated a batch at a time against one lookup of the referenced
+suppliers and banks, invoice numbers are checked against the stored
+(supplier, invoice fingerprint) index in one query, payment numbers are
+reserved in one block and payables are written with ``bulk_create``. The
+per-row side effects (supplier balances, reminders, dashboard cache,
+calendar events) are applied once for the whole import.
+"""
+import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from rest_framework import serializers
+
+from document_numbers.models import DocumentSequence, last_issued_seed
+from finance_system.transitions import record_status_changes
+from accounts_receivable.models import Bank
+from .models import UNPAID_STATUSES, AccountPayable, Supplier, normalize_invoice_number
+from .reminders import schedule_reminders
+from .signals import invalidate_dashboard, payables_imported
+
+
+IMPORT_BATCH_SIZE = 500
+
+
+class PayableImportRowSerializer(serializers.Serializer):
+    """Field-level validation for one imported payable row."""
+
+    supplier = serializers.IntegerField()
+    bank = serializers.IntegerField()
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=Decimal('0.01'))
+    due_date = serializers.DateField()
+    transaction_date = serializers.DateField(required=False)
+    check_number = serializers.CharField(max_length=50)
+    invoice_number = serializers.CharField(max_length=50, required=False, allow_blank=True, default='')
+    invoice_date = serializers.DateField(required=False, allow_null=True, default=None)
+    status = serializers.ChoiceField(choices=AccountPayable.STATUS_CHOICES, default='covered')
+    notes = serializers.CharField(max_length=500, required=False, allow_blank=True, default='')
+
+    def validate(self, data):
+        transaction_date = data.setdefault('transaction_date', datetime.date.today())
+        if data['due_date'] <= transaction_date:
+            raise serializers.ValidationError({'due_date': "Due date must be after transaction date."})
+        data['invoice_fingerprint'] = normalize_invoice_number(data['invoice_number'])
+        return data
+
+
+def validate_batch(rows, offset=0):
+    """
+    Validate ``rows`` and return ``(valid, errors)``; ``valid`` holds
+    ``(row number, data)`` pairs with ``supplier`` and ``bank`` resolved.
+    """
+    valid, errors = [], []
+    checked = []
+    for index, row in enumerate(rows, start=offset + 1):
+        row_serializer = PayableImportRowSerializer(data=row)
+        if row_serializer.is_valid():
+            checked.append((index, row_serializer.validated_data))
+        else:
+            errors.append({'row': index, 'errors': row_serializer.errors})
+
+    suppliers = Supplier.objects.in_bulk({data['supplier'] for _index, data in checked})
+    banks = Bank.objects.in_bulk({data['bank'] for _index, data in checked})
+    for index, data in checked:
+        row_errors = {}
+        if data['supplier'] not in suppliers:
+            row_errors['supplier'] = ["Supplier does not exist."]
+        if data['bank'] not in banks:
+            row_errors['bank'] = ["Bank does not exist."]
+        if row_errors:
+            errors.append({'row': index, 'errors': row_errors})
+            continue
+        data['supplier'] = suppliers[data['supplier']]
+        data['bank'] = banks[data['bank']]
+        valid.append((index, data))
+    return valid, errors
+
+
+def check_duplicate_invoices(valid, errors):
+    """
+    Reject rows whose supplier invoice is already on file or repeats an
+    earlier row of the same import. Rejected rows are moved to ``errors``.
+    Run it with the suppliers locked, so no other entry of the same invoice
+    can commit between the check and the insert.
+    """
+    fingerprints = {data['invoice_fingerprint'] for _index, data in valid} - {''}
+    seen = {
+        (supplier_id, fingerprint): f"Invoice already recorded on payment {payment_number}."
+        for supplier_id, fingerprint, payment_number in AccountPayable.objects.filter(
+            supplier_id__in={data['supplier'].pk for _index, data in valid},
+            invoice_fingerprint__in=fingerprints
+        ).exclude(status__in=UNPAID_STATUSES).values_list('supplier_id', 'invoice_fingerprint', 'payment_number')
+    } if fingerprints else {}
+
+    accepted = []
+    for index, data in valid:
+        key = (data['supplier'].pk, data['invoice_fingerprint'])
+        if data['invoice_fingerprint']:
+            if key in seen:
+                errors.append({'row': index, 'errors': {'invoice_number': [seen[key]]}})
+                continue
+            seen[key] = f"Invoice repeats row {index} of this import."
+        accepted.append((index, data))
+    errors.sort(key=lambda error: error['row'])
+    return accepted
+
+
+def import_payables(rows, user=None, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import ``rows`` and return ``{'created', 'failed', 'errors'}``.
+
+    Valid rows are imported even when other rows fail; each failure is
+    reported with its 1-based row number.
+    """
+    valid, errors = [], []
+    for start in range(0, len(rows), batch_size):
+        batch_valid, batch_errors = validate_batch(rows[start:start + batch_size], offset=start)
+        valid.extend(batch_valid)
+        errors.extend(batch_errors)
+
+    result = {'created': 0, 'failed': len(errors), 'errors': errors}
+    if dry_run or not valid:
+        check_duplicate_invoices(valid, errors)
+        result['failed'] = len(errors)
+        return result
+
+    with transaction.atomic():
+        list(Supplier.objects.select_for_update().filter(
+            pk__in={data['supplier'].pk for _index, data in valid}
+        ).values_list('pk', flat=True))
+        valid = check_duplicate_invoices(valid, errors)
+        result['failed'] = len(errors)
+        if not valid:
+            return result
+        numbers = DocumentSequence.objects.allocate_numbers(
+            'AP', len(valid), seed=last_issued_seed(AccountPayable, 'payment_number')
+        )
+        payables = [
+            AccountPayable(payment_number=number, created_by=user, **data)
+            for number, (_index, data) in zip(numbers, valid)
+        ]
+        AccountPayable.objects.bulk_create(payables, batch_size=batch_size)
+        record_status_changes(
+            AccountPayable,
+            [(payable.pk, '', payable.status) for payable in payables],
+            user=user,
+            note='Imported'
+        )
+
+        Supplier.recalculate_outstanding({payable.supplier_id for payable in payables})
+        schedule_reminders([payable.pk for payable in payables])
+
+        invalidate_dashboard()
+        transaction.on_commit(
+            lambda: payables_imported.send(sender=AccountPayable, payables=payables)
+        )
+
+    result['created'] = len(payables)
+    return result
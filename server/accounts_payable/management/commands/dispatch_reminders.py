@@ -0,0 +1,37 @@
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from accounts_payable.dispatch import dispatch_due_reminders
+
+
+class Command(BaseCommand):
+    help = 'Send due payment reminders in batches through the configured email backend.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Treat this day (YYYY-MM-DD) as today.')
+        parser.add_argument('--limit', type=int, help='Reminders per batch.')
+        parser.add_argument('--backend', help='Email backend to use instead of EMAIL_BACKEND.')
+        parser.add_argument('--workers', type=int, help='Parallel senders.')
+        parser.add_argument('--all', action='store_true', help='Keep sending batches until none are due.')
+    
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = datetime.datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Date must be in YYYY-MM-DD format.')
+        
+        totals = {'sent': 0, 'failed': 0, 'skipped': 0}
+        while True:
+            summary = dispatch_due_reminders(
+                today=today, limit=options['limit'], backend=options['backend'], workers=options['workers']
+            )
+            for outcome in totals:
+                totals[outcome] += summary[outcome]
+            # Failed and skipped reminders stay due until they run out of attempts
+            if not options['all'] or not summary['sent']:
+                break
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['sent']} reminders sent, {totals['failed']} failed, {totals['skipped']} skipped."
+        ))
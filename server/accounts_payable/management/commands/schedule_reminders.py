@@ -0,0 +1,24 @@
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from accounts_payable.reminders import schedule_reminders
+
+
+class Command(BaseCommand):
+    help = 'Create, reschedule and remove payment reminders to match payable due dates and statuses.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Treat this day (YYYY-MM-DD) as today.')
+    
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = datetime.datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Date must be in YYYY-MM-DD format.')
+        
+        counts = schedule_reminders(today=today)
+        self.stdout.write(self.style.SUCCESS(
+            f"{counts['created']} reminders created, {counts['updated']} rescheduled, "
+            f"{counts['deleted']} removed."
+        ))
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:01
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+OUTSTANDING_STATUSES = (
+    'covered',
+    'under_coverage',
+    'delivered',
+    'covered_and_delivered',
+    'under_coverage_and_delivered',
+)
+
+
+def backfill_outstanding_balance(apps, schema_editor):
+    Supplier = apps.get_model('accounts_payable', 'Supplier')
+    AccountPayable = apps.get_model('accounts_payable', 'AccountPayable')
+    outstanding = AccountPayable.objects.filter(
+        supplier=OuterRef('pk'),
+        status__in=OUTSTANDING_STATUSES
+    ).values('supplier').annotate(total=Sum('amount')).values('total')
+    Supplier.objects.update(
+        outstanding_balance=Coalesce(Subquery(outstanding), Value(0), output_field=models.DecimalField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_payable', '0002_supplier_pdf_file_alter_accountpayable_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplier',
+            name='outstanding_balance',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='outstanding balance'),
+        ),
+        migrations.RunPython(backfill_outstanding_balance, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_payable', '0003_supplier_outstanding_balance'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='accountpayable',
+            name='status',
+            field=models.CharField(choices=[('covered', 'Covered'), ('under_coverage', 'Under Coverage'), ('delivered', 'Delivered'), ('covered_and_delivered', 'Covered and Delivered'), ('under_coverage_and_delivered', 'Under Coverage and Delivered'), ('disbursed', 'Disbursed'), ('covered_and_disbursed', 'Covered and Disbursed'), ('under_coverage_and_disbursed', 'Under Coverage and Disbursed'), ('rejected', 'Rejected'), ('returned', 'Returned'), ('overdue', 'Overdue')], default='covered', max_length=40, verbose_name='status'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts_payable', '0004_alter_accountpayable_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayableStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('covered', 'Covered'), ('under_coverage', 'Under Coverage'), ('delivered', 'Delivered'), ('covered_and_delivered', 'Covered and Delivered'), ('under_coverage_and_delivered', 'Under Coverage and Delivered'), ('disbursed', 'Disbursed'), ('covered_and_disbursed', 'Covered and Disbursed'), ('under_coverage_and_disbursed', 'Under Coverage and Disbursed'), ('rejected', 'Rejected'), ('returned', 'Returned'), ('overdue', 'Overdue')], max_length=40, verbose_name='from status')),
+                ('to_status', models.CharField(choices=[('covered', 'Covered'), ('under_coverage', 'Under Coverage'), ('delivered', 'Delivered'), ('covered_and_delivered', 'Covered and Delivered'), ('under_coverage_and_delivered', 'Under Coverage and Delivered'), ('disbursed', 'Disbursed'), ('covered_and_disbursed', 'Covered and Disbursed'), ('under_coverage_and_disbursed', 'Under Coverage and Disbursed'), ('rejected', 'Rejected'), ('returned', 'Returned'), ('overdue', 'Overdue')], max_length=40, verbose_name='to status')),
+                ('changed_at', models.DateTimeField(verbose_name='changed at')),
+                ('note', models.CharField(blank=True, max_length=200, verbose_name='note')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payable_status_changes', to=settings.AUTH_USER_MODEL)),
+                ('payable', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='accounts_payable.accountpayable', verbose_name='payable')),
+            ],
+            options={
+                'verbose_name': 'payable status history',
+                'verbose_name_plural': 'payable status history',
+                'ordering': ['-changed_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:18
+
+from django.db import migrations, models
+
+
+def seed_current_statuses(apps, schema_editor):
+    """Open a history row for every payable that has none, from its last update."""
+    AccountPayable = apps.get_model('accounts_payable', 'AccountPayable')
+    PayableStatusHistory = apps.get_model('accounts_payable', 'PayableStatusHistory')
+    rows = AccountPayable.objects.filter(status_history__isnull=True).values_list('pk', 'status', 'updated_at')
+    PayableStatusHistory.objects.bulk_create(
+        (PayableStatusHistory(payable_id=pk, to_status=status, changed_at=updated_at, note='Initial status')
+         for pk, status, updated_at in rows.iterator()),
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_payable', '0005_payablestatushistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payablestatushistory',
+            name='duration',
+            field=models.DurationField(blank=True, null=True, verbose_name='duration'),
+        ),
+        migrations.AddField(
+            model_name='payablestatushistory',
+            name='left_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='left at'),
+        ),
+        migrations.AddIndex(
+            model_name='payablestatushistory',
+            index=models.Index(fields=['payable', 'changed_at'], name='accounts_pa_payable_9d738e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payablestatushistory',
+            index=models.Index(fields=['to_status', 'changed_at'], name='accounts_pa_to_stat_fc2055_idx'),
+        ),
+        migrations.RunPython(seed_current_statuses, migrations.RunPython.noop),
+    ]
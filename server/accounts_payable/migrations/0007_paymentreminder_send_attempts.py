@@ -0,0 +1,23 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_payable', '0006_payablestatushistory_dwell'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentreminder',
+            name='last_error',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='last error'),
+        ),
+        migrations.AddField(
+            model_name='paymentreminder',
+            name='send_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='send attempts'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_payable', '0007_paymentreminder_send_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplier',
+            name='priority',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Low'), (2, 'Below Normal'), (3, 'Normal'), (4, 'High'), (5, 'Critical')], default=3, verbose_name='payment priority'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_payable', '0008_supplier_priority'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='accountpayable',
+            name='due_date',
+            field=models.DateField(db_index=True, verbose_name='due date'),
+        ),
+    ]
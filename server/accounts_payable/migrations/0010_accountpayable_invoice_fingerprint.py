@@ -0,0 +1,39 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:31
+
+from django.db import migrations, models
+import re
+
+
+def fill_invoice_fingerprints(apps, schema_editor):
+    """Fingerprint the invoice numbers already on file."""
+    AccountPayable = apps.get_model('accounts_payable', 'AccountPayable')
+    payables = []
+    for payable in AccountPayable.objects.exclude(invoice_number='').only('pk', 'invoice_number').iterator():
+        fingerprint = re.sub(r'[^0-9A-Z]', '', payable.invoice_number.upper())
+        payable.invoice_fingerprint = re.sub(r'(?<![0-9])0+(?=[0-9])', '', fingerprint)
+        payables.append(payable)
+    AccountPayable.objects.bulk_update(payables, ['invoice_fingerprint'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_payable', '0009_accountpayable_due_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountpayable',
+            name='invoice_fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=50, verbose_name='invoice fingerprint'),
+        ),
+        migrations.RunPython(fill_invoice_fingerprints, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='accountpayable',
+            index=models.Index(fields=['supplier', 'invoice_fingerprint'], name='accounts_pa_supplie_1c04d7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accountpayable',
+            index=models.Index(fields=['supplier', 'amount', 'transaction_date'], name='accounts_pa_supplie_e4c1aa_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-17 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_payable', '0010_accountpayable_invoice_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentreminder',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='claimed at'),
+        ),
+    ]
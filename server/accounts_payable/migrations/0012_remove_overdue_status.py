@@ -0,0 +1,51 @@
+# Generated by Django 4.2.10 on 2026-10-17 19:25
+
+from django.db import migrations, models
+
+
+def restore_lifecycle_status(apps, schema_editor):
+    """
+    Move overdue payables back to the status they had before the overdue
+    sweep. The sweep's history row is dropped and the row it closed is
+    reopened, since the payable never really left that status.
+    """
+    AccountPayable = apps.get_model('accounts_payable', 'AccountPayable')
+    PayableStatusHistory = apps.get_model('accounts_payable', 'PayableStatusHistory')
+    for payable_id in AccountPayable.objects.filter(status='overdue').values_list('pk', flat=True):
+        entry = PayableStatusHistory.objects.filter(
+            payable_id=payable_id, to_status='overdue'
+        ).order_by('-changed_at', '-pk').first()
+        status = 'covered'
+        if entry is not None:
+            status = entry.from_status or status
+            PayableStatusHistory.objects.filter(
+                payable_id=payable_id, left_at=entry.changed_at
+            ).update(left_at=None, duration=None)
+            entry.delete()
+        AccountPayable.objects.filter(pk=payable_id).update(status=status)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_payable', '0011_paymentreminder_claimed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(restore_lifecycle_status, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='accountpayable',
+            name='status',
+            field=models.CharField(choices=[('covered', 'Covered'), ('under_coverage', 'Under Coverage'), ('delivered', 'Delivered'), ('covered_and_delivered', 'Covered and Delivered'), ('under_coverage_and_delivered', 'Under Coverage and Delivered'), ('disbursed', 'Disbursed'), ('covered_and_disbursed', 'Covered and Disbursed'), ('under_coverage_and_disbursed', 'Under Coverage and Disbursed'), ('rejected', 'Rejected'), ('returned', 'Returned')], default='covered', max_length=40, verbose_name='status'),
+        ),
+        migrations.AlterField(
+            model_name='payablestatushistory',
+            name='from_status',
+            field=models.CharField(blank=True, choices=[('covered', 'Covered'), ('under_coverage', 'Under Coverage'), ('delivered', 'Delivered'), ('covered_and_delivered', 'Covered and Delivered'), ('under_coverage_and_delivered', 'Under Coverage and Delivered'), ('disbursed', 'Disbursed'), ('covered_and_disbursed', 'Covered and Disbursed'), ('under_coverage_and_disbursed', 'Under Coverage and Disbursed'), ('rejected', 'Rejected'), ('returned', 'Returned')], max_length=40, verbose_name='from status'),
+        ),
+        migrations.AlterField(
+            model_name='payablestatushistory',
+            name='to_status',
+            field=models.CharField(choices=[('covered', 'Covered'), ('under_coverage', 'Under Coverage'), ('delivered', 'Delivered'), ('covered_and_delivered', 'Covered and Delivered'), ('under_coverage_and_delivered', 'Under Coverage and Delivered'), ('disbursed', 'Disbursed'), ('covered_and_disbursed', 'Covered and Disbursed'), ('under_coverage_and_disbursed', 'Under Coverage and Disbursed'), ('rejected', 'Rejected'), ('returned', 'Returned')], max_length=40, verbose_name='to status'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.10 on 2026-10-17 19:28
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_payable', '0012_remove_overdue_status'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='accountpayable',
+            name='accounts_pa_supplie_e4c1aa_idx',
+        ),
+        migrations.AddIndex(
+            model_name='accountpayable',
+            index=models.Index(models.F('supplier'), models.F('amount'), django.db.models.functions.comparison.Coalesce('invoice_date', 'transaction_date'), name='ap_supplier_amount_doc_date'),
+        ),
+        migrations.AddConstraint(
+            model_name='accountpayable',
+            constraint=models.UniqueConstraint(condition=models.Q(models.Q(('invoice_fingerprint', ''), _negated=True), models.Q(('status__in', ('rejected', 'returned')), _negated=True)), fields=('supplier', 'invoice_fingerprint'), name='ap_unique_supplier_invoice'),
+        ),
+    ]
@@ -1,15 +1,32 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, RegexValidator
 from django.conf import settings
+from document_numbers.models import DocumentSequence, last_issued_seed
+from finance_system.functions import DaysUntil
+from finance_system.settlements import SettlementRejected, check_posting, mark_settled, refresh_settled
+from finance_system.transitions import record_status_changes
 import datetime
-from django.db.models.signals import post_save
+import re
+from decimal import Decimal
+from django.db.models.signals import post_delete, pre_delete
 from django.dispatch import receiver
 
 
 class Supplier(models.Model):
     """Model for suppliers in the accounts payable system."""
     
+    PRIORITY_CHOICES = (
+        (1, _('Low')),
+        (2, _('Below Normal')),
+        (3, _('Normal')),
+        (4, _('High')),
+        (5, _('Critical')),
+    )
+    
     name = models.CharField(_('supplier name'), max_length=200)
     arabic_name = models.CharField(_('supplier name (Arabic)'), max_length=200, blank=True)
     contact_person = models.CharField(_('contact person'), max_length=100, blank=True)
@@ -22,6 +39,15 @@ class Supplier(models.Model):
     address = models.TextField(_('address'), blank=True)
     tax_number = models.CharField(_('tax number'), max_length=50, blank=True)
     payment_terms = models.PositiveIntegerField(_('payment terms (days)'), default=60)
+    priority = models.PositiveSmallIntegerField(_('payment priority'), choices=PRIORITY_CHOICES, default=3)
+    outstanding_balance = models.DecimalField(
+        _('outstanding balance'),
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        db_index=True,
+        editable=False
+    )
     pdf_file = models.FileField(_('PDF file'), upload_to='suppliers/pdf/', blank=True, null=True)
     is_active = models.BooleanField(_('active'), default=True)
     notes = models.TextField(_('notes'), blank=True, max_length=500)
@@ -44,10 +70,62 @@ class Supplier(models.Model):
     
     @property
     def total_outstanding(self):
-        """Calculate total outstanding amount for this supplier."""
-        return self.payables.filter(status__in=['scheduled', 'in_process']).aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
+        """Return the maintained outstanding amount for this supplier."""
+        return self.outstanding_balance
+    
+    @classmethod
+    def adjust_outstanding(cls, deltas):
+        """Apply a mapping of supplier id -> amount delta to the stored balances."""
+        for supplier_id, delta in deltas.items():
+            if supplier_id is not None and delta:
+                cls.objects.filter(pk=supplier_id).update(
+                    outstanding_balance=F('outstanding_balance') + delta
+                )
+    
+    @classmethod
+    def recalculate_outstanding(cls, supplier_ids=None):
+        """Recompute stored balances from payables with one UPDATE."""
+        outstanding = AccountPayable.objects.filter(
+            supplier=OuterRef('pk'),
+            status__in=AccountPayable.OUTSTANDING_STATUSES
+        ).values('supplier').annotate(total=Sum('amount')).values('total')
+        
+        queryset = cls.objects.all()
+        if supplier_ids is not None:
+            queryset = queryset.filter(pk__in=supplier_ids)
+        return queryset.update(
+            outstanding_balance=Coalesce(
+                Subquery(outstanding), Value(0), output_field=models.DecimalField()
+            )
+        )
+
+
+# Rejected and returned payables are never paid, so they may repeat an invoice
+UNPAID_STATUSES = ('rejected', 'returned')
+
+
+def normalize_invoice_number(invoice_number):
+    """
+    Fingerprint of a supplier invoice number: upper case, letters and digits
+    only, leading zeros dropped from numbers (``inv-00042`` -> ``INV42``).
+    """
+    fingerprint = re.sub(r'[^0-9A-Z]', '', (invoice_number or '').upper())
+    return re.sub(r'(?<![0-9])0+(?=[0-9])', '', fingerprint)
+
+
+class AccountPayableQuerySet(models.QuerySet):
+    """Due-date helpers for payables."""
+    
+    def with_days_until_due(self, today=None):
+        """Annotate ``days_to_due``, the days from ``today`` to the due date."""
+        return self.annotate(days_to_due=DaysUntil('due_date', today or datetime.date.today()))
+    
+    def due_in(self, buckets, today=None):
+        """Payables falling in any of the ``DUE_IN_BUCKETS`` values in ``buckets``."""
+        condition = models.Q()
+        for bucket in buckets:
+            condition |= AccountPayable.due_in_q(bucket, today)
+        return self.filter(condition)
 
 
 class AccountPayable(models.Model):
@@ -66,25 +144,52 @@ class AccountPayable(models.Model):
         ('returned', _('Returned')),
     )
     
+    # Statuses that are still owed to the supplier. Overdue is not a status:
+    # an outstanding payable is overdue once its due date has passed (see
+    # ``due_in_q``), so it never leaves its place in the lifecycle.
+    OUTSTANDING_STATUSES = (
+        'covered',
+        'under_coverage',
+        'delivered',
+        'covered_and_delivered',
+        'under_coverage_and_delivered',
+    )
+    
+    # Allowed moves for bulk status transitions
+    STATUS_TRANSITIONS = {
+        'under_coverage': ('covered', 'under_coverage_and_delivered', 'under_coverage_and_disbursed', 'rejected', 'returned'),
+        'covered': ('covered_and_delivered', 'covered_and_disbursed', 'disbursed', 'rejected', 'returned'),
+        'delivered': ('covered_and_delivered', 'under_coverage_and_delivered', 'disbursed', 'returned'),
+        'under_coverage_and_delivered': ('covered_and_delivered', 'under_coverage_and_disbursed', 'rejected'),
+        'covered_and_delivered': ('covered_and_disbursed', 'disbursed', 'returned'),
+        'under_coverage_and_disbursed': ('covered_and_disbursed',),
+        'covered_and_disbursed': ('disbursed',),
+        'rejected': ('under_coverage', 'covered'),
+        'returned': ('under_coverage', 'covered'),
+        'disbursed': (),
+    }
+    
+    # Status a full payment moves the payable to
+    SETTLED_STATUS = 'disbursed'
+    
+    # Due-date windows matching the reminder types
+    DUE_IN_BUCKETS = (
+        ('0-15', _('Due in 0-15 days')),
+        ('16-30', _('Due in 16-30 days')),
+        ('31-45', _('Due in 31-45 days')),
+        ('overdue', _('Overdue')),
+    )
+    DUE_IN_RANGES = {
+        '0-15': (0, 15),
+        '16-30': (16, 30),
+        '31-45': (31, 45),
+    }
+    
     # Auto-generate payment number
     def generate_payment_number():
-        today = datetime.date.today()
-        year = today.year
-        last_payment = AccountPayable.objects.filter(
-            created_at__year=year
-        ).order_by('-payment_number').first()
-        
-        if last_payment and last_payment.payment_number:
-            try:
-                # Extract the numeric part of the payment number
-                last_number = int(last_payment.payment_number.split('-')[-1])
-                new_number = last_number + 1
-            except (ValueError, IndexError):
-                new_number = 1
-        else:
-            new_number = 1
-        
-        return f"AP-{year}-{new_number:05d}"
+        return DocumentSequence.objects.next_number(
+            'AP', seed=last_issued_seed(AccountPayable, 'payment_number')
+        )
     
     supplier = models.ForeignKey(
         Supplier,
@@ -99,7 +204,7 @@ class AccountPayable(models.Model):
         verbose_name=_('bank')
     )
     transaction_date = models.DateField(_('transaction date'), default=datetime.date.today)
-    due_date = models.DateField(_('due date'))
+    due_date = models.DateField(_('due date'), db_index=True)
     amount = models.DecimalField(
         _('amount'),
         max_digits=14,
@@ -116,6 +221,7 @@ class AccountPayable(models.Model):
     )
     invoice_number = models.CharField(_('invoice number'), max_length=50, blank=True)
     invoice_date = models.DateField(_('invoice date'), null=True, blank=True)
+    invoice_fingerprint = models.CharField(_('invoice fingerprint'), max_length=50, blank=True, editable=False)
     status = models.CharField(
         _('status'),
         max_length=40,
@@ -133,6 +239,8 @@ class AccountPayable(models.Model):
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     last_reminder_date = models.DateField(_('last reminder date'), null=True, blank=True)
     
+    objects = AccountPayableQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('account payable')
         verbose_name_plural = _('accounts payable')
@@ -141,7 +249,22 @@ class AccountPayable(models.Model):
             models.CheckConstraint(
                 check=models.Q(due_date__gt=models.F('transaction_date')),
                 name='ap_due_date_after_transaction_date'
-            )
+            ),
+            # A supplier invoice may be paid once; checks before saving cannot
+            # see a concurrent insert, so the database has the last word
+            models.UniqueConstraint(
+                fields=['supplier', 'invoice_fingerprint'],
+                condition=~Q(invoice_fingerprint='') & ~Q(status__in=UNPAID_STATUSES),
+                name='ap_unique_supplier_invoice'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['supplier', 'invoice_fingerprint']),
+            # Partition and order of the fuzzy duplicate scan
+            models.Index(
+                'supplier', 'amount', Coalesce('invoice_date', 'transaction_date'),
+                name='ap_supplier_amount_doc_date'
+            ),
         ]
     
     def __str__(self):
@@ -155,11 +278,140 @@ class AccountPayable(models.Model):
             self.transaction_date = datetime.datetime.strptime(self.transaction_date, '%Y-%m-%d').date()
         if self.due_date and self.transaction_date and self.due_date <= self.transaction_date:
             raise ValueError(_('Due date must be after transaction date'))
+        self.invoice_fingerprint = normalize_invoice_number(self.invoice_number)
+        
+        with transaction.atomic():
+            adding = self._state.adding
+            if not adding:
+                self.lock_stored_state()
+            super().save(*args, **kwargs)
+            self.sync_supplier_outstanding()
+            self.sync_status_history(user=self.created_by if adding else None)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {'due_date', 'status'}.issubset(field_names):
+            instance._original_schedule = (instance.due_date, instance.status)
+        return instance
+    
+    def lock_stored_state(self):
+        """
+        Lock this row and remember what its stored version contributes to the
+        supplier balance and which status it has. Read from the database
+        rather than from the loaded instance, which may be deferred or out of date.
+        """
+        stored = type(self).objects.select_for_update().filter(pk=self.pk).values_list(
+            'supplier_id', 'status', 'amount'
+        ).first()
+        if stored is None:
+            self._original_outstanding, self._original_status = (None, Decimal('0')), ''
+            return
+        supplier_id, status, amount = stored
+        self._original_outstanding = (supplier_id, amount if status in self.OUTSTANDING_STATUSES else Decimal('0'))
+        self._original_status = status
+    
+    def outstanding_contribution(self):
+        """Return (supplier id, amount) this payable adds to the outstanding balance."""
+        if self.status in self.OUTSTANDING_STATUSES:
+            return self.supplier_id, Decimal(str(self.amount))
+        return self.supplier_id, Decimal('0')
+    
+    def sync_supplier_outstanding(self, deleted=False):
+        """Apply the change in this payable's contribution to the supplier balance."""
+        old_supplier_id, old_amount = getattr(self, '_original_outstanding', (None, Decimal('0')))
+        # A deleted row may be deferred and can no longer load its fields
+        new_supplier_id, new_amount = (None, Decimal('0')) if deleted else self.outstanding_contribution()
         
-        super().save(*args, **kwargs)
+        deltas = {old_supplier_id: -old_amount}
+        deltas[new_supplier_id] = deltas.get(new_supplier_id, Decimal('0')) + new_amount
+        Supplier.adjust_outstanding(deltas)
+        self._original_outstanding = (new_supplier_id, new_amount)
+    
+    def sync_status_history(self, user=None):
+        """Append a status history row when this save changed the status."""
+        previous = getattr(self, '_original_status', '')
+        if previous != self.status:
+            record_status_changes(type(self), [(self.pk, previous, self.status)], user=user)
+        self._original_status = self.status
+    
+    @classmethod
+    def transition_errors(cls, changes):
+        """
+        Invoice check for bulk status moves. A rejected or returned payable
+        can only be reopened while no other payable of its supplier will pay
+        the same invoice. Returns pk -> reason for the rejected moves.
+        """
+        reopening = [
+            pk for pk, source, target in changes
+            if source in UNPAID_STATUSES and target not in UNPAID_STATUSES
+        ]
+        rows = cls.objects.filter(pk__in=reopening).exclude(invoice_fingerprint='').in_bulk()
+        if not rows:
+            return {}
+        list(Supplier.objects.select_for_update().filter(
+            pk__in={row.supplier_id for row in rows.values()}
+        ).values_list('pk', flat=True))
+        seen = {
+            (supplier_id, fingerprint): payment_number
+            for supplier_id, fingerprint, payment_number in cls.objects.filter(
+                supplier_id__in={row.supplier_id for row in rows.values()},
+                invoice_fingerprint__in={row.invoice_fingerprint for row in rows.values()}
+            ).exclude(status__in=UNPAID_STATUSES).values_list(
+                'supplier_id', 'invoice_fingerprint', 'payment_number'
+            )
+        }
+        errors = {}
+        for pk in reopening:
+            if pk not in rows:
+                continue
+            key = (rows[pk].supplier_id, rows[pk].invoice_fingerprint)
+            if key in seen:
+                errors[pk] = f'Invoice already recorded on payment {seen[key]}.'
+                continue
+            seen[key] = rows[pk].payment_number
+        return errors
+    
+    @classmethod
+    def statuses_changed(cls, pks):
+        """Refresh supplier balances after a bulk status update of ``pks``."""
+        Supplier.recalculate_outstanding(
+            cls.objects.filter(pk__in=pks).values('supplier_id').distinct()
+        )
+    
+    @classmethod
+    def payments_posted(cls, pks):
+        """Payables keep no paid total, so bulk-created transactions need no refresh."""
+    
+    @classmethod
+    def invoice_duplicates(cls, supplier_id, invoice_number, exclude_pk=None):
+        """Payables of ``supplier_id`` that will be paid and carry the same invoice fingerprint."""
+        fingerprint = normalize_invoice_number(invoice_number)
+        if not fingerprint:
+            return cls.objects.none()
+        return cls.objects.filter(
+            supplier_id=supplier_id, invoice_fingerprint=fingerprint
+        ).exclude(pk=exclude_pk).exclude(status__in=UNPAID_STATUSES)
+    
+    @classmethod
+    def due_in_q(cls, bucket, today=None):
+        """
+        Return the filter for a ``DUE_IN_BUCKETS`` value as a range on
+        ``due_date``; overdue only counts payables still outstanding.
+        """
+        today = today or datetime.date.today()
+        if bucket == 'overdue':
+            return models.Q(due_date__lt=today, status__in=cls.OUTSTANDING_STATUSES)
+        start, end = cls.DUE_IN_RANGES[bucket]
+        return models.Q(
+            due_date__gte=today + datetime.timedelta(days=start),
+            due_date__lte=today + datetime.timedelta(days=end)
+        )
     
     def days_until_due(self):
         """Calculate days until due date."""
+        if hasattr(self, 'days_to_due'):
+            return self.days_to_due
         if self.due_date:
             today = datetime.date.today()
             return (self.due_date - today).days
@@ -175,6 +427,9 @@ class PayableTransaction(models.Model):
         ('adjustment', _('Adjustment')),
     )
     
+    # Transaction types that pay the supplier
+    PAYMENT_TYPES = ('partial_payment', 'full_payment')
+    
     payable = models.ForeignKey(
         AccountPayable,
         on_delete=models.CASCADE,
@@ -212,12 +467,60 @@ class PayableTransaction(models.Model):
         return f"{self.payable.payment_number} - {self.transaction_type} - {self.amount}"
     
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        
-        # Update payable status if full payment
-        if self.transaction_type == 'full_payment':
-            self.payable.status = 'paid'
-            self.payable.save()
+        with transaction.atomic():
+            check_posting(AccountPayable, self)
+            super().save(*args, **kwargs)
+            
+            # Settle the payable in place instead of re-saving it
+            if self.transaction_type == 'full_payment':
+                changes = mark_settled(AccountPayable, [self.payable_id], user=self.created_by)
+                if changes and 'payable' in self._state.fields_cache:
+                    refresh_settled(self.payable)
+    
+    def clean(self):
+        super().clean()
+        try:
+            check_posting(AccountPayable, self, lock=False)
+        except SettlementRejected as exc:
+            raise ValidationError({'transaction_type': exc.messages})
+
+
+class PayableStatusHistory(models.Model):
+    """Append-only record of a payable's status changes."""
+    
+    payable = models.ForeignKey(
+        AccountPayable,
+        on_delete=models.CASCADE,
+        related_name='status_history',
+        verbose_name=_('payable')
+    )
+    from_status = models.CharField(
+        _('from status'), max_length=40, choices=AccountPayable.STATUS_CHOICES, blank=True
+    )
+    to_status = models.CharField(_('to status'), max_length=40, choices=AccountPayable.STATUS_CHOICES)
+    changed_at = models.DateTimeField(_('changed at'))
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='payable_status_changes'
+    )
+    note = models.CharField(_('note'), max_length=200, blank=True)
+    left_at = models.DateTimeField(_('left at'), null=True, blank=True)
+    duration = models.DurationField(_('duration'), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('payable status history')
+        verbose_name_plural = _('payable status history')
+        ordering = ['-changed_at']
+        indexes = [
+            models.Index(fields=['payable', 'changed_at']),
+            models.Index(fields=['to_status', 'changed_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.payable_id}: {self.from_status} -> {self.to_status}"
 
 
 class PaymentReminder(models.Model):
@@ -250,6 +553,9 @@ class PaymentReminder(models.Model):
         null=True,
         related_name='sent_reminders'
     )
+    send_attempts = models.PositiveSmallIntegerField(_('send attempts'), default=0, editable=False)
+    last_error = models.CharField(_('last error'), max_length=255, blank=True, editable=False)
+    claimed_at = models.DateTimeField(_('claimed at'), null=True, blank=True, editable=False)
     notes = models.TextField(_('notes'), blank=True)
     
     class Meta:
@@ -262,24 +568,13 @@ class PaymentReminder(models.Model):
         return f"{self.payable.payment_number} - {self.get_reminder_type_display()}"
 
 
-@receiver(post_save, sender=AccountPayable)
-def create_payment_reminders(sender, instance, created, **kwargs):
-    """Create payment reminders when a new AccountPayable is created."""
-    if created and instance.due_date:
-        # Calculate reminder dates
-        due_date = instance.due_date
-        reminder_dates = {
-            '45_days': due_date - datetime.timedelta(days=45),
-            '30_days': due_date - datetime.timedelta(days=30),
-            '15_days': due_date - datetime.timedelta(days=15),
-        }
-        
-        # Create reminder objects
-        for reminder_type, reminder_date in reminder_dates.items():
-            # Only create reminders for future dates
-            if reminder_date >= datetime.date.today():
-                PaymentReminder.objects.create(
-                    payable=instance,
-                    reminder_type=reminder_type,
-                    reminder_date=reminder_date
-                )
+@receiver(pre_delete, sender=AccountPayable)
+def lock_deleted_payable(sender, instance, **kwargs):
+    """Read what a payable about to be deleted adds to its supplier's balance."""
+    instance.lock_stored_state()
+
+
+@receiver(post_delete, sender=AccountPayable)
+def release_supplier_outstanding(sender, instance, **kwargs):
+    """Remove a deleted payable from its supplier's outstanding balance."""
+    instance.sync_supplier_outstanding(deleted=True)
@@ -0,0 +1,130 @@
+"""
+Payment-run planning: choose which open payables each bank account pays.
+
+Candidates for all requested banks are read with one ``values_list`` query
+and scored as NumPy arrays. Each bank's selection is a greedy knapsack
+solve: payables are taken in order of value per unit of cash (urgency,
+overdue penalty and supplier priority), and items that no longer fit are
+skipped so smaller ones can still use the remaining balance.
+"""
+import datetime
+from decimal import Decimal
+
+import numpy as np
+
+from .models import AccountPayable
+
+
+# Score = 1 + urgency + overdue penalty + priority bonus, per unit of amount
+OVERDUE_PENALTY_PER_DAY = 0.05
+MAX_OVERDUE_DAYS = 90
+PRIORITY_WEIGHT = 0.5
+NORMAL_PRIORITY = 3
+DEFAULT_HORIZON_DAYS = 7
+
+
+def payable_scores(days_to_due, priorities):
+    """Vectorized score of each candidate; higher is paid first."""
+    overdue_days = np.clip(-days_to_due, 0, MAX_OVERDUE_DAYS)
+    urgency = 1.0 / (1.0 + np.maximum(days_to_due, 0))
+    return 1.0 + urgency + OVERDUE_PENALTY_PER_DAY * overdue_days + PRIORITY_WEIGHT * (priorities - NORMAL_PRIORITY)
+
+
+def greedy_select(order, amounts, budget):
+    """
+    Walk candidates in ``order`` and take every one that still fits in
+    ``budget``. Each pass takes the longest affordable prefix at once, so
+    the number of passes is the number of skips, not the number of items.
+    Returns a boolean mask over ``amounts``.
+    """
+    selected = np.zeros(len(amounts), dtype=bool)
+    remaining = order
+    while remaining.size and budget > 0:
+        remaining = remaining[amounts[remaining] <= budget]
+        if not remaining.size:
+            break
+        spent = np.cumsum(amounts[remaining])
+        take = spent <= budget
+        # A prefix fits (at least its first item), then the first item that does not is skipped
+        count = len(take) if take.all() else int(np.argmin(take))
+        selected[remaining[:count]] = True
+        budget -= int(spent[count - 1])
+        remaining = remaining[count + 1:]
+    return selected
+
+
+def _cents(value):
+    return int((Decimal(value) * 100).to_integral_value())
+
+
+def _amount(cents):
+    return Decimal(int(cents)) / 100
+
+
+def plan_payment_run(balances, run_date=None, horizon_days=DEFAULT_HORIZON_DAYS, include_items=True):
+    """
+    Plan a payment run for ``balances`` (bank id -> available balance).
+
+    Candidates are outstanding payables drawn on each bank that fall due
+    within ``horizon_days`` of ``run_date`` (overdue ones included).
+    """
+    run_date = run_date or datetime.date.today()
+    rows = list(AccountPayable.objects.filter(
+        bank_id__in=list(balances),
+        status__in=AccountPayable.OUTSTANDING_STATUSES,
+        due_date__lte=run_date + datetime.timedelta(days=horizon_days)
+    ).values_list(
+        'pk', 'bank_id', 'amount', 'due_date', 'supplier__priority', 'payment_number', 'supplier__name'
+    ))
+
+    if rows:
+        pks, bank_ids, amounts, due_dates, priorities, numbers, supplier_names = zip(*rows)
+    else:
+        pks = bank_ids = amounts = due_dates = priorities = numbers = supplier_names = ()
+    count = len(rows)
+    bank_ids = np.fromiter(bank_ids, dtype=np.int64, count=count)
+    cents = np.fromiter((int(amount * 100) for amount in amounts), dtype=np.int64, count=count)
+    days_to_due = np.fromiter(
+        (due_date.toordinal() for due_date in due_dates), dtype=np.int64, count=count
+    ) - run_date.toordinal()
+    scores = payable_scores(days_to_due, np.fromiter(priorities, dtype=np.float64, count=count))
+
+    plans = []
+    for bank_id, balance in balances.items():
+        candidates = np.flatnonzero(bank_ids == bank_id)
+        # Best score first, then earliest due, then smallest amount
+        order = candidates[np.lexsort((cents[candidates], days_to_due[candidates], -scores[candidates]))]
+        budget = _cents(balance)
+        selected = order[greedy_select(order, cents, budget)[order]]
+
+        spent = int(cents[selected].sum())
+        plan = {
+            'bank': bank_id,
+            'available_balance': _amount(budget),
+            'candidates': int(candidates.size),
+            'selected_count': int(selected.size),
+            'selected_amount': _amount(spent),
+            'remaining_balance': _amount(budget - spent),
+            'deferred_count': int(candidates.size - selected.size),
+            'deferred_amount': _amount(cents[candidates].sum() - spent),
+        }
+        if include_items:
+            plan['items'] = [
+                {
+                    'id': pks[index],
+                    'payment_number': numbers[index],
+                    'supplier_name': supplier_names[index],
+                    'amount': amounts[index],
+                    'due_date': due_dates[index],
+                    'days_to_due': int(days_to_due[index]),
+                    'score': round(float(scores[index]), 4),
+                }
+                for index in selected
+            ]
+        plans.append(plan)
+
+    return {
+        'run_date': run_date,
+        'horizon_days': horizon_days,
+        'banks': plans,
+    }
@@ -0,0 +1,120 @@
+"""
+Set-based payment reminder scheduling.
+
+The reminders every payable should have are derived from its due date and
+status, diffed against the stored rows and the difference applied with one
+``bulk_create``, one ``bulk_update`` and one ``delete`` per batch.
+"""
+import datetime
+
+from django.db import transaction
+from django.dispatch import Signal
+
+from .models import AccountPayable, PaymentReminder
+
+
+# Sent after commit when a batch changed anything, with the ``reminder_ids``
+# created or rescheduled
+reminders_scheduled = Signal()
+
+
+# Days before the due date for each advance reminder
+ADVANCE_REMINDERS = {
+    '45_days': 45,
+    '30_days': 30,
+    '15_days': 15,
+}
+# Days after the due date for the overdue reminder
+OVERDUE_REMINDER_DELAY = 1
+SCHEDULE_BATCH_SIZE = 1000
+
+
+def reminder_dates(due_date):
+    """Return reminder type -> date for a payable due on ``due_date``."""
+    dates = {
+        reminder_type: due_date - datetime.timedelta(days=days)
+        for reminder_type, days in ADVANCE_REMINDERS.items()
+    }
+    dates['overdue'] = due_date + datetime.timedelta(days=OVERDUE_REMINDER_DELAY)
+    return dates
+
+
+def diff_reminders(payables, existing, today):
+    """
+    Compare the wanted reminders of ``payables`` (``(id, due_date, status)``)
+    with ``existing`` reminders and return ``(to_create, to_update, to_delete)``.
+
+    Advance reminders are only created for dates still ahead. Unsent
+    reminders follow due-date edits; a sent reminder is re-armed when the
+    due date moved it into the future. Payables that are no longer
+    outstanding lose their unsent reminders.
+    """
+    current = {}
+    for reminder in existing:
+        current.setdefault(reminder.payable_id, {})[reminder.reminder_type] = reminder
+
+    to_create, to_update, to_delete = [], [], []
+    for payable_id, due_date, status in payables:
+        stored = current.get(payable_id, {})
+        if status not in AccountPayable.OUTSTANDING_STATUSES:
+            to_delete.extend(reminder.pk for reminder in stored.values() if not reminder.sent)
+            continue
+
+        for reminder_type, reminder_date in reminder_dates(due_date).items():
+            reminder = stored.get(reminder_type)
+            if reminder is None:
+                if reminder_date >= today or reminder_type == 'overdue':
+                    to_create.append(PaymentReminder(
+                        payable_id=payable_id, reminder_type=reminder_type, reminder_date=reminder_date
+                    ))
+            elif reminder.reminder_date != reminder_date:
+                if reminder.sent:
+                    if reminder_date <= today:
+                        continue
+                    reminder.sent, reminder.sent_date, reminder.sent_by_id = False, None, None
+                reminder.reminder_date = reminder_date
+                to_update.append(reminder)
+
+    return to_create, to_update, to_delete
+
+
+def schedule_reminders(payable_ids=None, today=None, batch_size=SCHEDULE_BATCH_SIZE):
+    """
+    Bring the reminders of ``payable_ids`` (all payables when ``None``) in
+    line with their due dates and statuses. Returns the number of reminders
+    created, updated and deleted.
+    """
+    today = today or datetime.date.today()
+    payables = AccountPayable.objects.order_by('pk')
+    if payable_ids is not None:
+        payables = payables.filter(pk__in=payable_ids)
+    payables = list(payables.values_list('pk', 'due_date', 'status'))
+
+    counts = {'created': 0, 'updated': 0, 'deleted': 0}
+    for start in range(0, len(payables), batch_size):
+        batch = payables[start:start + batch_size]
+        with transaction.atomic():
+            existing = PaymentReminder.objects.select_for_update().filter(
+                payable_id__in=[payable_id for payable_id, _due, _status in batch]
+            )
+            to_create, to_update, to_delete = diff_reminders(batch, existing, today)
+
+            created = PaymentReminder.objects.bulk_create(to_create)
+            PaymentReminder.objects.bulk_update(
+                to_update, ['reminder_date', 'sent', 'sent_date', 'sent_by']
+            )
+            if to_delete:
+                PaymentReminder.objects.filter(pk__in=to_delete).delete()
+
+            changed = [reminder.pk for reminder in created + to_update]
+            if changed or to_delete:
+                transaction.on_commit(
+                    lambda changed=changed: reminders_scheduled.send(
+                        sender=PaymentReminder, reminder_ids=changed
+                    )
+                )
+
+        counts['created'] += len(created)
+        counts['updated'] += len(to_update)
+        counts['deleted'] += len(to_delete)
+    return counts
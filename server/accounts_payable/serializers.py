@@ -1,20 +1,29 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from finance_system.exports import ExportOptionsSerializer
+from finance_system.settlements import PostingSerializerMixin
+from finance_system.pagination import DetailOptionsSerializer, MAX_DETAIL_PAGE_SIZE, decode_cursor, encode_cursor
 from .models import Supplier, AccountPayable, PayableTransaction, PaymentReminder
-from accounts_receivable.serializers import BankSerializer
+from accounts_receivable.models import Bank
+from accounts_receivable.serializers import BankSerializer, ReceivableImportSerializer, StatusRollupSerializer
+from .duplicates import DEFAULT_WINDOW_DAYS
+from .payment_runs import DEFAULT_HORIZON_DAYS
 
 
 class SupplierSerializer(serializers.ModelSerializer):
     """Serializer for the Supplier model."""
     
-    total_outstanding = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    total_outstanding = serializers.DecimalField(
+        source='outstanding_balance', max_digits=14, decimal_places=2, read_only=True
+    )
     
     class Meta:
         model = Supplier
         fields = '__all__'
-        read_only_fields = ('created_by', 'created_at', 'updated_at', 'total_outstanding')
+        read_only_fields = ('created_by', 'created_at', 'updated_at', 'outstanding_balance', 'total_outstanding')
 
 
-class PayableTransactionSerializer(serializers.ModelSerializer):
+class PayableTransactionSerializer(PostingSerializerMixin, serializers.ModelSerializer):
     """Serializer for the PayableTransaction model."""
     
     class Meta:
@@ -49,11 +58,45 @@ class AccountPayableSerializer(serializers.ModelSerializer):
     
     def validate(self, data):
         """
-        Validate that the due date is after the transaction date.
+        Validate that the due date is after the transaction date and that the
+        supplier invoice is not already recorded on another payable.
         """
         if data.get('due_date') and data.get('transaction_date') and data['due_date'] <= data['transaction_date']:
             raise serializers.ValidationError("Due date must be after transaction date.")
+        
+        self.check_invoice(data)
         return data
+    
+    def check_invoice(self, data):
+        """Reject a supplier invoice already recorded on another payable."""
+        supplier = data.get('supplier', getattr(self.instance, 'supplier', None))
+        invoice_number = data.get('invoice_number', getattr(self.instance, 'invoice_number', ''))
+        if supplier and invoice_number:
+            duplicate = AccountPayable.invoice_duplicates(
+                supplier.pk, invoice_number, exclude_pk=getattr(self.instance, 'pk', None)
+            ).values_list('payment_number', flat=True).first()
+            if duplicate:
+                raise serializers.ValidationError(
+                    {'invoice_number': f"Invoice already recorded on payment {duplicate}."}
+                )
+    
+    def save(self, **kwargs):
+        """
+        Save with the supplier locked and the invoice checked again, as the
+        importer does, so entries of one invoice queue up behind each other.
+        An insert that still gets past (e.g. from the admin) is stopped by
+        the unique constraint and reported the same way.
+        """
+        supplier = self.validated_data.get('supplier', getattr(self.instance, 'supplier', None))
+        try:
+            with transaction.atomic():
+                if supplier:
+                    Supplier.objects.select_for_update().filter(pk=supplier.pk).values_list('pk').first()
+                    self.check_invoice(self.validated_data)
+                return super().save(**kwargs)
+        except IntegrityError:
+            self.check_invoice(self.validated_data)
+            raise
 
 
 class SendReminderSerializer(serializers.Serializer):
@@ -62,20 +105,76 @@ class SendReminderSerializer(serializers.Serializer):
     notes = serializers.CharField(required=False, allow_blank=True)
 
 
+class DispatchRemindersSerializer(serializers.Serializer):
+    """Serializer for dispatching a batch of due payment reminders."""
+    
+    date = serializers.DateField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, required=False)
+
+
+class PaymentRunBankSerializer(serializers.Serializer):
+    """One bank account and the cash available to it in a payment run."""
+    
+    bank = serializers.IntegerField()
+    available_balance = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=0)
+
+
+class PaymentRunPlanSerializer(serializers.Serializer):
+    """Serializer for payment run planning parameters."""
+    
+    run_date = serializers.DateField(required=False)
+    horizon_days = serializers.IntegerField(min_value=0, max_value=365, default=DEFAULT_HORIZON_DAYS)
+    include_items = serializers.BooleanField(default=True)
+    banks = PaymentRunBankSerializer(many=True, allow_empty=False)
+    
+    def validate_banks(self, value):
+        bank_ids = [item['bank'] for item in value]
+        if len(set(bank_ids)) != len(bank_ids):
+            raise serializers.ValidationError("Each bank can only be listed once.")
+        missing = set(bank_ids) - set(Bank.objects.filter(pk__in=bank_ids).values_list('pk', flat=True))
+        if missing:
+            raise serializers.ValidationError(f"Unknown banks: {sorted(missing)}.")
+        return value
+
+
+class DashboardReminderSerializer(PaymentReminderSerializer):
+    """Payment reminder with the payable details shown on the dashboard."""
+    
+    payment_number = serializers.CharField(source='payable.payment_number', read_only=True)
+    supplier_name = serializers.CharField(source='payable.supplier.name', read_only=True)
+    due_date = serializers.DateField(source='payable.due_date', read_only=True)
+    amount = serializers.DecimalField(source='payable.amount', max_digits=14, decimal_places=2, read_only=True)
+
+
+class DashboardTransactionSerializer(PayableTransactionSerializer):
+    """Payable transaction with the payable details shown on the dashboard."""
+    
+    payment_number = serializers.CharField(source='payable.payment_number', read_only=True)
+    supplier_name = serializers.CharField(source='payable.supplier.name', read_only=True)
+
+
+class DashboardBucketSerializer(serializers.Serializer):
+    """Serializer for a due-date bucket of the dashboard rollup."""
+    
+    count = serializers.IntegerField()
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
 class DashboardSummarySerializer(serializers.Serializer):
     """Serializer for the dashboard summary data."""
     
     total_payables = serializers.DecimalField(max_digits=14, decimal_places=2)
-    scheduled_payables = serializers.DecimalField(max_digits=14, decimal_places=2)
-    in_process_payables = serializers.DecimalField(max_digits=14, decimal_places=2)
-    paid_payables = serializers.DecimalField(max_digits=14, decimal_places=2)
-    delayed_payables = serializers.DecimalField(max_digits=14, decimal_places=2)
+    total_count = serializers.IntegerField()
+    outstanding_payables = DashboardBucketSerializer()
+    overdue_payables = DashboardBucketSerializer()
+    due_this_week = DashboardBucketSerializer()
+    by_status = StatusRollupSerializer(many=True)
     total_suppliers = serializers.IntegerField()
-    upcoming_reminders = PaymentReminderSerializer(many=True)
-    recent_transactions = PayableTransactionSerializer(many=True)
+    upcoming_reminders = DashboardReminderSerializer(many=True)
+    recent_transactions = DashboardTransactionSerializer(many=True)
 
 
-class PayablesReportSerializer(serializers.Serializer):
+class PayablesReportSerializer(ExportOptionsSerializer, DetailOptionsSerializer):
     """Serializer for the payables report data."""
     
     start_date = serializers.DateField()
@@ -83,9 +182,87 @@ class PayablesReportSerializer(serializers.Serializer):
     status = serializers.CharField(required=False)
     supplier = serializers.IntegerField(required=False)
     bank = serializers.IntegerField(required=False)
+    
+    detail_keyset = ('-transaction_date', '-id')
+    keyset_fields = {'transaction_date': serializers.DateField(), 'id': serializers.IntegerField()}
+
+
+class StatusDwellReportSerializer(serializers.Serializer):
+    """Serializer for the time-in-status report parameters."""
+    
+    group_by = serializers.ChoiceField(choices=['status', 'supplier', 'bank'], default='status')
+    status = serializers.ChoiceField(choices=AccountPayable.STATUS_CHOICES, required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    include_open = serializers.BooleanField(default=False)
 
 
 class UpcomingPaymentsSerializer(serializers.Serializer):
     """Serializer for the upcoming payments data."""
     
-    days = serializers.IntegerField(default=30)  # Number of days to look ahead
+    days = serializers.IntegerField(default=30, min_value=1, max_value=366)  # Number of days to look ahead
+    compact = serializers.BooleanField(default=False)
+    page_size = serializers.IntegerField(min_value=1, max_value=MAX_DETAIL_PAGE_SIZE, required=False)
+    cursor = serializers.CharField(required=False)
+    
+    # Compact cursors carry the horizon totals, so they are signed and bound
+    # to the ``days`` and ``today`` of the first page
+    CURSOR_SALT = 'accounts_payable.upcoming_payments'
+    cursor_fields = {
+        'due_date': serializers.DateField(),
+        'id': serializers.IntegerField(),
+        'total_amount': serializers.DecimalField(max_digits=16, decimal_places=2),
+        'count': serializers.IntegerField(min_value=0),
+        'days': serializers.IntegerField(),
+        'today': serializers.DateField(),
+    }
+    
+    @classmethod
+    def make_cursor(cls, last, total_amount, count, days, today):
+        """Sign the position after ``last`` together with the horizon it belongs to."""
+        return encode_cursor(
+            [last['due_date'], last['id'], total_amount, count, days, today], salt=cls.CURSOR_SALT
+        )
+    
+    def validate_cursor(self, value):
+        values = decode_cursor(value, salt=self.CURSOR_SALT)
+        if len(values) != len(self.cursor_fields):
+            raise serializers.ValidationError("Invalid cursor.")
+        try:
+            return {
+                name: field.to_internal_value(item)
+                for (name, field), item in zip(self.cursor_fields.items(), values)
+            }
+        except serializers.ValidationError:
+            raise serializers.ValidationError("Invalid cursor.")
+    
+    def validate(self, attrs):
+        cursor = attrs.get('cursor')
+        if cursor and cursor['days'] != attrs['days']:
+            raise serializers.ValidationError({'cursor': ["Cursor belongs to a different horizon."]})
+        return attrs
+
+
+class StatusTransitionItemSerializer(serializers.Serializer):
+    """One requested status move."""
+    
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=AccountPayable.STATUS_CHOICES)
+
+
+class PayableImportSerializer(ReceivableImportSerializer):
+    """Serializer for a bulk payable import: an uploaded CSV/JSON file or inline rows."""
+
+
+class DuplicateScanSerializer(serializers.Serializer):
+    """Serializer for the fuzzy duplicate invoice scan parameters."""
+    
+    window_days = serializers.IntegerField(min_value=0, max_value=365, default=DEFAULT_WINDOW_DAYS)
+    supplier = serializers.PrimaryKeyRelatedField(queryset=Supplier.objects.all(), required=False)
+
+
+class BulkStatusTransitionSerializer(serializers.Serializer):
+    """Serializer for a bulk status transition request."""
+    
+    transitions = StatusTransitionItemSerializer(many=True, allow_empty=False, max_length=1000)
+    note = serializers.CharField(max_length=200, required=False, allow_blank=True, default='')
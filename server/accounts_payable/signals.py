@@ -0,0 +1,62 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+from finance_system.rollups import invalidate
+from finance_system.settlements import payments_settled
+from finance_system.transitions import status_transitioned
+from .models import Supplier, AccountPayable, PayableTransaction, PaymentReminder
+from .reminders import schedule_reminders, reminders_scheduled
+
+
+# Sent once per bulk import, after commit, with the created ``payables``
+payables_imported = Signal()
+
+DASHBOARD_CACHE_KEY = 'accounts_payable:dashboard_summary'
+# Writes invalidate the summary; the timeout bounds any invalidation that is missed
+DASHBOARD_CACHE_TIMEOUT = 5 * 60
+
+
+def dashboard_cache_key(today=None):
+    """Key of the summary built for ``today``, the same local date its buckets use."""
+    return f'{DASHBOARD_CACHE_KEY}:{(today or timezone.localdate()).isoformat()}'
+
+
+def invalidate_dashboard():
+    """Drop today's cached dashboard summary so the next poll recomputes it."""
+    invalidate(dashboard_cache_key())
+
+
+@receiver(post_save, sender=AccountPayable)
+@receiver(post_delete, sender=AccountPayable)
+@receiver(post_save, sender=PayableTransaction)
+@receiver(post_delete, sender=PayableTransaction)
+@receiver(post_save, sender=PaymentReminder)
+@receiver(post_delete, sender=PaymentReminder)
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Supplier)
+def invalidate_dashboard_on_write(sender, **kwargs):
+    """Invalidate the dashboard summary on every payable-side write."""
+    invalidate_dashboard()
+
+
+@receiver(status_transitioned, sender=AccountPayable)
+@receiver(payments_settled, sender=AccountPayable)
+@receiver(reminders_scheduled)
+def invalidate_dashboard_on_bulk_write(sender, **kwargs):
+    """Bulk transitions, settlements and reminder scheduling bypass post_save, so invalidate explicitly."""
+    invalidate_dashboard()
+
+
+@receiver(post_save, sender=AccountPayable)
+def schedule_payable_reminders(sender, instance, created, **kwargs):
+    """Rebuild the reminders of a new payable or one whose due date or status changed."""
+    schedule = (instance.due_date, instance.status)
+    if created or getattr(instance, '_original_schedule', None) != schedule:
+        schedule_reminders([instance.pk])
+    instance._original_schedule = schedule
+
+
+@receiver(status_transitioned, sender=AccountPayable)
+def schedule_transitioned_reminders(sender, changes, **kwargs):
+    """Drop or restore reminders for payables moved by a bulk transition."""
+    schedule_reminders([pk for pk, _source, _target in changes])
@@ -1,9 +1,25 @@
-from django.test import TestCase
-from rest_framework.test import APITestCase
+from django.core import mail
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from django.contrib.auth import get_user_model
-from .models import AccountPayable, Supplier
+from .models import AccountPayable, Supplier, PaymentReminder, PayableTransaction
+from .serializers import AccountPayableSerializer
+from .reminders import schedule_reminders
+from .dispatch import claim_reminders, dispatch_reminders, dispatch_due_reminders, due_reminders
+from .payment_runs import greedy_select
+from .importers import import_payables
+from .duplicates import fuzzy_duplicates
+from .views import DashboardSummaryView
+from finance_system.settlements import SettlementRejected
+from finance_system.pagination import encode_cursor
 from accounts_receivable.models import Bank
+import datetime
+import numpy as np
 import pytest
 
 @pytest.fixture
@@ -97,3 +113,461 @@ class AccountsPayableAPITestCase(APITestCase):
         self.assertGreater(len(response.data['results']), 0)  # Ensure the list is not empty
 
 # Create your tests here.
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class PayableListQueryBudgetTestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='budget@example.com', password='testpassword')
+        self.client.force_authenticate(self.user)
+        due_date = datetime.date.today() + datetime.timedelta(days=30)
+        for i in range(20):
+            supplier = Supplier.objects.create(name=f"Budget Supplier {i}")
+            bank = Bank.objects.create(name=f"Budget Bank {i}")
+            payable = AccountPayable.objects.create(
+                supplier=supplier, bank=bank, amount=100 + i, due_date=due_date,
+                check_number=f'CHK{i}', created_by=self.user
+            )
+            PayableTransaction.objects.create(payable=payable, transaction_type='partial_payment', amount=10)
+
+    def test_list_stays_within_query_budget(self):
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/v1/accounts-payable/payables/')
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['supplier_name'][:15], 'Budget Supplier')
+
+    def test_supplier_list_stays_within_query_budget(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/accounts-payable/suppliers/')
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_jwt_user_lookup_is_not_counted(self):
+        self.client.force_authenticate(None)
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/v1/accounts-payable/suppliers/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class PaymentReminderScheduleTestCase(TestCase):
+    def setUp(self):
+        self.today = datetime.date.today()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.payable = AccountPayable.objects.create(
+                supplier=Supplier.objects.create(name="Reminder Supplier"),
+                bank=Bank.objects.create(name="Reminder Bank"),
+                amount=500,
+                due_date=self.today + datetime.timedelta(days=60)
+            )
+
+    def reminder_dates(self):
+        return dict(self.payable.reminders.values_list('reminder_type', 'reminder_date'))
+
+    def test_new_payable_gets_advance_and_overdue_reminders(self):
+        due_date = self.payable.due_date
+        self.assertEqual(self.reminder_dates(), {
+            '45_days': due_date - datetime.timedelta(days=45),
+            '30_days': due_date - datetime.timedelta(days=30),
+            '15_days': due_date - datetime.timedelta(days=15),
+            'overdue': due_date + datetime.timedelta(days=1),
+        })
+        self.assertEqual(self.payable.reminders.filter(calendar_events__isnull=False).count(), 4)
+
+    def test_due_date_edit_moves_reminders_and_rearms_sent_ones(self):
+        self.payable.reminders.filter(reminder_type='45_days').update(sent=True)
+        self.payable.due_date = self.today + datetime.timedelta(days=90)
+        self.payable.save()
+        self.assertEqual(self.reminder_dates()['45_days'], self.today + datetime.timedelta(days=45))
+        self.assertFalse(self.payable.reminders.get(reminder_type='45_days').sent)
+        self.assertEqual(schedule_reminders(), {'created': 0, 'updated': 0, 'deleted': 0})
+
+    def test_settled_payable_loses_unsent_reminders(self):
+        self.payable.reminders.filter(reminder_type='45_days').update(sent=True)
+        self.payable.status = 'disbursed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.payable.save()
+        self.assertEqual(list(self.reminder_dates()), ['45_days'])
+        self.assertEqual(PaymentReminder.objects.filter(calendar_events__isnull=False).count(), 1)
+
+
+class ReminderDispatchTestCase(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='payables@example.com', password='testpassword')
+        self.today = datetime.date.today()
+        supplier = Supplier.objects.create(name="Dispatch Supplier")
+        bank = Bank.objects.create(name="Dispatch Bank")
+        self.payables = [
+            AccountPayable.objects.create(
+                supplier=supplier, bank=bank, amount=100, created_by=creator,
+                due_date=self.today + datetime.timedelta(days=20)
+            )
+            for creator in (self.user, self.user, None)
+        ]
+
+    def test_due_reminders_are_sent_and_marked_in_bulk(self):
+        summary = dispatch_due_reminders(today=self.today + datetime.timedelta(days=5), workers=2)
+        self.assertEqual((summary['sent'], summary['failed'], summary['skipped']), (2, 0, 1))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].to, ['payables@example.com'])
+        self.assertEqual(
+            sorted(message.body.split()[1] for message in mail.outbox),
+            [self.payables[0].payment_number, self.payables[1].payment_number]
+        )
+
+        sent = PaymentReminder.objects.filter(sent=True)
+        self.assertEqual(sent.count(), 2)
+        self.assertTrue(all(reminder.send_attempts == 1 for reminder in sent))
+        self.assertEqual(
+            AccountPayable.objects.filter(last_reminder_date=self.today).count(), 2
+        )
+        # Nothing left to send until the next reminder falls due
+        summary = dispatch_due_reminders(today=self.today + datetime.timedelta(days=5))
+        self.assertEqual(summary['sent'], 0)
+
+    def test_skipped_reminders_use_up_attempts(self):
+        dispatch_due_reminders(today=self.today + datetime.timedelta(days=5))
+        [skipped] = PaymentReminder.objects.filter(payable=self.payables[2], send_attempts__gt=0)
+        self.assertEqual((skipped.sent, skipped.send_attempts, skipped.last_error), (False, 1, 'No recipient.'))
+        self.assertIsNone(skipped.claimed_at)
+
+    def test_claimed_reminders_are_not_sent_twice(self):
+        due = due_reminders(self.today + datetime.timedelta(days=5))
+        claimed = claim_reminders(due)
+        self.assertEqual(len(claimed), 3)
+        self.assertEqual(claim_reminders(due), [])
+        self.assertEqual(dispatch_due_reminders(today=self.today + datetime.timedelta(days=5))['sent'], 0)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(f'/api/v1/accounts-payable/reminders/{claimed[0].pk}/send/', {})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(len(mail.outbox), 0)
+
+        dispatch_reminders(claimed)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(PaymentReminder.objects.filter(claimed_at__isnull=False).exists())
+
+
+class PayablesDashboardTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.client.force_authenticate(User.objects.create_user(email='dash@example.com', password='testpassword'))
+        today = datetime.date.today()
+        supplier = Supplier.objects.create(name="Dashboard Supplier")
+        bank = Bank.objects.create(name="Dashboard Bank")
+        for amount, days, payable_status in ((100, 3, 'covered'), (200, 30, 'delivered'), (400, 3, 'disbursed')):
+            AccountPayable.objects.create(
+                supplier=supplier, bank=bank, amount=amount, status=payable_status,
+                due_date=today + datetime.timedelta(days=days)
+            )
+        self.url = '/api/v1/accounts-payable/dashboard/summary/'
+
+    def test_summary_covers_every_status_and_is_cached(self):
+        with self.assertNumQueries(4):
+            DashboardSummaryView().build_summary()
+        data = self.client.get(self.url).data
+        self.assertEqual(data['total_count'], 3)
+        self.assertEqual(len(data['by_status']), len(AccountPayable.STATUS_CHOICES))
+        self.assertEqual(data['outstanding_payables'], {'count': 2, 'total': '300.00'})
+        self.assertEqual(data['due_this_week'], {'count': 1, 'total': '100.00'})
+        self.assertEqual(data['overdue_payables']['count'], 0)
+
+        self.assertEqual(data['by_status'][0]['label'], 'Covered')
+
+        # A single read of the shared cache table
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Supplier.objects.create(name="Another Supplier")
+        self.assertEqual(self.client.get(self.url).data['total_suppliers'], 2)
+
+    def test_bulk_writes_invalidate_after_commit(self):
+        self.client.get(self.url)
+        supplier = Supplier.objects.get()
+        with self.captureOnCommitCallbacks() as callbacks:
+            result = import_payables([{
+                'supplier': supplier.pk, 'bank': Bank.objects.get().pk, 'amount': '50', 'check_number': 'IMP1',
+                'due_date': (datetime.date.today() + datetime.timedelta(days=10)).isoformat()
+            }])
+            self.assertEqual(result['created'], 1)
+            # Still inside the transaction, so readers keep the committed payload
+            self.assertEqual(self.client.get(self.url).data['total_count'], 3)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.get(self.url).data['total_count'], 4)
+
+
+class PaymentRunPlanTestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.client.force_authenticate(User.objects.create_user(email='runs@example.com', password='testpassword'))
+        today = datetime.date.today()
+        self.bank = Bank.objects.create(name="Run Bank")
+        normal = Supplier.objects.create(name="Normal Supplier")
+        critical = Supplier.objects.create(name="Critical Supplier", priority=5)
+        self.overdue, self.regular, self.urgent = [
+            AccountPayable.objects.create(
+                supplier=supplier, bank=self.bank, amount=amount,
+                transaction_date=today - datetime.timedelta(days=30),
+                due_date=today + datetime.timedelta(days=days)
+            )
+            for supplier, amount, days in ((normal, 200, -10), (normal, 100, 5), (critical, 50, 5))
+        ]
+        # Outside the horizon
+        AccountPayable.objects.create(
+            supplier=normal, bank=self.bank, amount=10, due_date=today + datetime.timedelta(days=30)
+        )
+
+    def test_plan_ranks_by_overdue_penalty_and_priority(self):
+        response = self.client.post('/api/v1/accounts-payable/payment-runs/plan/', {
+            'banks': [{'bank': self.bank.pk, 'available_balance': '250.00'}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [plan] = response.data['banks']
+        self.assertEqual([item['id'] for item in plan['items']], [self.overdue.pk, self.urgent.pk])
+        self.assertEqual((plan['candidates'], plan['deferred_count']), (3, 1))
+        self.assertEqual(plan['remaining_balance'], 0)
+
+    def test_greedy_skips_items_that_no_longer_fit(self):
+        selected = greedy_select(np.arange(3), np.array([60, 50, 30]), 100)
+        self.assertEqual(selected.tolist(), [True, False, True])
+
+
+class UpcomingPaymentsCompactTestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.client.force_authenticate(User.objects.create_user(email='upcoming@example.com', password='testpassword'))
+        self.today = datetime.date.today()
+        supplier = Supplier.objects.create(name="Upcoming Supplier")
+        bank = Bank.objects.create(name="Upcoming Bank")
+        self.payables = [
+            AccountPayable.objects.create(
+                supplier=supplier, bank=bank, amount=100 * days, due_date=self.today + datetime.timedelta(days=days)
+            )
+            for days in (5, 10, 20, 80)
+        ]
+        self.url = '/api/v1/accounts-payable/reports/upcoming-payments/'
+
+    def test_compact_pages_carry_the_horizon_totals(self):
+        with self.assertNumQueries(1):
+            response = self.client.post(self.url, {'days': 30, 'compact': True, 'page_size': 2}, format='json')
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['total_amount'], 3500)
+        first = response.data['upcoming_payments']
+        self.assertEqual([row['days_until_due'] for row in first], [5, 10])
+        self.assertEqual(first[0]['supplier_name'], "Upcoming Supplier")
+
+        response = self.client.post(self.url, {
+            'days': 30, 'compact': True, 'page_size': 2, 'cursor': response.data['pagination']['next_cursor']
+        }, format='json')
+        self.assertEqual([row['id'] for row in response.data['upcoming_payments']], [self.payables[2].pk])
+        self.assertEqual((response.data['count'], response.data['total_amount']), (3, 3500))
+        self.assertFalse(response.data['pagination']['has_next'])
+
+    def test_tampered_or_foreign_cursors_are_rejected(self):
+        response = self.client.post(self.url, {'days': 30, 'compact': True, 'page_size': 2}, format='json')
+        cursor = response.data['pagination']['next_cursor']
+        forged = encode_cursor([self.today, self.payables[1].pk, 'abc', 3])
+        for days, bad_cursor in ((30, forged), (30, cursor[:-2]), (60, cursor)):
+            response = self.client.post(self.url, {
+                'days': days, 'compact': True, 'page_size': 2, 'cursor': bad_cursor
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('cursor', response.data)
+
+
+class DueInFilterTestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.client.force_authenticate(User.objects.create_user(email='duein@example.com', password='testpassword'))
+        today = datetime.date.today()
+        supplier = Supplier.objects.create(name="Due In Supplier")
+        bank = Bank.objects.create(name="Due In Bank")
+        self.payables = {
+            days: AccountPayable.objects.create(
+                supplier=supplier, bank=bank, amount=100,
+                transaction_date=today - datetime.timedelta(days=60),
+                due_date=today + datetime.timedelta(days=days)
+            )
+            for days in (-3, 0, 15, 16, 40, 50)
+        }
+
+    def test_buckets_filter_and_order_on_days_to_due(self):
+        response = self.client.get('/api/v1/accounts-payable/payables/', {
+            'due_in': '0-15,overdue', 'ordering': 'days_to_due'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = response.data['results']
+        self.assertEqual([row['days_until_due'] for row in rows], [-3, 0, 15])
+
+        response = self.client.get('/api/v1/accounts-payable/payables/', {'due_in': '16-30,31-45'})
+        self.assertEqual(sorted(row['days_until_due'] for row in response.data['results']), [16, 40])
+
+    def test_unknown_bucket_is_rejected(self):
+        response = self.client.get('/api/v1/accounts-payable/payables/', {'due_in': '46-60'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DuplicateInvoiceTestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.client.force_authenticate(User.objects.create_user(email='dupes@example.com', password='testpassword'))
+        self.today = datetime.date.today()
+        self.supplier = Supplier.objects.create(name="Duplicate Supplier")
+        self.bank = Bank.objects.create(name="Duplicate Bank")
+        self.original = AccountPayable.objects.create(
+            supplier=self.supplier, bank=self.bank, amount=500, check_number='C1', invoice_number='INV-0042',
+            due_date=self.today + datetime.timedelta(days=30)
+        )
+
+    def payable_data(self, **overrides):
+        data = {
+            'supplier': self.supplier.pk, 'bank': self.bank.pk, 'amount': '120.00', 'check_number': 'C2',
+            'due_date': (self.today + datetime.timedelta(days=30)).isoformat(),
+        }
+        data.update(overrides)
+        return data
+
+    def test_create_rejects_a_normalized_repeat(self):
+        self.assertEqual(self.original.invoice_fingerprint, 'INV42')
+        response = self.client.post('/api/v1/accounts-payable/payables/', self.payable_data(invoice_number='inv 42'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(self.original.payment_number, str(response.data['invoice_number']))
+
+    def test_rejected_invoice_can_be_entered_again(self):
+        AccountPayable.objects.filter(pk=self.original.pk).update(status='rejected')
+        response = self.client.post('/api/v1/accounts-payable/payables/', self.payable_data(invoice_number='INV-0042'))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_import_checks_stored_and_in_file_repeats(self):
+        response = self.client.post('/api/v1/accounts-payable/payables/import/', {'rows': [
+            self.payable_data(invoice_number='INV42'),
+            self.payable_data(invoice_number='B-7'),
+            self.payable_data(invoice_number='b7'),
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 2))
+        self.assertEqual([error['row'] for error in response.data['errors']], [1, 3])
+        self.assertTrue(PaymentReminder.objects.filter(payable__invoice_fingerprint='B7').exists())
+
+    def test_database_refuses_a_repeated_invoice(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AccountPayable.objects.create(
+                supplier=self.supplier, bank=self.bank, amount=90, check_number='C3', invoice_number='inv42',
+                due_date=self.today + datetime.timedelta(days=30)
+            )
+        AccountPayable.objects.create(
+            supplier=self.supplier, bank=self.bank, amount=90, check_number='C3', invoice_number='inv42',
+            due_date=self.today + datetime.timedelta(days=30), status='rejected'
+        )
+
+    def test_reopening_a_repeated_invoice_is_rejected(self):
+        repeat = AccountPayable.objects.create(
+            supplier=self.supplier, bank=self.bank, amount=90, check_number='C3', invoice_number='inv42',
+            due_date=self.today + datetime.timedelta(days=30), status='rejected'
+        )
+        response = self.client.post('/api/v1/accounts-payable/payables/transitions/', {
+            'transitions': [{'id': repeat.pk, 'status': 'covered'}]
+        }, format='json')
+        [outcome] = response.data['results']
+        self.assertEqual(outcome['result'], 'rejected')
+        self.assertIn(self.original.payment_number, outcome['detail'])
+
+    def test_invoice_recorded_after_validation_is_reported(self):
+        serializer = AccountPayableSerializer(data=self.payable_data(invoice_number='X-9'))
+        self.assertTrue(serializer.is_valid())
+        recorded = AccountPayable.objects.create(
+            supplier=self.supplier, bank=self.bank, amount=90, check_number='C3', invoice_number='x9',
+            due_date=self.today + datetime.timedelta(days=30)
+        )
+        with self.assertRaises(ValidationError) as raised:
+            serializer.save()
+        self.assertIn(recorded.payment_number, str(raised.exception.detail['invoice_number']))
+
+    def test_fuzzy_scan_pairs_same_amount_within_window(self):
+        def create(amount, days, invoice_number):
+            return AccountPayable.objects.create(
+                supplier=self.supplier, bank=self.bank, amount=amount, check_number='C', invoice_number=invoice_number,
+                invoice_date=self.today - datetime.timedelta(days=days), due_date=self.today + datetime.timedelta(days=30)
+            )
+        first = create(300, 20, 'A-1')
+        repeat = create(300, 17, 'A-1 bis')
+        create(300, 2, 'A-2')  # Same amount, outside the window
+        create(310, 17, 'A-3')  # Different amount
+
+        [duplicate] = fuzzy_duplicates(window_days=7)
+        self.assertEqual((duplicate['id'], duplicate['previous_id']), (repeat.pk, first.pk))
+        self.assertEqual(duplicate['days_apart'], 3)
+        self.assertFalse(duplicate['same_invoice'])
+
+        response = self.client.get('/api/v1/accounts-payable/payables/duplicates/', {'window_days': 20})
+        self.assertEqual(response.data['count'], 2)
+
+
+class PayableSettlementTestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='settle@example.com', password='testpassword')
+        self.client.force_authenticate(self.user)
+        self.supplier = Supplier.objects.create(name="Settlement Supplier")
+        bank = Bank.objects.create(name="Settlement Bank")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.payables = [
+                AccountPayable.objects.create(
+                    supplier=self.supplier, bank=bank, amount=100, check_number=f'C{index}',
+                    due_date=datetime.date.today() + datetime.timedelta(days=40)
+                )
+                for index in range(3)
+            ]
+        self.url = '/api/v1/accounts-payable/payables/settlements/'
+
+    def test_batch_settles_with_set_based_writes(self):
+        payments = [
+            {'id': payable.pk, 'transaction_type': 'full_payment', 'amount': '100.00'} for payable in self.payables[:2]
+        ] + [{'id': self.payables[2].pk, 'transaction_type': 'partial_payment', 'amount': '40.00'}]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'payments': payments, 'note': 'Run 12'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['status'] for item in response.data['results']], ['disbursed', 'disbursed', 'covered'])
+        self.assertEqual(PayableTransaction.objects.count(), 3)
+        self.supplier.refresh_from_db()
+        self.assertEqual(self.supplier.outstanding_balance, 100)
+        self.assertFalse(PaymentReminder.objects.filter(payable__in=self.payables[:2]).exists())
+        self.assertTrue(self.payables[0].status_history.filter(to_status='disbursed', note='Run 12').exists())
+
+    def test_unknown_payable_rejects_the_whole_batch(self):
+        response = self.client.post(self.url, {'payments': [
+            {'id': self.payables[0].pk, 'transaction_type': 'full_payment', 'amount': '100.00'},
+            {'id': 0, 'transaction_type': 'full_payment', 'amount': '5.00'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([item['result'] for item in response.data['results']], ['skipped', 'rejected'])
+        self.assertFalse(PayableTransaction.objects.exists())
+
+    def test_payables_that_cannot_be_disbursed_reject_the_whole_batch(self):
+        AccountPayable.objects.filter(pk=self.payables[1].pk).update(status='rejected')
+        AccountPayable.objects.filter(pk=self.payables[2].pk).update(status='disbursed')
+        response = self.client.post(self.url, {'payments': [
+            {'id': self.payables[0].pk, 'transaction_type': 'full_payment', 'amount': '100.00'},
+            {'id': self.payables[1].pk, 'transaction_type': 'full_payment', 'amount': '100.00'},
+            {'id': self.payables[2].pk, 'transaction_type': 'partial_payment', 'amount': '10.00'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [item['result'] for item in response.data['results']], ['skipped', 'rejected', 'rejected']
+        )
+        self.assertFalse(PayableTransaction.objects.exists())
+        with self.assertRaises(SettlementRejected):
+            PayableTransaction.objects.create(payable=self.payables[1], transaction_type='full_payment', amount=100)
+        self.assertEqual(AccountPayable.objects.get(pk=self.payables[1].pk).status, 'rejected')
+
+    def test_single_full_payment_marks_payable_disbursed(self):
+        payable = self.payables[0]
+        PayableTransaction.objects.create(payable=payable, transaction_type='full_payment', amount=100)
+        self.assertEqual(payable.status, 'disbursed')
+        payable.save()
+        self.assertEqual(payable.status_history.filter(to_status='disbursed').count(), 1)
@@ -8,17 +8,26 @@ urlpatterns = [
     
     # Account Payable endpoints
     path('payables/', views.AccountPayableListCreateView.as_view(), name='payable-list-create'),
+    path('payables/import/', views.PayableImportView.as_view(), name='payable-import'),
+    path('payables/duplicates/', views.PayableDuplicateScanView.as_view(), name='payable-duplicates'),
+    path('payables/transitions/', views.AccountPayableStatusTransitionView.as_view(), name='payable-status-transitions'),
+    path('payables/settlements/', views.AccountPayableSettlementView.as_view(), name='payable-settlements'),
     path('payables/<int:pk>/', views.AccountPayableRetrieveUpdateDestroyView.as_view(), name='payable-detail'),
     path('payables/<int:payable_id>/transactions/', views.PayableTransactionListCreateView.as_view(), name='payable-transaction-list-create'),
     path('payables/transactions/<int:pk>/', views.PayableTransactionRetrieveUpdateDestroyView.as_view(), name='payable-transaction-detail'),
     
     # Payment Reminder endpoints
     path('reminders/', views.PaymentReminderListView.as_view(), name='payment-reminder-list'),
+    path('reminders/dispatch/', views.DispatchRemindersView.as_view(), name='dispatch-reminders'),
     path('reminders/<int:pk>/', views.PaymentReminderRetrieveUpdateView.as_view(), name='payment-reminder-detail'),
     path('reminders/<int:pk>/send/', views.SendReminderView.as_view(), name='send-reminder'),
     
+    # Payment run planning
+    path('payment-runs/plan/', views.PaymentRunPlanView.as_view(), name='payment-run-plan'),
+    
     # Dashboard and reporting endpoints
     path('dashboard/summary/', views.DashboardSummaryView.as_view(), name='dashboard-summary'),
     path('reports/payables/', views.PayablesReportView.as_view(), name='payables-report'),
     path('reports/upcoming-payments/', views.UpcomingPaymentsView.as_view(), name='upcoming-payments'),
+    path('reports/status-dwell/', views.StatusDwellReportView.as_view(), name='status-dwell-report'),
 ]
@@ -1,28 +1,58 @@
-from django.db.models import Sum, Count
+from decimal import Decimal
+from django.conf import settings
+from django.db.models import Sum, Count, F, Q, Window
 from django.utils import timezone
 import datetime
 from rest_framework import generics, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Supplier, AccountPayable, PayableTransaction, PaymentReminder
+from finance_system.exports import export_response
+from finance_system.pagination import attach_detail, keyset_condition
+from search_index.filters import IndexedSearchFilter
+from finance_system.loading import LoadingProfile, LoadingProfileMixin
+from finance_system.rollups import status_rollup, get_cached, with_labels
+from finance_system.settlements import SettlementView
+from finance_system.transitions import bulk_transition
+from finance_system.dwell import dwell_statistics
+from finance_system.functions import DaysUntil
+from .dispatch import claim_reminders, dispatch_reminders, dispatch_due_reminders
+from .duplicates import SCANNED_EXCLUDED_STATUSES, fuzzy_duplicates
+from .importers import import_payables
+from .filters import AccountPayableFilter
+from .payment_runs import plan_payment_run
+from .signals import DASHBOARD_CACHE_TIMEOUT, dashboard_cache_key
+from .models import Supplier, AccountPayable, PayableTransaction, PayableStatusHistory, PaymentReminder
 from .serializers import (
     SupplierSerializer, AccountPayableSerializer, PayableTransactionSerializer,
-    PaymentReminderSerializer, SendReminderSerializer, DashboardSummarySerializer,
-    PayablesReportSerializer, UpcomingPaymentsSerializer
+    PaymentReminderSerializer, SendReminderSerializer, DispatchRemindersSerializer, DashboardSummarySerializer,
+    PayablesReportSerializer, UpcomingPaymentsSerializer, BulkStatusTransitionSerializer,
+    StatusDwellReportSerializer, PaymentRunPlanSerializer, PayableImportSerializer, DuplicateScanSerializer
+)
+
+
+PAYABLE_LOADING_PROFILE = LoadingProfile(
+    select_related=('bank', 'supplier'),
+    prefetch_related=('transactions', 'reminders'),
 )
 
 
 # Supplier views
-class SupplierListCreateView(generics.ListCreateAPIView):
+class SupplierListCreateView(LoadingProfileMixin, generics.ListCreateAPIView):
     """API view to retrieve list of suppliers or create new supplier."""
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['is_active', 'payment_terms']
-    search_fields = ['name', 'arabic_name', 'phone', 'email', 'tax_number']
-    ordering_fields = ['name', 'payment_terms', 'created_at']
+    # The serializer reads only supplier columns, so there is nothing to eager-load
+    query_budget = 2
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
+    filterset_fields = {
+        'is_active': ['exact'],
+        'payment_terms': ['exact'],
+        'outstanding_balance': ['gte', 'lte'],
+    }
+    search_index_kind = 'supplier'
+    ordering_fields = ['name', 'payment_terms', 'created_at', 'outstanding_balance']
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -36,25 +66,31 @@ class SupplierRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
 
 # Account Payable views
-class AccountPayableListCreateView(generics.ListCreateAPIView):
+class AccountPayableListCreateView(LoadingProfileMixin, generics.ListCreateAPIView):
     """API view to retrieve list of account payables or create new account payable."""
     queryset = AccountPayable.objects.all()
     serializer_class = AccountPayableSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['status', 'bank', 'supplier', 'transaction_date']
-    search_fields = ['payment_number', 'check_number', 'supplier__name', 'invoice_number', 'notes']
-    ordering_fields = ['transaction_date', 'due_date', 'amount', 'created_at']
+    loading_profile = PAYABLE_LOADING_PROFILE
+    query_budget = 6
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
+    filterset_class = AccountPayableFilter
+    search_index_kind = 'payable'
+    ordering_fields = ['transaction_date', 'due_date', 'amount', 'created_at', 'days_to_due']
+    
+    def get_queryset(self):
+        return super().get_queryset().with_days_until_due()
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
 
-class AccountPayableRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class AccountPayableRetrieveUpdateDestroyView(LoadingProfileMixin, generics.RetrieveUpdateDestroyAPIView):
     """API view to retrieve, update or delete account payable."""
     queryset = AccountPayable.objects.all()
     serializer_class = AccountPayableSerializer
     permission_classes = [permissions.IsAuthenticated]
+    loading_profile = PAYABLE_LOADING_PROFILE
 
 
 # Payable Transaction views
@@ -115,21 +151,22 @@ class SendReminderView(APIView):
         
         serializer = SendReminderSerializer(data=request.data)
         if serializer.is_valid():
-            # Mark reminder as sent
-            reminder.sent = True
-            reminder.sent_date = timezone.now()
-            reminder.sent_by = request.user
+            claimed = claim_reminders(PaymentReminder.objects.filter(pk=reminder.pk))
+            if not claimed:
+                return Response(
+                    {'detail': 'Reminder is already being sent.'},
+                    status=status.HTTP_409_CONFLICT
+                )
             if serializer.validated_data.get('notes'):
-                reminder.notes = serializer.validated_data['notes']
-            reminder.save()
-            
-            # Update last reminder date on the payable
-            payable = reminder.payable
-            payable.last_reminder_date = timezone.now().date()
-            payable.save()
-            
-            # In a real application, you would send an email or notification here
+                claimed[0].notes = serializer.validated_data['notes']
+                PaymentReminder.objects.filter(pk=reminder.pk).update(notes=claimed[0].notes)
             
+            [result] = dispatch_reminders(claimed, user=request.user)
+            if result['result'] != 'sent':
+                return Response(
+                    {'detail': f"Reminder was not sent: {result['detail']}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             return Response(
                 {'detail': 'Reminder sent successfully.'},
                 status=status.HTTP_200_OK
@@ -137,49 +174,156 @@ class SendReminderView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class DispatchRemindersView(APIView):
+    """API view to send one batch of due payment reminders."""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = DispatchRemindersSerializer(data=request.data)
+        if serializer.is_valid():
+            return Response(dispatch_due_reminders(
+                today=serializer.validated_data.get('date'),
+                limit=serializer.validated_data.get('limit'),
+                user=request.user
+            ))
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class PayableImportView(APIView):
+    """API view to bulk import payables from a CSV/JSON file or a list of rows."""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = PayableImportSerializer(data=request.data)
+        if serializer.is_valid():
+            result = import_payables(
+                serializer.validated_data['rows'],
+                user=request.user,
+                dry_run=serializer.validated_data['dry_run']
+            )
+            if result['failed'] and not result['created'] and not serializer.validated_data['dry_run']:
+                return Response(result, status=status.HTTP_400_BAD_REQUEST)
+            return Response(result, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class PayableDuplicateScanView(APIView):
+    """API view listing payables that look like a repeat of an earlier supplier invoice."""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        serializer = DuplicateScanSerializer(data=request.query_params)
+        if serializer.is_valid():
+            queryset = None
+            if serializer.validated_data.get('supplier'):
+                queryset = AccountPayable.objects.filter(
+                    supplier=serializer.validated_data['supplier']
+                ).exclude(status__in=SCANNED_EXCLUDED_STATUSES)
+            duplicates = fuzzy_duplicates(queryset, window_days=serializer.validated_data['window_days'])
+            return Response({
+                'window_days': serializer.validated_data['window_days'],
+                'count': len(duplicates),
+                'duplicates': duplicates,
+            })
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
 # Dashboard and reporting views
+class AccountPayableStatusTransitionView(APIView):
+    """API view to move many payables between statuses in one request."""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = BulkStatusTransitionSerializer(data=request.data)
+        if serializer.is_valid():
+            results = bulk_transition(
+                AccountPayable,
+                [(item['id'], item['status']) for item in serializer.validated_data['transitions']],
+                user=request.user,
+                note=serializer.validated_data['note']
+            )
+            return Response({
+                'applied': sum(1 for result in results if result['result'] == 'applied'),
+                'rejected': sum(1 for result in results if result['result'] == 'rejected'),
+                'results': results,
+            })
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AccountPayableSettlementView(SettlementView):
+    """API view to post a batch of payments against payables in one transaction."""
+    model = AccountPayable
+
+
 class DashboardSummaryView(APIView):
-    """API view to retrieve summary data for dashboard."""
+    """
+    API view to retrieve summary data for dashboard.
+    
+    The payload is cached per local date until the next payable, transaction,
+    reminder or supplier write commits, and for at most
+    ``DASHBOARD_CACHE_TIMEOUT``.
+    """
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        # Get summary data
-        total_payables = AccountPayable.objects.aggregate(total=Sum('amount'))['total'] or 0
-        scheduled_payables = AccountPayable.objects.filter(status='scheduled').aggregate(total=Sum('amount'))['total'] or 0
-        in_process_payables = AccountPayable.objects.filter(status='in_process').aggregate(total=Sum('amount'))['total'] or 0
-        paid_payables = AccountPayable.objects.filter(status='paid').aggregate(total=Sum('amount'))['total'] or 0
-        delayed_payables = AccountPayable.objects.filter(status='delayed').aggregate(total=Sum('amount'))['total'] or 0
-        total_suppliers = Supplier.objects.count()
+        today = timezone.localdate()
+        data = get_cached(dashboard_cache_key(today), lambda: self.build_summary(today), DASHBOARD_CACHE_TIMEOUT)
+        return Response(dict(data, by_status=with_labels(data['by_status'], AccountPayable.STATUS_CHOICES)))
+    
+    def build_summary(self, today=None):
+        today = today or timezone.localdate()
+        outstanding = Q(status__in=AccountPayable.OUTSTANDING_STATUSES)
+        
+        # Count and sum every status and due-date bucket in a single pass
+        rollup = status_rollup(AccountPayable.objects.all(), AccountPayable.STATUS_CHOICES, buckets={
+            'outstanding': outstanding,
+            'overdue': outstanding & Q(due_date__lt=today),
+            'due_this_week': outstanding & Q(due_date__gte=today, due_date__lt=today + datetime.timedelta(days=7)),
+        })
         
         # Get upcoming reminders
-        today = timezone.now().date()
         upcoming_reminders = PaymentReminder.objects.filter(
             sent=False,
             reminder_date__gte=today
-        ).order_by('reminder_date')[:10]
+        ).select_related('payable__supplier').order_by('reminder_date')[:10]
         
         # Get recent transactions
-        recent_transactions = PayableTransaction.objects.order_by('-created_at')[:10]
+        recent_transactions = PayableTransaction.objects.select_related(
+            'payable__supplier'
+        ).order_by('-created_at')[:10]
         
         # Prepare data for serializer
         data = {
-            'total_payables': total_payables,
-            'scheduled_payables': scheduled_payables,
-            'in_process_payables': in_process_payables,
-            'paid_payables': paid_payables,
-            'delayed_payables': delayed_payables,
-            'total_suppliers': total_suppliers,
+            'total_payables': rollup['total_amount'],
+            'total_count': rollup['total_count'],
+            'outstanding_payables': rollup['buckets']['outstanding'],
+            'overdue_payables': rollup['buckets']['overdue'],
+            'due_this_week': rollup['buckets']['due_this_week'],
+            'by_status': rollup['by_status'],
+            'total_suppliers': Supplier.objects.count(),
             'upcoming_reminders': upcoming_reminders,
             'recent_transactions': recent_transactions
         }
         
-        serializer = DashboardSummarySerializer(data)
-        return Response(serializer.data)
+        return DashboardSummarySerializer(data).data
 
 
 class PayablesReportView(APIView):
-    """API view to generate reports for payables."""
+    """API view to generate reports for payables, or stream them as CSV/XLSX."""
     permission_classes = [permissions.IsAuthenticated]
+    export_columns = [
+        ('Payment Number', 'payment_number'),
+        ('Supplier', 'supplier__name'),
+        ('Bank', 'bank__name'),
+        ('Check Number', 'check_number'),
+        ('Invoice Number', 'invoice_number'),
+        ('Invoice Date', 'invoice_date'),
+        ('Transaction Date', 'transaction_date'),
+        ('Due Date', 'due_date'),
+        ('Amount', 'amount'),
+        ('Status', 'status'),
+        ('Notes', 'notes'),
+    ]
     
     def post(self, request):
         serializer = PayablesReportSerializer(data=request.data)
@@ -204,6 +348,10 @@ class PayablesReportView(APIView):
             if bank_filter:
                 queryset = queryset.filter(bank_id=bank_filter)
             
+            export_format = serializer.validated_data.get('export')
+            if export_format:
+                return export_response(export_format, 'payables', self.export_columns, queryset)
+            
             # Generate report data
             report_data = {
                 'total_count': queryset.count(),
@@ -219,9 +367,13 @@ class PayablesReportView(APIView):
                 'by_bank': queryset.values('bank__name').annotate(
                     count=Count('id'),
                     total=Sum('amount')
-                ),
-                'payables': AccountPayableSerializer(queryset, many=True).data
+                )
             }
+            attach_detail(
+                report_data, 'payables', PAYABLE_LOADING_PROFILE.apply(queryset),
+                serializer.validated_data, AccountPayableSerializer,
+                keyset=serializer.detail_keyset
+            )
             
             return Response(report_data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -231,27 +383,131 @@ class UpcomingPaymentsView(APIView):
     """API view to retrieve upcoming payments."""
     permission_classes = [permissions.IsAuthenticated]
     
+    # Compact rows are paged on (due_date, id); totals ride along in the cursor
+    keyset = ('due_date', 'id')
+    
     def post(self, request):
         serializer = UpcomingPaymentsSerializer(data=request.data)
         if serializer.is_valid():
             days = serializer.validated_data.get('days', 30)
+            cursor = serializer.validated_data.get('cursor')
             
-            today = timezone.now().date()
+            # Later compact pages keep the day of the first one so their totals still hold
+            today = cursor['today'] if cursor else timezone.now().date()
             end_date = today + datetime.timedelta(days=days)
             
             # Get upcoming payments
             upcoming_payments = AccountPayable.objects.filter(
-                status__in=['scheduled', 'in_process'],
+                status__in=AccountPayable.OUTSTANDING_STATUSES,
                 due_date__gte=today,
                 due_date__lte=end_date
-            ).order_by('due_date')
+            ).order_by(*self.keyset)
+            
+            if serializer.validated_data['compact']:
+                return Response(self.compact_page(upcoming_payments, today, days, serializer.validated_data))
             
             # Prepare data
+            totals = upcoming_payments.aggregate(total=Sum('amount'), count=Count('id'))
             data = {
-                'upcoming_payments': AccountPayableSerializer(upcoming_payments, many=True).data,
-                'total_amount': upcoming_payments.aggregate(total=Sum('amount'))['total'] or 0,
-                'count': upcoming_payments.count()
+                'upcoming_payments': AccountPayableSerializer(
+                    PAYABLE_LOADING_PROFILE.apply(upcoming_payments), many=True
+                ).data,
+                'total_amount': totals['total'] or 0,
+                'count': totals['count']
             }
             
             return Response(data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    def compact_page(self, queryset, today, days, options):
+        """
+        Return one keyset page of slim ``values()`` rows. The first page gets
+        the horizon totals from window aggregates in the same query; later
+        pages read them back from the signed cursor.
+        """
+        page_size = options.get('page_size') or settings.REST_FRAMEWORK['PAGE_SIZE']
+        rows = queryset.values(
+            'id', 'payment_number', 'supplier_id', 'bank_id', 'amount', 'due_date',
+            supplier_name=F('supplier__name'),
+            bank_name=F('bank__name'),
+            days_until_due=DaysUntil('due_date', today)
+        )
+        cursor = options.get('cursor')
+        if cursor:
+            after = [cursor['due_date'], cursor['id']]
+            rows = list(rows.filter(keyset_condition(self.keyset, after))[:page_size + 1])
+            total_amount, count = cursor['total_amount'], cursor['count']
+        else:
+            rows = list(rows.annotate(
+                window_total=Window(Sum('amount')),
+                window_count=Window(Count('id'))
+            )[:page_size + 1])
+            total_amount = rows[0]['window_total'] if rows else Decimal('0')
+            count = rows[0]['window_count'] if rows else 0
+        
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        for row in rows:
+            row.pop('window_total', None)
+            row.pop('window_count', None)
+        
+        next_cursor = None
+        if has_next:
+            last = rows[-1]
+            next_cursor = UpcomingPaymentsSerializer.make_cursor(last, total_amount, count, days, today)
+        return {
+            'upcoming_payments': rows,
+            'total_amount': total_amount,
+            'count': count,
+            'pagination': {'mode': 'cursor', 'page_size': page_size, 'has_next': has_next, 'next_cursor': next_cursor},
+        }
+
+
+class PaymentRunPlanView(APIView):
+    """API view to choose which open payables each bank can pay on a run date."""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = PaymentRunPlanSerializer(data=request.data)
+        if serializer.is_valid():
+            data = serializer.validated_data
+            return Response(plan_payment_run(
+                {item['bank']: item['available_balance'] for item in data['banks']},
+                run_date=data.get('run_date'),
+                horizon_days=data['horizon_days'],
+                include_items=data['include_items']
+            ))
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class StatusDwellReportView(APIView):
+    """API view reporting median and p90 time spent in each payable status."""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    # group_by value -> (history field to group on, field naming the group)
+    group_fields = {
+        'status': (None, None),
+        'supplier': ('payable__supplier', 'payable__supplier__name'),
+        'bank': ('payable__bank', 'payable__bank__name'),
+    }
+    
+    def get(self, request):
+        serializer = StatusDwellReportSerializer(data=request.query_params)
+        if serializer.is_valid():
+            data = serializer.validated_data
+            history = PayableStatusHistory.objects.all()
+            if data.get('status'):
+                history = history.filter(to_status=data['status'])
+            if data.get('start_date'):
+                history = history.filter(changed_at__date__gte=data['start_date'])
+            if data.get('end_date'):
+                history = history.filter(changed_at__date__lte=data['end_date'])
+            
+            group_field, label_field = self.group_fields[data['group_by']]
+            return Response({
+                'group_by': data['group_by'],
+                'results': dwell_statistics(
+                    history, group_field, label_field, include_open=data['include_open']
+                ),
+            })
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -1,7 +1,9 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
-from .models import Bank, Client, AccountReceivable, ReceivableTransaction
+from .models import (
+    Bank, Client, AccountReceivable, ReceivableTransaction, ReceivableStatusHistory, AgingSnapshot
+)
 
 
 @admin.register(Bank)
@@ -28,14 +30,14 @@ class ReceivableInline(admin.TabularInline):
 
 @admin.register(Client)
 class ClientAdmin(admin.ModelAdmin):
-    list_display = ('name', 'arabic_name', 'phone', 'email', 'total_outstanding', 'is_active')
+    list_display = ('name', 'arabic_name', 'phone', 'email', 'outstanding_balance', 'is_active')
     list_filter = ('is_active', 'created_at')
     search_fields = ('name', 'arabic_name', 'phone', 'email', 'tax_number')
-    readonly_fields = ('created_by', 'created_at', 'updated_at', 'total_outstanding')
+    readonly_fields = ('created_by', 'created_at', 'updated_at', 'outstanding_balance')
     fieldsets = (
         (None, {'fields': ('name', 'arabic_name', 'is_active')}),
         (_('Contact Information'), {'fields': ('contact_person', 'phone', 'email', 'address')}),
-        (_('Financial Information'), {'fields': ('tax_number', 'credit_limit', 'total_outstanding')}),
+        (_('Financial Information'), {'fields': ('tax_number', 'credit_limit', 'outstanding_balance')}),
         (_('Additional Information'), {'fields': ('notes',)}),
         (_('System Information'), {'fields': ('created_by', 'created_at', 'updated_at')}),
     )
@@ -58,14 +60,14 @@ class ReceivableTransactionInline(admin.TabularInline):
 
 @admin.register(AccountReceivable)
 class AccountReceivableAdmin(admin.ModelAdmin):
-    list_display = ('receipt_number', 'client', 'bank', 'transaction_date', 'due_date', 'amount', 'status')
+    list_display = ('receipt_number', 'client', 'bank', 'transaction_date', 'due_date', 'amount', 'remaining_amount', 'status')
     list_filter = ('status', 'transaction_date', 'due_date', 'bank')
     search_fields = ('receipt_number', 'check_number', 'client__name', 'notes')
-    readonly_fields = ('receipt_number', 'created_by', 'created_at', 'updated_at')
+    readonly_fields = ('receipt_number', 'paid_amount', 'remaining_amount', 'created_by', 'created_at', 'updated_at')
     date_hierarchy = 'transaction_date'
     fieldsets = (
         (None, {'fields': ('receipt_number', 'client', 'bank', 'status')}),
-        (_('Transaction Details'), {'fields': ('transaction_date', 'due_date', 'amount', 'check_number')}),
+        (_('Transaction Details'), {'fields': ('transaction_date', 'due_date', 'amount', 'paid_amount', 'remaining_amount', 'check_number')}),
         (_('Additional Information'), {'fields': ('notes',)}),
         (_('System Information'), {'fields': ('created_by', 'created_at', 'updated_at')}),
     )
@@ -95,3 +97,20 @@ class ReceivableTransactionAdmin(admin.ModelAdmin):
         if not change:  # Only set created_by when creating a new object
             obj.created_by = request.user
         super().save_model(request, obj, form, change)
+
+
+@admin.register(ReceivableStatusHistory)
+class ReceivableStatusHistoryAdmin(admin.ModelAdmin):
+    list_display = ('receivable', 'from_status', 'to_status', 'changed_at', 'changed_by')
+    list_filter = ('to_status', 'changed_at')
+    search_fields = ('receivable__receipt_number', 'receivable__check_number', 'note')
+    date_hierarchy = 'changed_at'
+
+
+@admin.register(AgingSnapshot)
+class AgingSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('snapshot_date', 'group_by', 'group_name', 'current', 'days_1_30',
+                    'days_31_60', 'days_61_90', 'days_over_90', 'total')
+    list_filter = ('group_by', 'snapshot_date')
+    search_fields = ('group_name',)
+    date_hierarchy = 'snapshot_date'
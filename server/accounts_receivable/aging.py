@@ -0,0 +1,149 @@
+"""
+Receivables aging computed in the database, with persisted daily snapshots.
+"""
+import datetime
+
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
+
+from .models import AccountReceivable, ReceivableTransaction, ReceivableStatusHistory, AgingSnapshot
+
+
+BUCKETS = ('current', 'days_1_30', 'days_31_60', 'days_61_90', 'days_over_90')
+
+GROUP_FIELDS = {
+    'client': ('client_id', 'client__name'),
+    'bank': ('bank_id', 'bank__name'),
+}
+
+
+def bucket_conditions(as_of):
+    """Return the due-date range for each aging bucket relative to ``as_of``."""
+    def days_ago(days):
+        return as_of - datetime.timedelta(days=days)
+    
+    return {
+        'current': Q(due_date__gte=as_of),
+        'days_1_30': Q(due_date__lte=days_ago(1), due_date__gte=days_ago(30)),
+        'days_31_60': Q(due_date__lte=days_ago(31), due_date__gte=days_ago(60)),
+        'days_61_90': Q(due_date__lte=days_ago(61), due_date__gte=days_ago(90)),
+        'days_over_90': Q(due_date__lte=days_ago(91)),
+    }
+
+
+def status_as_of(as_of):
+    """
+    Expression for a receivable's status at the end of ``as_of``: the target
+    of its last status change by then, else the source of its first change
+    after that day, else its current status when it has no recorded history.
+    """
+    cutoff = timezone.make_aware(datetime.datetime.combine(as_of + datetime.timedelta(days=1), datetime.time.min))
+    history = ReceivableStatusHistory.objects.filter(receivable=OuterRef('pk'))
+    last_change = history.filter(
+        changed_at__lt=cutoff
+    ).order_by('-changed_at', '-pk').values('to_status')[:1]
+    # Creation rows have no source status to fall back to
+    next_change = history.filter(
+        changed_at__gte=cutoff
+    ).order_by('changed_at', 'pk').values(source=NullIf('from_status', Value('')))[:1]
+    return Coalesce(Subquery(last_change), Subquery(next_change), F('status'))
+
+
+def compute_aging(as_of=None, group_by='client'):
+    """
+    Bucket open receivables by days past due, net of payments posted up to
+    ``as_of``, with one grouped query. Past days use the status each
+    receivable had on that day.
+    """
+    today = datetime.date.today()
+    as_of = as_of or today
+    group_id, group_name = GROUP_FIELDS[group_by]
+    
+    if as_of >= today:
+        # The maintained balance already reflects every posted transaction
+        net = F('remaining_amount')
+        status = F('status')
+    else:
+        status = status_as_of(as_of)
+        paid = ReceivableTransaction.objects.filter(
+            receivable=OuterRef('pk'),
+            transaction_date__lte=as_of
+        ).values('receivable').annotate(
+            total=Sum(ReceivableTransaction.paid_effect())
+        ).values('total')
+        net = F('amount') - Coalesce(Subquery(paid), Value(0), output_field=models.DecimalField())
+    
+    queryset = AccountReceivable.objects.filter(transaction_date__lte=as_of).annotate(
+        status_on_day=status, net=net
+    ).filter(status_on_day__in=AccountReceivable.OUTSTANDING_STATUSES, net__gt=0)
+    
+    aggregates = {
+        name: Coalesce(Sum('net', filter=condition), Value(0), output_field=models.DecimalField())
+        for name, condition in bucket_conditions(as_of).items()
+    }
+    rows = queryset.values(group_id, group_name).annotate(
+        receivable_count=Count('id'),
+        total=Sum('net'),
+        **aggregates
+    ).order_by(group_name)
+    
+    return [
+        {
+            'group_id': row[group_id],
+            'group_name': row[group_name],
+            'receivable_count': row['receivable_count'],
+            'total': row['total'],
+            **{name: row[name] for name in BUCKETS},
+        }
+        for row in rows
+    ]
+
+
+def load_snapshot(as_of, group_by='client'):
+    """Return the persisted rows for a day, or None when no snapshot was taken."""
+    snapshots = AgingSnapshot.objects.filter(snapshot_date=as_of, group_by=group_by)
+    if not snapshots.exists():
+        return None
+    return list(snapshots.order_by('group_name').values(
+        'group_id', 'group_name', 'receivable_count', 'total', *BUCKETS
+    ))
+
+
+def take_snapshot(as_of=None):
+    """Persist the aging for ``as_of`` by client and by bank, replacing any earlier run."""
+    as_of = as_of or datetime.date.today()
+    snapshots = [
+        AgingSnapshot(snapshot_date=as_of, group_by=group_by, **row)
+        for group_by in GROUP_FIELDS
+        for row in compute_aging(as_of, group_by)
+    ]
+    with transaction.atomic():
+        AgingSnapshot.objects.filter(snapshot_date=as_of).delete()
+        AgingSnapshot.objects.bulk_create(snapshots)
+    return len(snapshots)
+
+
+def aging_report(as_of=None, group_by='client'):
+    """
+    Return the aging for ``as_of``. Past days are served from their snapshot
+    when one exists; today (or a day without a snapshot) is computed live.
+    """
+    today = datetime.date.today()
+    as_of = as_of or today
+    rows = load_snapshot(as_of, group_by) if as_of < today else None
+    source = 'snapshot'
+    if rows is None:
+        rows = compute_aging(as_of, group_by)
+        source = 'live'
+    
+    totals = {name: sum((row[name] for row in rows), 0) for name in BUCKETS + ('total',)}
+    totals['receivable_count'] = sum(row['receivable_count'] for row in rows)
+    return {
+        'as_of': as_of,
+        'group_by': group_by,
+        'source': source,
+        'rows': rows,
+        'totals': totals,
+    }
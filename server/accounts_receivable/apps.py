@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AccountsReceivableConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts_receivable'
+    
+    def ready(self):
+        # Import signal handlers
+        import accounts_receivable.signals
@@ -0,0 +1,26 @@
+import django_filters
+from .models import AccountReceivable
+
+
+class AccountReceivableFilter(django_filters.FilterSet):
+    """Filters for the receivable list, including the payment state."""
+    
+    payment_state = django_filters.ChoiceFilter(
+        choices=AccountReceivable.PAYMENT_STATES,
+        method='filter_payment_state'
+    )
+    
+    class Meta:
+        model = AccountReceivable
+        fields = {
+            'status': ['exact'],
+            'bank': ['exact'],
+            'client': ['exact'],
+            'transaction_date': ['exact'],
+            'over_credit_limit': ['exact'],
+            'paid_amount': ['gte', 'lte'],
+            'remaining_amount': ['gte', 'lte'],
+        }
+    
+    def filter_payment_state(self, queryset, name, value):
+        return queryset.filter(AccountReceivable.payment_state_q(value))
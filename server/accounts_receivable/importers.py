@@ -0,0 +1,175 @@
+"""
+Bulk import of receivables from CSV or JSON cheque batches.
+
+Rows are validated a batch at a time against one lookup of the referenced
+clients and banks, receipt numbers are reserved in one block, receivables are
+written with ``bulk_create`` and the per-row side effects (client balances,
+dashboard cache, calendar events) are applied once for the whole import.
+"""
+import csv
+import datetime
+import io
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+from document_numbers.models import DocumentSequence, last_issued_seed
+from finance_system.transitions import record_status_changes
+from .models import AccountReceivable, Bank, Client
+from .signals import invalidate_dashboard, receivables_imported
+
+
+IMPORT_FORMATS = ('csv', 'json')
+IMPORT_BATCH_SIZE = 500
+
+
+class ReceivableImportRowSerializer(serializers.Serializer):
+    """Field-level validation for one imported receivable row."""
+
+    client = serializers.IntegerField()
+    bank = serializers.IntegerField()
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=Decimal('0.01'))
+    due_date = serializers.DateField()
+    transaction_date = serializers.DateField(required=False)
+    check_number = serializers.CharField(max_length=50)
+    status = serializers.ChoiceField(choices=AccountReceivable.STATUS_CHOICES, default='active')
+    notes = serializers.CharField(max_length=500, required=False, allow_blank=True, default='')
+
+    def validate(self, data):
+        transaction_date = data.setdefault('transaction_date', datetime.date.today())
+        if data['due_date'] <= transaction_date:
+            raise serializers.ValidationError({'due_date': "Due date must be after transaction date."})
+        if data['status'] != 'completed' and data['due_date'] < datetime.date.today():
+            raise serializers.ValidationError(
+                {'due_date': "Due date cannot be in the past for incomplete receivables."}
+            )
+        return data
+
+
+def parse_rows(content, import_format):
+    """Parse CSV text or a JSON list (or ``{"rows": [...]}``) into row dicts."""
+    if import_format == 'json':
+        data = json.loads(content)
+        if isinstance(data, dict):
+            data = data.get('rows')
+        if not isinstance(data, list):
+            raise ValueError("JSON imports must be a list of rows.")
+        return data
+    if content.startswith('\ufeff'):
+        content = content[1:]
+    reader = csv.DictReader(io.StringIO(content))
+    return [{key: value for key, value in row.items() if value not in (None, '')} for row in reader]
+
+
+def validate_batch(rows, offset=0):
+    """
+    Validate ``rows`` and return ``(valid, errors)``; ``valid`` holds
+    ``(row number, data)`` pairs with ``client`` and ``bank`` resolved.
+    """
+    valid, errors = [], []
+    checked = []
+    for index, row in enumerate(rows, start=offset + 1):
+        row_serializer = ReceivableImportRowSerializer(data=row)
+        if row_serializer.is_valid():
+            checked.append((index, row_serializer.validated_data))
+        else:
+            errors.append({'row': index, 'errors': row_serializer.errors})
+
+    clients = Client.objects.in_bulk({data['client'] for _index, data in checked})
+    banks = Bank.objects.in_bulk({data['bank'] for _index, data in checked})
+    for index, data in checked:
+        row_errors = {}
+        if data['client'] not in clients:
+            row_errors['client'] = ["Client does not exist."]
+        if data['bank'] not in banks:
+            row_errors['bank'] = ["Bank does not exist."]
+        if row_errors:
+            errors.append({'row': index, 'errors': row_errors})
+            continue
+        data['client'] = clients[data['client']]
+        data['bank'] = banks[data['bank']]
+        valid.append((index, data))
+    return valid, errors
+
+
+def check_credit_limits(valid, errors):
+    """
+    Apply ``CREDIT_LIMIT_POLICY`` to validated rows against a running exposure
+    per client, starting from the maintained balances of the (locked) clients.
+    Rejected rows are moved to ``errors``; flagged rows are marked over limit.
+    """
+    client_ids = {data['client'].pk for _index, data in valid}
+    exposure = dict(
+        Client.objects.select_for_update().filter(pk__in=client_ids).values_list('pk', 'outstanding_balance')
+    )
+    accepted = []
+    for index, data in valid:
+        client = data['client']
+        if data['status'] in AccountReceivable.OUTSTANDING_STATUSES:
+            after = exposure[client.pk] + data['amount']
+            if client.credit_limit and after > client.credit_limit:
+                if settings.CREDIT_LIMIT_POLICY == 'reject':
+                    errors.append({'row': index, 'errors': {
+                        'amount': [f"Credit limit of {client.credit_limit} exceeded: exposure would be {after}."]
+                    }})
+                    continue
+                data['over_credit_limit'] = True
+            exposure[client.pk] = after
+        accepted.append((index, data))
+    errors.sort(key=lambda error: error['row'])
+    return accepted
+
+
+def import_receivables(rows, user=None, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import ``rows`` and return ``{'created', 'failed', 'errors'}``.
+
+    Valid rows are imported even when other rows fail; each failure is
+    reported with its 1-based row number.
+    """
+    valid, errors = [], []
+    for start in range(0, len(rows), batch_size):
+        batch_valid, batch_errors = validate_batch(rows[start:start + batch_size], offset=start)
+        valid.extend(batch_valid)
+        errors.extend(batch_errors)
+    errors.sort(key=lambda error: error['row'])
+
+    result = {'created': 0, 'failed': len(errors), 'errors': errors}
+    if dry_run or not valid:
+        return result
+
+    with transaction.atomic():
+        valid = check_credit_limits(valid, errors)
+        result['failed'] = len(errors)
+        if not valid:
+            return result
+        
+        numbers = DocumentSequence.objects.allocate_numbers(
+            'AR', len(valid), seed=last_issued_seed(AccountReceivable, 'receipt_number')
+        )
+        receivables = [
+            AccountReceivable(
+                receipt_number=number, created_by=user, remaining_amount=data['amount'], **data
+            )
+            for number, (_index, data) in zip(numbers, valid)
+        ]
+        AccountReceivable.objects.bulk_create(receivables, batch_size=batch_size)
+        record_status_changes(
+            AccountReceivable,
+            [(receivable.pk, '', receivable.status) for receivable in receivables],
+            user=user,
+            note='Imported'
+        )
+
+        Client.recalculate_outstanding({receivable.client_id for receivable in receivables})
+
+        invalidate_dashboard()
+        transaction.on_commit(
+            lambda: receivables_imported.send(sender=AccountReceivable, receivables=receivables)
+        )
+
+    result['created'] = len(receivables)
+    return result
@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from accounts_receivable.importers import IMPORT_FORMATS, import_receivables, parse_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk import receivables from a CSV or JSON file.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON file to import.')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--user', help='Email of the user recorded as creator.')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, do not create anything.')
+    
+    def handle(self, *args, **options):
+        import_format = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError('Cannot infer the format; pass --format csv or --format json.')
+        
+        user = None
+        if options['user']:
+            try:
+                user = get_user_model().objects.get(email=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist.")
+        
+        try:
+            with open(options['path'], encoding='utf-8') as handle:
+                rows = parse_rows(handle.read(), import_format)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Could not read {options["path"]}: {exc}')
+        
+        result = import_receivables(rows, user=user, dry_run=options['dry_run'])
+        for error in result['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['created']} receivables, {result['failed']} rows failed."
+        ))
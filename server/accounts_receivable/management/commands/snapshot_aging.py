@@ -0,0 +1,21 @@
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from accounts_receivable.aging import take_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Persist the receivables aging by client and by bank for a day (default: today).'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Snapshot date in YYYY-MM-DD format.')
+    
+    def handle(self, *args, **options):
+        as_of = None
+        if options['date']:
+            try:
+                as_of = datetime.datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Date must be in YYYY-MM-DD format.')
+        
+        count = take_snapshot(as_of)
+        self.stdout.write(self.style.SUCCESS(f'Stored {count} aging snapshot rows.'))
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:01
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+OUTSTANDING_STATUSES = ('active', 'overdue')
+
+
+def backfill_outstanding_balance(apps, schema_editor):
+    Client = apps.get_model('accounts_receivable', 'Client')
+    AccountReceivable = apps.get_model('accounts_receivable', 'AccountReceivable')
+    outstanding = AccountReceivable.objects.filter(
+        client=OuterRef('pk'),
+        status__in=OUTSTANDING_STATUSES
+    ).values('client').annotate(total=Sum('amount')).values('total')
+    Client.objects.update(
+        outstanding_balance=Coalesce(Subquery(outstanding), Value(0), output_field=models.DecimalField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_receivable', '0002_bank_pdf_file_client_pdf_file_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='outstanding_balance',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='outstanding balance'),
+        ),
+        migrations.RunPython(backfill_outstanding_balance, migrations.RunPython.noop),
+    ]
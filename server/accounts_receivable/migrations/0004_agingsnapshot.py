@@ -0,0 +1,37 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_receivable', '0003_client_outstanding_balance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField(verbose_name='snapshot date')),
+                ('group_by', models.CharField(choices=[('client', 'Client'), ('bank', 'Bank')], max_length=10, verbose_name='group by')),
+                ('group_id', models.PositiveBigIntegerField(verbose_name='group id')),
+                ('group_name', models.CharField(max_length=200, verbose_name='group name')),
+                ('receivable_count', models.PositiveIntegerField(default=0, verbose_name='receivable count')),
+                ('current', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='current')),
+                ('days_1_30', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='1-30 days')),
+                ('days_31_60', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='31-60 days')),
+                ('days_61_90', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='61-90 days')),
+                ('days_over_90', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='over 90 days')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='total')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+            ],
+            options={
+                'verbose_name': 'aging snapshot',
+                'verbose_name_plural': 'aging snapshots',
+                'ordering': ['-snapshot_date', 'group_by', 'group_name'],
+                'unique_together': {('snapshot_date', 'group_by', 'group_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:10
+
+from django.db import migrations, models
+from django.db.models import Case, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+
+PAYMENT_TYPES = ('deposit', 'partial_payment', 'full_payment')
+REVERSAL_TYPES = ('return',)
+
+
+def backfill_paid_amounts(apps, schema_editor):
+    AccountReceivable = apps.get_model('accounts_receivable', 'AccountReceivable')
+    ReceivableTransaction = apps.get_model('accounts_receivable', 'ReceivableTransaction')
+    effect = Case(
+        When(transaction_type__in=PAYMENT_TYPES, then=F('amount')),
+        When(transaction_type__in=REVERSAL_TYPES, then=-F('amount')),
+        default=Value(0),
+        output_field=models.DecimalField()
+    )
+    paid = ReceivableTransaction.objects.filter(
+        receivable=OuterRef('pk')
+    ).values('receivable').annotate(total=Sum(effect)).values('total')
+    paid = Coalesce(Subquery(paid), Value(0), output_field=models.DecimalField())
+    AccountReceivable.objects.update(paid_amount=paid, remaining_amount=F('amount') - paid)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_receivable', '0004_agingsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountreceivable',
+            name='paid_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='paid amount'),
+        ),
+        migrations.AddField(
+            model_name='accountreceivable',
+            name='remaining_amount',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='remaining amount'),
+        ),
+        migrations.RunPython(backfill_paid_amounts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_receivable', '0005_accountreceivable_paid_remaining'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountreceivable',
+            name='over_credit_limit',
+            field=models.BooleanField(default=False, editable=False, verbose_name='over credit limit'),
+        ),
+    ]
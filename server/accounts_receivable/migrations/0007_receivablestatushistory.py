@@ -0,0 +1,33 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts_receivable', '0006_accountreceivable_over_credit_limit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceivableStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('active', 'Active'), ('completed', 'Completed'), ('pending', 'Pending'), ('overdue', 'Overdue'), ('treasury', 'Treasury'), ('with_representative', 'With Representative'), ('in_collection', 'In Collection'), ('treasury_rejected', 'Treasury Rejected'), ('collected', 'Collected'), ('client_rejected', 'Client Rejected')], max_length=20, verbose_name='from status')),
+                ('to_status', models.CharField(choices=[('active', 'Active'), ('completed', 'Completed'), ('pending', 'Pending'), ('overdue', 'Overdue'), ('treasury', 'Treasury'), ('with_representative', 'With Representative'), ('in_collection', 'In Collection'), ('treasury_rejected', 'Treasury Rejected'), ('collected', 'Collected'), ('client_rejected', 'Client Rejected')], max_length=20, verbose_name='to status')),
+                ('changed_at', models.DateTimeField(verbose_name='changed at')),
+                ('note', models.CharField(blank=True, max_length=200, verbose_name='note')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='receivable_status_changes', to=settings.AUTH_USER_MODEL)),
+                ('receivable', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='accounts_receivable.accountreceivable', verbose_name='receivable')),
+            ],
+            options={
+                'verbose_name': 'receivable status history',
+                'verbose_name_plural': 'receivable status history',
+                'ordering': ['-changed_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:18
+
+from django.db import migrations, models
+
+
+def seed_current_statuses(apps, schema_editor):
+    """Open a history row for every receivable that has none, from its last update."""
+    AccountReceivable = apps.get_model('accounts_receivable', 'AccountReceivable')
+    ReceivableStatusHistory = apps.get_model('accounts_receivable', 'ReceivableStatusHistory')
+    rows = AccountReceivable.objects.filter(status_history__isnull=True).values_list('pk', 'status', 'updated_at')
+    ReceivableStatusHistory.objects.bulk_create(
+        (ReceivableStatusHistory(receivable_id=pk, to_status=status, changed_at=updated_at, note='Initial status')
+         for pk, status, updated_at in rows.iterator()),
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_receivable', '0007_receivablestatushistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receivablestatushistory',
+            name='duration',
+            field=models.DurationField(blank=True, null=True, verbose_name='duration'),
+        ),
+        migrations.AddField(
+            model_name='receivablestatushistory',
+            name='left_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='left at'),
+        ),
+        migrations.AddIndex(
+            model_name='receivablestatushistory',
+            index=models.Index(fields=['receivable', 'changed_at'], name='accounts_re_receiva_ec94fc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receivablestatushistory',
+            index=models.Index(fields=['to_status', 'changed_at'], name='accounts_re_to_stat_4bb623_idx'),
+        ),
+        migrations.RunPython(seed_current_statuses, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.10 on 2026-10-18 09:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+# Outstanding statuses as of this migration
+OUTSTANDING_STATUSES = ('active', 'overdue')
+
+
+def recalculate_client_outstanding(apps, schema_editor):
+    """Recount client balances that earlier double-counted edits may have skewed."""
+    Client = apps.get_model('accounts_receivable', 'Client')
+    AccountReceivable = apps.get_model('accounts_receivable', 'AccountReceivable')
+    outstanding = AccountReceivable.objects.filter(
+        client=OuterRef('pk'), status__in=OUTSTANDING_STATUSES
+    ).values('client').annotate(total=Sum('amount')).values('total')
+    Client.objects.update(
+        outstanding_balance=Coalesce(Subquery(outstanding), Value(0), output_field=models.DecimalField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_receivable', '0008_receivablestatushistory_dwell'),
+    ]
+
+    operations = [
+        migrations.RunPython(recalculate_client_outstanding, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,16 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Case, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, RegexValidator
 from django.conf import settings
+from document_numbers.models import DocumentSequence, last_issued_seed
+from finance_system.settlements import SettlementRejected, check_posting, mark_settled, refresh_settled
+from finance_system.transitions import record_status_changes
 import datetime
 from datetime import date
+from decimal import Decimal
 
 
 class Bank(models.Model):
@@ -31,6 +38,10 @@ class Bank(models.Model):
         return self.name
 
 
+class CreditLimitExceeded(Exception):
+    """Raised when a receivable would take a client over its credit limit."""
+
+
 class Client(models.Model):
     """Model for clients in the accounts receivable system."""
     
@@ -46,6 +57,14 @@ class Client(models.Model):
     address = models.TextField(_('address'), blank=True)
     tax_number = models.CharField(_('tax number'), max_length=50, blank=True)
     credit_limit = models.DecimalField(_('credit limit'), max_digits=14, decimal_places=2, default=0)
+    outstanding_balance = models.DecimalField(
+        _('outstanding balance'),
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        db_index=True,
+        editable=False
+    )
     pdf_file = models.FileField(_('PDF file'), upload_to='clients/pdf/', blank=True, null=True)
     is_active = models.BooleanField(_('active'), default=True)
     notes = models.TextField(_('notes'), blank=True, max_length=500)
@@ -68,10 +87,47 @@ class Client(models.Model):
     
     @property
     def total_outstanding(self):
-        """Calculate total outstanding amount for this client."""
-        return self.receivables.filter(status__in=['active', 'overdue']).aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
+        """Return the maintained outstanding amount for this client."""
+        return self.outstanding_balance
+    
+    @classmethod
+    def adjust_outstanding(cls, deltas):
+        """Apply a mapping of client id -> amount delta to the stored balances."""
+        for client_id, delta in deltas.items():
+            if client_id is not None and delta:
+                cls.objects.filter(pk=client_id).update(
+                    outstanding_balance=F('outstanding_balance') + delta
+                )
+    
+    @classmethod
+    def exposure_after(cls, client_id, amount, lock=True):
+        """
+        Return ``(exposure, credit_limit)`` for the client once ``amount`` is
+        added, read from the maintained balance in one query. With ``lock``
+        the client row stays locked until the surrounding transaction ends.
+        """
+        queryset = cls.objects.select_for_update() if lock else cls.objects.all()
+        balance, credit_limit = queryset.filter(pk=client_id).values_list(
+            'outstanding_balance', 'credit_limit'
+        ).get()
+        return balance + Decimal(str(amount)), credit_limit
+    
+    @classmethod
+    def recalculate_outstanding(cls, client_ids=None):
+        """Recompute stored balances from receivables with one UPDATE."""
+        outstanding = AccountReceivable.objects.filter(
+            client=OuterRef('pk'),
+            status__in=AccountReceivable.OUTSTANDING_STATUSES
+        ).values('client').annotate(total=Sum('amount')).values('total')
+        
+        queryset = cls.objects.all()
+        if client_ids is not None:
+            queryset = queryset.filter(pk__in=client_ids)
+        return queryset.update(
+            outstanding_balance=Coalesce(
+                Subquery(outstanding), Value(0), output_field=models.DecimalField()
+            )
+        )
 
 
 class AccountReceivable(models.Model):
@@ -90,6 +146,34 @@ class AccountReceivable(models.Model):
         ('client_rejected', _('Client Rejected')),
     )
     
+    # Statuses that count towards the client's outstanding balance: open
+    # receivables and cheques still moving through collection
+    OUTSTANDING_STATUSES = ('active', 'overdue', 'treasury', 'with_representative', 'in_collection')
+    # Status a full payment moves the receivable to
+    SETTLED_STATUS = 'completed'
+    # Kept in step with transactions by F() updates, never written by save()
+    MAINTAINED_FIELDS = ('paid_amount', 'remaining_amount')
+    
+    # Cheque lifecycle: allowed moves for bulk status transitions
+    STATUS_TRANSITIONS = {
+        'pending': ('active', 'treasury', 'client_rejected'),
+        'active': ('overdue', 'treasury', 'with_representative', 'in_collection', 'completed', 'client_rejected'),
+        'overdue': ('treasury', 'with_representative', 'in_collection', 'completed', 'client_rejected'),
+        'treasury': ('with_representative', 'in_collection', 'collected', 'treasury_rejected'),
+        'with_representative': ('treasury', 'in_collection', 'collected', 'client_rejected'),
+        'in_collection': ('collected', 'treasury_rejected', 'client_rejected'),
+        'treasury_rejected': ('active', 'treasury', 'with_representative'),
+        'client_rejected': ('active', 'with_representative'),
+        'collected': ('completed',),
+        'completed': (),
+    }
+    
+    PAYMENT_STATES = (
+        ('unpaid', _('Unpaid')),
+        ('partially_paid', _('Partially Paid')),
+        ('paid', _('Paid')),
+    )
+    
     @classmethod
     def get_status_choices(cls):
         """Return the list of available status choices."""
@@ -97,23 +181,9 @@ class AccountReceivable(models.Model):
     
     # Auto-generate receipt number
     def generate_receipt_number():
-        today = datetime.date.today()
-        year = today.year
-        last_receipt = AccountReceivable.objects.filter(
-            created_at__year=year
-        ).order_by('-receipt_number').first()
-        
-        if last_receipt and last_receipt.receipt_number:
-            try:
-                # Extract the numeric part of the receipt number
-                last_number = int(last_receipt.receipt_number.split('-')[-1])
-                new_number = last_number + 1
-            except (ValueError, IndexError):
-                new_number = 1
-        else:
-            new_number = 1
-        
-        return f"AR-{year}-{new_number:05d}"
+        return DocumentSequence.objects.next_number(
+            'AR', seed=last_issued_seed(AccountReceivable, 'receipt_number')
+        )
     
     bank = models.ForeignKey(
         Bank,
@@ -150,6 +220,22 @@ class AccountReceivable(models.Model):
         default='active'
     )
     notes = models.TextField(_('notes'), blank=True, max_length=500)
+    over_credit_limit = models.BooleanField(_('over credit limit'), default=False, editable=False)
+    paid_amount = models.DecimalField(
+        _('paid amount'),
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False
+    )
+    remaining_amount = models.DecimalField(
+        _('remaining amount'),
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        db_index=True,
+        editable=False
+    )
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -181,7 +267,175 @@ class AccountReceivable(models.Model):
 
         if self.status != 'completed' and self.due_date < today:
             raise ValueError('Due date cannot be in the past for incomplete receivables')
-        super().save(*args, **kwargs)
+        
+        with transaction.atomic():
+            adding = self._state.adding
+            if adding:
+                self.remaining_amount = Decimal(str(self.amount)) - Decimal(str(self.paid_amount))
+            else:
+                stored_amount = self.lock_stored_state()
+                kwargs['update_fields'] = self.unmaintained_fields(kwargs.get('update_fields'))
+            self.check_credit_limit()
+            super().save(*args, **kwargs)
+            if not adding and Decimal(str(self.amount)) != stored_amount:
+                type(self).objects.filter(pk=self.pk).update(remaining_amount=F('amount') - F('paid_amount'))
+                self.refresh_from_db(fields=self.MAINTAINED_FIELDS)
+            self.sync_client_outstanding()
+            self.sync_status_history(user=self.created_by if adding else None)
+    
+    def check_credit_limit(self):
+        """
+        Reject or flag (per ``CREDIT_LIMIT_POLICY``) a save that takes the
+        client over a non-zero credit limit: a new outstanding receivable, or
+        one moved into an outstanding status, raised in amount or moved to
+        another client. Updates compare with the stored row.
+        """
+        client_id, amount = self.outstanding_contribution()
+        old_client_id, old_amount = getattr(self, '_original_outstanding', (None, Decimal('0')))
+        increase = amount - old_amount if old_client_id == client_id else amount
+        if increase <= 0:
+            return
+        exposure, credit_limit = Client.exposure_after(client_id, increase)
+        if credit_limit and exposure > credit_limit:
+            if settings.CREDIT_LIMIT_POLICY == 'reject':
+                raise CreditLimitExceeded(
+                    f'Credit limit of {credit_limit} exceeded: exposure would be {exposure}'
+                )
+            self.over_credit_limit = True
+    
+    def lock_stored_state(self):
+        """
+        Lock this row and remember what its stored version contributes to the
+        client balance and which status it has. Read from the database rather
+        than from the loaded instance, which may be deferred or out of date.
+        The maintained paid and remaining amounts are taken over as stored.
+        Returns the stored amount.
+        """
+        stored = type(self).objects.select_for_update().filter(pk=self.pk).values_list(
+            'client_id', 'status', 'amount', *self.MAINTAINED_FIELDS
+        ).first()
+        if stored is None:
+            self._original_outstanding, self._original_status = (None, Decimal('0')), ''
+            return None
+        client_id, status, amount, self.paid_amount, self.remaining_amount = stored
+        self._original_outstanding = (client_id, amount if status in self.OUTSTANDING_STATUSES else Decimal('0'))
+        self._original_status = status
+        return amount
+    
+    def unmaintained_fields(self, update_fields=None):
+        """Fields an update may write: ``update_fields`` or every loaded field, less the maintained ones."""
+        if update_fields is None:
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+            ]
+        return [name for name in update_fields if name not in self.MAINTAINED_FIELDS]
+    
+    @classmethod
+    def payment_state_q(cls, state):
+        """Return the filter for a ``PAYMENT_STATES`` value."""
+        return {
+            'unpaid': Q(paid_amount__lte=0),
+            'partially_paid': Q(paid_amount__gt=0, remaining_amount__gt=0),
+            'paid': Q(paid_amount__gt=0, remaining_amount__lte=0),
+        }[state]
+    
+    @classmethod
+    def transition_errors(cls, changes):
+        """
+        Credit check for bulk status moves. Receivables entering an
+        outstanding status are added to their client's exposure in order;
+        those taking it over the limit are rejected, or flagged under the
+        ``flag`` policy. Returns pk -> reason for the rejected moves.
+        """
+        entering = [
+            pk for pk, source, target in changes
+            if source not in cls.OUTSTANDING_STATUSES and target in cls.OUTSTANDING_STATUSES
+        ]
+        if not entering:
+            return {}
+        rows = cls.objects.in_bulk(entering)
+        clients = {
+            pk: [balance, credit_limit]
+            for pk, balance, credit_limit in Client.objects.select_for_update().filter(
+                pk__in={row.client_id for row in rows.values()}
+            ).values_list('pk', 'outstanding_balance', 'credit_limit')
+        }
+        errors, flagged = {}, []
+        for pk in entering:
+            exposure = clients[rows[pk].client_id]
+            balance, credit_limit = exposure[0] + rows[pk].amount, exposure[1]
+            if credit_limit and balance > credit_limit:
+                if settings.CREDIT_LIMIT_POLICY == 'reject':
+                    errors[pk] = f'Credit limit of {credit_limit} exceeded: exposure would be {balance}'
+                    continue
+                flagged.append(pk)
+            exposure[0] = balance
+        if flagged:
+            cls.objects.filter(pk__in=flagged).update(over_credit_limit=True)
+        return errors
+    
+    @classmethod
+    def statuses_changed(cls, pks):
+        """Refresh client balances after a bulk status update of ``pks``."""
+        Client.recalculate_outstanding(
+            cls.objects.filter(pk__in=pks).values('client_id').distinct()
+        )
+    
+    @classmethod
+    def payments_posted(cls, pks):
+        """Refresh paid and remaining amounts after transactions were bulk created for ``pks``."""
+        cls.recalculate_paid(pks)
+    
+    @classmethod
+    def apply_paid_deltas(cls, deltas):
+        """Apply a mapping of receivable id -> paid amount delta in place."""
+        for receivable_id, delta in deltas.items():
+            if receivable_id is not None and delta:
+                cls.objects.filter(pk=receivable_id).update(
+                    paid_amount=F('paid_amount') + delta,
+                    remaining_amount=F('remaining_amount') - delta
+                )
+    
+    @classmethod
+    def recalculate_paid(cls, receivable_ids=None):
+        """Recompute paid and remaining amounts from transactions with one UPDATE."""
+        paid = ReceivableTransaction.objects.filter(
+            receivable=OuterRef('pk')
+        ).values('receivable').annotate(
+            total=Sum(ReceivableTransaction.paid_effect())
+        ).values('total')
+        paid = Coalesce(Subquery(paid), Value(0), output_field=models.DecimalField())
+        
+        queryset = cls.objects.all()
+        if receivable_ids is not None:
+            queryset = queryset.filter(pk__in=receivable_ids)
+        return queryset.update(paid_amount=paid, remaining_amount=F('amount') - paid)
+    
+    def outstanding_contribution(self):
+        """Return (client id, amount) this receivable adds to the outstanding balance."""
+        if self.status in self.OUTSTANDING_STATUSES:
+            return self.client_id, Decimal(str(self.amount))
+        return self.client_id, Decimal('0')
+    
+    def sync_client_outstanding(self, deleted=False):
+        """Apply the change in this receivable's contribution to the client balance."""
+        old_client_id, old_amount = getattr(self, '_original_outstanding', (None, Decimal('0')))
+        # A deleted row may be deferred and can no longer load its fields
+        new_client_id, new_amount = (None, Decimal('0')) if deleted else self.outstanding_contribution()
+        
+        deltas = {old_client_id: -old_amount}
+        deltas[new_client_id] = deltas.get(new_client_id, Decimal('0')) + new_amount
+        Client.adjust_outstanding(deltas)
+        self._original_outstanding = (new_client_id, new_amount)
+    
+    def sync_status_history(self, user=None):
+        """Append a status history row when this save changed the status."""
+        previous = getattr(self, '_original_status', '')
+        if previous != self.status:
+            record_status_changes(type(self), [(self.pk, previous, self.status)], user=user)
+        self._original_status = self.status
 
 
 class ReceivableTransaction(models.Model):
@@ -195,6 +449,11 @@ class ReceivableTransaction(models.Model):
         ('adjustment', _('Adjustment')),
     )
     
+    # Transaction types that reduce what the client still owes
+    PAYMENT_TYPES = ('deposit', 'partial_payment', 'full_payment')
+    # Transaction types that give back an earlier payment
+    REVERSAL_TYPES = ('return',)
+    
     receivable = models.ForeignKey(
         AccountReceivable,
         on_delete=models.CASCADE,
@@ -232,9 +491,145 @@ class ReceivableTransaction(models.Model):
         return f"{self.receivable.receipt_number} - {self.transaction_type} - {self.amount}"
     
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if not self._state.adding:
+                self.lock_stored_state()
+            check_posting(AccountReceivable, self)
+            super().save(*args, **kwargs)
+            self.sync_receivable_paid()
+            
+            # Settle the receivable in place instead of re-saving it
+            if self.transaction_type == 'full_payment':
+                changes = mark_settled(AccountReceivable, [self.receivable_id], user=self.created_by)
+                if changes and 'receivable' in self._state.fields_cache:
+                    refresh_settled(self.receivable)
+    
+    def clean(self):
+        super().clean()
+        try:
+            check_posting(AccountReceivable, self, lock=False)
+        except SettlementRejected as exc:
+            raise ValidationError({'transaction_type': exc.messages})
+    
+    def lock_stored_state(self):
+        """
+        Lock this row and remember what its stored version contributes to
+        its receivable's paid amount, read from the database rather than from
+        the loaded instance, which may be deferred or out of date.
+        """
+        stored = type(self).objects.select_for_update().filter(pk=self.pk).values_list(
+            'receivable_id', 'transaction_type', 'amount'
+        ).first()
+        if stored is None:
+            self._original_paid = (None, Decimal('0'))
+            return
+        receivable_id, transaction_type, amount = stored
+        self._original_paid = (receivable_id, self.signed_amount(transaction_type, amount))
+    
+    @classmethod
+    def paid_effect(cls):
+        """Expression for the signed amount a transaction adds to ``paid_amount``."""
+        return Case(
+            When(transaction_type__in=cls.PAYMENT_TYPES, then=F('amount')),
+            When(transaction_type__in=cls.REVERSAL_TYPES, then=-F('amount')),
+            default=Value(0),
+            output_field=models.DecimalField()
+        )
+    
+    @classmethod
+    def signed_amount(cls, transaction_type, amount):
+        """Return what a transaction of ``transaction_type`` adds to the paid amount."""
+        amount = Decimal(str(amount))
+        if transaction_type in cls.PAYMENT_TYPES:
+            return amount
+        if transaction_type in cls.REVERSAL_TYPES:
+            return -amount
+        return Decimal('0')
+    
+    def paid_contribution(self):
+        """Return (receivable id, signed amount) this transaction adds to the paid amount."""
+        return self.receivable_id, self.signed_amount(self.transaction_type, self.amount)
+    
+    def sync_receivable_paid(self, deleted=False):
+        """Apply the change in this transaction's contribution to the receivable."""
+        old_receivable_id, old_amount = getattr(self, '_original_paid', (None, Decimal('0')))
+        # A deleted row can no longer load its deferred fields
+        new_receivable_id, new_amount = (None, Decimal('0')) if deleted else self.paid_contribution()
+        
+        deltas = {old_receivable_id: -old_amount}
+        deltas[new_receivable_id] = deltas.get(new_receivable_id, Decimal('0')) + new_amount
+        AccountReceivable.apply_paid_deltas(deltas)
+        self._original_paid = (new_receivable_id, new_amount)
         
-        # Update receivable status if full payment
-        if self.transaction_type == 'full_payment':
-            self.receivable.status = 'completed'
-            self.receivable.save()
+        # Keep a loaded receivable in step so a later save() does not undo the delta
+        if not deleted and 'receivable' in self._state.fields_cache:
+            self.receivable.refresh_from_db(fields=['paid_amount', 'remaining_amount'])
+
+
+class ReceivableStatusHistory(models.Model):
+    """Append-only record of a receivable's status changes."""
+    
+    receivable = models.ForeignKey(
+        AccountReceivable,
+        on_delete=models.CASCADE,
+        related_name='status_history',
+        verbose_name=_('receivable')
+    )
+    from_status = models.CharField(
+        _('from status'), max_length=20, choices=AccountReceivable.STATUS_CHOICES, blank=True
+    )
+    to_status = models.CharField(_('to status'), max_length=20, choices=AccountReceivable.STATUS_CHOICES)
+    changed_at = models.DateTimeField(_('changed at'))
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='receivable_status_changes'
+    )
+    note = models.CharField(_('note'), max_length=200, blank=True)
+    left_at = models.DateTimeField(_('left at'), null=True, blank=True)
+    duration = models.DurationField(_('duration'), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('receivable status history')
+        verbose_name_plural = _('receivable status history')
+        ordering = ['-changed_at']
+        indexes = [
+            models.Index(fields=['receivable', 'changed_at']),
+            models.Index(fields=['to_status', 'changed_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.receivable_id}: {self.from_status} -> {self.to_status}"
+
+
+class AgingSnapshot(models.Model):
+    """Daily receivables aging totals per client or bank, kept for history."""
+    
+    GROUP_CHOICES = (
+        ('client', _('Client')),
+        ('bank', _('Bank')),
+    )
+    
+    snapshot_date = models.DateField(_('snapshot date'))
+    group_by = models.CharField(_('group by'), max_length=10, choices=GROUP_CHOICES)
+    group_id = models.PositiveBigIntegerField(_('group id'))
+    group_name = models.CharField(_('group name'), max_length=200)
+    receivable_count = models.PositiveIntegerField(_('receivable count'), default=0)
+    current = models.DecimalField(_('current'), max_digits=14, decimal_places=2, default=0)
+    days_1_30 = models.DecimalField(_('1-30 days'), max_digits=14, decimal_places=2, default=0)
+    days_31_60 = models.DecimalField(_('31-60 days'), max_digits=14, decimal_places=2, default=0)
+    days_61_90 = models.DecimalField(_('61-90 days'), max_digits=14, decimal_places=2, default=0)
+    days_over_90 = models.DecimalField(_('over 90 days'), max_digits=14, decimal_places=2, default=0)
+    total = models.DecimalField(_('total'), max_digits=14, decimal_places=2, default=0)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('aging snapshot')
+        verbose_name_plural = _('aging snapshots')
+        ordering = ['-snapshot_date', 'group_by', 'group_name']
+        unique_together = ['snapshot_date', 'group_by', 'group_id']
+    
+    def __str__(self):
+        return f"{self.snapshot_date} - {self.group_name} - {self.total}"
@@ -1,5 +1,10 @@
 from rest_framework import serializers
+from finance_system.exports import ExportOptionsSerializer
+from finance_system.settlements import PostingSerializerMixin
+from finance_system.pagination import DetailOptionsSerializer
 from .models import Bank, Client, AccountReceivable, ReceivableTransaction
+from .importers import IMPORT_FORMATS, parse_rows
+from .forecast import GRANULARITIES
 
 
 class BankSerializer(serializers.ModelSerializer):
@@ -14,15 +19,31 @@ class BankSerializer(serializers.ModelSerializer):
 class ClientSerializer(serializers.ModelSerializer):
     """Serializer for the Client model."""
     
-    total_outstanding = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    total_outstanding = serializers.DecimalField(
+        source='outstanding_balance', max_digits=14, decimal_places=2, read_only=True
+    )
     
     class Meta:
         model = Client
         fields = '__all__'
-        read_only_fields = ('created_by', 'created_at', 'updated_at', 'total_outstanding')
+        read_only_fields = ('created_by', 'created_at', 'updated_at', 'outstanding_balance', 'total_outstanding')
 
 
-class ReceivableTransactionSerializer(serializers.ModelSerializer):
+class ClientExposureSerializer(serializers.ModelSerializer):
+    """Serializer for a client's credit exposure against its limit."""
+    
+    utilization = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    available_credit = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    
+    class Meta:
+        model = Client
+        fields = (
+            'id', 'name', 'arabic_name', 'credit_limit', 'outstanding_balance',
+            'available_credit', 'utilization'
+        )
+
+
+class ReceivableTransactionSerializer(PostingSerializerMixin, serializers.ModelSerializer):
     """Serializer for the ReceivableTransaction model."""
     
     class Meta:
@@ -52,19 +73,52 @@ class AccountReceivableSerializer(serializers.ModelSerializer):
         return data
 
 
+class StatusRollupSerializer(serializers.Serializer):
+    """Serializer for a single status bucket of a dashboard rollup."""
+    
+    status = serializers.CharField()
+    count = serializers.IntegerField()
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
 class DashboardSummarySerializer(serializers.Serializer):
     """Serializer for the dashboard summary data."""
     
     total_receivables = serializers.DecimalField(max_digits=14, decimal_places=2)
+    total_count = serializers.IntegerField()
     active_receivables = serializers.DecimalField(max_digits=14, decimal_places=2)
     completed_receivables = serializers.DecimalField(max_digits=14, decimal_places=2)
     overdue_receivables = serializers.DecimalField(max_digits=14, decimal_places=2)
     pending_receivables = serializers.DecimalField(max_digits=14, decimal_places=2)
+    by_status = StatusRollupSerializer(many=True)
     total_clients = serializers.IntegerField()
     recent_transactions = ReceivableTransactionSerializer(many=True)
 
 
-class ReceivablesReportSerializer(serializers.Serializer):
+class StatusDwellReportSerializer(serializers.Serializer):
+    """Serializer for the time-in-status report parameters."""
+    
+    group_by = serializers.ChoiceField(choices=['status', 'client', 'bank'], default='status')
+    status = serializers.ChoiceField(choices=AccountReceivable.STATUS_CHOICES, required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    include_open = serializers.BooleanField(default=False)
+
+
+class CollectionForecastSerializer(serializers.Serializer):
+    """Serializer for the collection forecast parameters."""
+    
+    granularity = serializers.ChoiceField(choices=GRANULARITIES, default='weekly')
+
+
+class AgingReportSerializer(serializers.Serializer):
+    """Serializer for the receivables aging report parameters."""
+    
+    as_of = serializers.DateField(required=False)
+    group_by = serializers.ChoiceField(choices=['client', 'bank'], default='client')
+
+
+class ReceivablesReportSerializer(ExportOptionsSerializer, DetailOptionsSerializer):
     """Serializer for the receivables report data."""
     
     start_date = serializers.DateField()
@@ -72,3 +126,46 @@ class ReceivablesReportSerializer(serializers.Serializer):
     status = serializers.CharField(required=False)
     client = serializers.IntegerField(required=False)
     bank = serializers.IntegerField(required=False)
+    payment_state = serializers.ChoiceField(choices=AccountReceivable.PAYMENT_STATES, required=False)
+    
+    detail_keyset = ('-transaction_date', '-id')
+    keyset_fields = {'transaction_date': serializers.DateField(), 'id': serializers.IntegerField()}
+
+
+class ReceivableImportSerializer(serializers.Serializer):
+    """Serializer for a bulk receivable import: an uploaded CSV/JSON file or inline rows."""
+    
+    file = serializers.FileField(required=False)
+    rows = serializers.ListField(child=serializers.DictField(), required=False)
+    format = serializers.ChoiceField(choices=IMPORT_FORMATS, required=False)
+    dry_run = serializers.BooleanField(default=False)
+    
+    def validate(self, data):
+        upload = data.get('file')
+        if upload is None:
+            if 'rows' not in data:
+                raise serializers.ValidationError("Provide a file or a list of rows.")
+            return data
+        
+        import_format = data.get('format') or upload.name.rsplit('.', 1)[-1].lower()
+        if import_format not in IMPORT_FORMATS:
+            raise serializers.ValidationError({'format': "Use csv or json."})
+        try:
+            data['rows'] = parse_rows(upload.read().decode('utf-8'), import_format)
+        except (UnicodeDecodeError, ValueError) as exc:
+            raise serializers.ValidationError({'file': f"Could not read the file: {exc}"})
+        return data
+
+
+class StatusTransitionItemSerializer(serializers.Serializer):
+    """One requested status move."""
+    
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=AccountReceivable.STATUS_CHOICES)
+
+
+class BulkStatusTransitionSerializer(serializers.Serializer):
+    """Serializer for a bulk status transition request."""
+    
+    transitions = StatusTransitionItemSerializer(many=True, allow_empty=False, max_length=1000)
+    note = serializers.CharField(max_length=200, required=False, allow_blank=True, default='')
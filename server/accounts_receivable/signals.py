@@ -0,0 +1,61 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import Signal, receiver
+from finance_system.rollups import invalidate
+from finance_system.settlements import payments_settled
+from finance_system.transitions import status_transitioned
+from .models import Client, AccountReceivable, ReceivableTransaction
+
+
+DASHBOARD_CACHE_KEY = 'accounts_receivable:dashboard_summary'
+# Writes invalidate the summary; the timeout bounds any invalidation that is missed
+DASHBOARD_CACHE_TIMEOUT = 5 * 60
+
+# Sent once per bulk import, after commit, with the created ``receivables``
+receivables_imported = Signal()
+
+
+def invalidate_dashboard():
+    """Drop the cached dashboard summary so the next poll recomputes it."""
+    invalidate(DASHBOARD_CACHE_KEY)
+
+
+@receiver(post_save, sender=AccountReceivable)
+@receiver(post_delete, sender=AccountReceivable)
+@receiver(post_save, sender=ReceivableTransaction)
+@receiver(post_delete, sender=ReceivableTransaction)
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def invalidate_dashboard_on_write(sender, **kwargs):
+    """Invalidate the dashboard summary on every receivable-side write."""
+    invalidate_dashboard()
+
+
+@receiver(status_transitioned, sender=AccountReceivable)
+@receiver(payments_settled, sender=AccountReceivable)
+def invalidate_dashboard_on_transition(sender, **kwargs):
+    """Bulk transitions and settlements bypass post_save, so invalidate explicitly."""
+    invalidate_dashboard()
+
+
+@receiver(pre_delete, sender=ReceivableTransaction)
+def lock_deleted_transaction(sender, instance, **kwargs):
+    """Read what a transaction about to be deleted adds to its receivable."""
+    instance.lock_stored_state()
+
+
+@receiver(post_delete, sender=ReceivableTransaction)
+def release_receivable_paid(sender, instance, **kwargs):
+    """Remove a deleted transaction from its receivable's paid amount."""
+    instance.sync_receivable_paid(deleted=True)
+
+
+@receiver(pre_delete, sender=AccountReceivable)
+def lock_deleted_receivable(sender, instance, **kwargs):
+    """Read what a receivable about to be deleted adds to its client's balance."""
+    instance.lock_stored_state()
+
+
+@receiver(post_delete, sender=AccountReceivable)
+def release_client_outstanding(sender, instance, **kwargs):
+    """Remove a deleted receivable from its client's outstanding balance."""
+    instance.sync_client_outstanding(deleted=True)
@@ -1,8 +1,24 @@
-from django.test import TestCase
+import base64
+import datetime
+import json
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.test import TestCase, override_settings
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from .models import AccountReceivable, Client, Bank
+from .models import (
+    AccountReceivable, Client, Bank, ReceivableTransaction, ReceivableStatusHistory, CreditLimitExceeded
+)
+from .signals import DASHBOARD_CACHE_KEY
+from .aging import compute_aging, take_snapshot, aging_report
+from .importers import import_receivables
+from .forecast import collection_forecast
+from finance_system.pagination import encode_cursor
+from finance_system.settlements import SettlementRejected
+from finance_system.transitions import record_status_changes
 
 class AccountsReceivableAPITestCase(APITestCase):
     def setUp(self):
@@ -51,3 +67,753 @@ class AccountsReceivableAPITestCase(APITestCase):
         self.assertGreater(len(response.data['results']), 0)  # Ensure the list is not empty
 
 # Create your tests here.
+
+
+class DashboardSummaryTestCase(APITestCase):
+    def setUp(self):
+        cache.delete(DASHBOARD_CACHE_KEY)
+        self.summary_url = '/api/v1/accounts-receivable/dashboard/summary/'
+        User = get_user_model()
+        self.user = User.objects.create_user(email='dashboard@example.com', password='testpassword')
+        self.client.force_authenticate(self.user)
+        client = Client.objects.create(name="Dashboard Client")
+        bank = Bank.objects.create(name="Dashboard Bank", arabic_name="Dashboard Bank")
+        due_date = datetime.date.today() + datetime.timedelta(days=30)
+        for status_value, amount in [('active', 100), ('treasury', 250), ('collected', 400)]:
+            AccountReceivable.objects.create(
+                client=client, bank=bank, amount=amount, due_date=due_date,
+                check_number='CHK', status=status_value, created_by=self.user
+            )
+
+    def test_summary_covers_every_status(self):
+        response = self.client.get(self.summary_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        by_status = {item['status']: item for item in response.data['by_status']}
+        self.assertEqual(set(by_status), {value for value, _ in AccountReceivable.STATUS_CHOICES})
+        self.assertEqual(by_status['treasury']['count'], 1)
+        self.assertEqual(by_status['treasury']['label'], 'Treasury')
+        self.assertEqual(by_status['collected']['total'], '400.00')
+        self.assertEqual(response.data['total_count'], 3)
+
+    def test_summary_is_cached_until_next_write(self):
+        self.client.get(self.summary_url)
+        # A single read of the shared cache table
+        with self.assertNumQueries(1):
+            self.client.get(self.summary_url)
+        receivable = AccountReceivable.objects.get(status='active')
+        receivable.status = 'completed'
+        with self.captureOnCommitCallbacks(execute=True):
+            receivable.save()
+        response = self.client.get(self.summary_url)
+        by_status = {item['status']: item for item in response.data['by_status']}
+        self.assertEqual(by_status['completed']['count'], 1)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_summary_is_not_cached_per_process(self):
+        self.client.get(self.summary_url)
+        AccountReceivable.objects.filter(status='active').update(status='completed')
+        response = self.client.get(self.summary_url)
+        by_status = {item['status']: item for item in response.data['by_status']}
+        self.assertEqual(by_status['completed']['count'], 1)
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class ReceivableListQueryBudgetTestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='budget@example.com', password='testpassword')
+        self.client.force_authenticate(self.user)
+        due_date = datetime.date.today() + datetime.timedelta(days=30)
+        for i in range(20):
+            client = Client.objects.create(name=f"Budget Client {i}")
+            bank = Bank.objects.create(name=f"Budget Bank {i}", arabic_name=f"Budget Bank {i}")
+            receivable = AccountReceivable.objects.create(
+                client=client, bank=bank, amount=100 + i, due_date=due_date,
+                check_number=f'CHK{i}', created_by=self.user
+            )
+            ReceivableTransaction.objects.create(
+                receivable=receivable, transaction_type='deposit', amount=10
+            )
+
+    def test_list_stays_within_query_budget(self):
+        response = self.client.get('/api/v1/accounts-receivable/receivables/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['client_name'][:13], 'Budget Client')
+
+    def test_client_list_stays_within_query_budget(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/accounts-receivable/clients/')
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_jwt_user_lookup_is_not_counted(self):
+        self.client.force_authenticate(None)
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/v1/accounts-receivable/clients/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ClientOutstandingBalanceTestCase(TestCase):
+    def setUp(self):
+        self.client_record = Client.objects.create(name="Balance Client")
+        self.other_client = Client.objects.create(name="Other Client")
+        self.bank = Bank.objects.create(name="Balance Bank", arabic_name="Balance Bank")
+        self.due_date = datetime.date.today() + datetime.timedelta(days=30)
+
+    def create_receivable(self, amount, status_value='active'):
+        return AccountReceivable.objects.create(
+            client=self.client_record, bank=self.bank, amount=amount,
+            due_date=self.due_date, check_number='CHK', status=status_value
+        )
+
+    def test_balance_follows_create_status_change_and_delete(self):
+        first = self.create_receivable(1000)
+        self.create_receivable(500, status_value='completed')
+        self.client_record.refresh_from_db()
+        self.assertEqual(self.client_record.outstanding_balance, 1000)
+
+        receivable = AccountReceivable.objects.get(pk=first.pk)
+        receivable.status = 'completed'
+        receivable.save()
+        self.client_record.refresh_from_db()
+        self.assertEqual(self.client_record.outstanding_balance, 0)
+
+        receivable.status = 'overdue'
+        receivable.client = self.other_client
+        receivable.save()
+        self.other_client.refresh_from_db()
+        self.assertEqual(self.other_client.outstanding_balance, 1000)
+
+        AccountReceivable.objects.filter(pk=first.pk).delete()
+        self.other_client.refresh_from_db()
+        self.assertEqual(self.other_client.outstanding_balance, 0)
+
+    def test_deferred_and_stale_instances_use_the_stored_row(self):
+        receivable = self.create_receivable(1000)
+        stale = AccountReceivable.objects.get(pk=receivable.pk)
+
+        deferred = AccountReceivable.objects.only('id', 'notes').get(pk=receivable.pk)
+        deferred.status = 'completed'
+        deferred.save()
+        self.client_record.refresh_from_db()
+        self.assertEqual(self.client_record.outstanding_balance, 0)
+
+        # Loaded while still active, but the stored row is completed by now
+        stale.status = 'overdue'
+        stale.save()
+        self.client_record.refresh_from_db()
+        self.assertEqual(self.client_record.outstanding_balance, 1000)
+
+        AccountReceivable.objects.only('id').get(pk=receivable.pk).delete()
+        self.client_record.refresh_from_db()
+        self.assertEqual(self.client_record.outstanding_balance, 0)
+
+    def test_recalculate_matches_receivables(self):
+        self.create_receivable(250)
+        Client.objects.update(outstanding_balance=0)
+        Client.recalculate_outstanding()
+        self.client_record.refresh_from_db()
+        self.assertEqual(self.client_record.outstanding_balance, 250)
+
+
+class AgingReportTestCase(TestCase):
+    def setUp(self):
+        self.today = datetime.date.today()
+        self.client_record = Client.objects.create(name="Aging Client")
+        self.bank = Bank.objects.create(name="Aging Bank", arabic_name="Aging Bank")
+        for days, amount in [(10, 1000), (40, 2000), (200, 3000)]:
+            AccountReceivable.objects.create(
+                client=self.client_record, bank=self.bank, amount=amount, check_number='CHK',
+                due_date=self.today + datetime.timedelta(days=days)
+            )
+        receivable = AccountReceivable.objects.get(amount=1000)
+        ReceivableTransaction.objects.create(
+            receivable=receivable, transaction_type='partial_payment', amount=400
+        )
+
+    def test_buckets_are_net_of_payments(self):
+        as_of = self.today + datetime.timedelta(days=45)
+        with self.assertNumQueries(1):
+            rows = compute_aging(as_of, 'client')
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual(row['days_31_60'], 600)
+        self.assertEqual(row['days_1_30'], 2000)
+        self.assertEqual(row['current'], 3000)
+        self.assertEqual(row['total'], 5600)
+
+    def test_cheques_in_collection_are_aged(self):
+        AccountReceivable.objects.filter(amount=3000).update(status='treasury')
+        AccountReceivable.objects.filter(amount=2000).update(status='in_collection')
+        rows = compute_aging(self.today + datetime.timedelta(days=45), 'client')
+        self.assertEqual(rows[0]['total'], 5600)
+
+    def test_past_days_are_served_from_snapshots(self):
+        yesterday = self.today - datetime.timedelta(days=1)
+        AccountReceivable.objects.update(transaction_date=yesterday)
+        ReceivableTransaction.objects.update(transaction_date=yesterday)
+        take_snapshot(yesterday)
+        AccountReceivable.objects.update(status='completed')
+        report = aging_report(yesterday, 'bank')
+        self.assertEqual(report['source'], 'snapshot')
+        self.assertEqual(report['totals']['total'], 5600)
+
+    def test_past_days_without_snapshot_use_the_status_on_that_day(self):
+        last_week = self.today - datetime.timedelta(days=7)
+        AccountReceivable.objects.update(transaction_date=last_week - datetime.timedelta(days=1))
+        ReceivableTransaction.objects.update(transaction_date=last_week)
+        ReceivableStatusHistory.objects.update(changed_at=timezone.now() - datetime.timedelta(days=8))
+        settled = AccountReceivable.objects.get(amount=3000)
+        settled.status = 'completed'
+        settled.save()
+
+        self.assertEqual(compute_aging(last_week, 'client')[0]['total'], 5600)
+        self.assertEqual(compute_aging(self.today, 'client')[0]['total'], 2600)
+
+    def test_past_days_before_any_recorded_change_use_the_status_left(self):
+        last_week = self.today - datetime.timedelta(days=7)
+        AccountReceivable.objects.update(transaction_date=last_week - datetime.timedelta(days=1))
+        ReceivableTransaction.objects.update(transaction_date=last_week)
+        # Receivables entered before status history was kept
+        ReceivableStatusHistory.objects.all().delete()
+        settled = AccountReceivable.objects.get(amount=3000)
+        settled.status = 'completed'
+        settled.save()
+
+        self.assertEqual(compute_aging(last_week, 'client')[0]['total'], 5600)
+        self.assertEqual(compute_aging(self.today, 'client')[0]['total'], 2600)
+
+
+class ReceivablesReportExportTestCase(APITestCase):
+    def setUp(self):
+        self.report_url = '/api/v1/accounts-receivable/reports/receivables/'
+        User = get_user_model()
+        self.user = User.objects.create_user(email='export@example.com', password='testpassword')
+        self.client.force_authenticate(self.user)
+        client = Client.objects.create(name="Export Client")
+        bank = Bank.objects.create(name="Export Bank", arabic_name="Export Bank")
+        due_date = datetime.date.today() + datetime.timedelta(days=30)
+        for i in range(5):
+            AccountReceivable.objects.create(
+                client=client, bank=bank, amount=100 * (i + 1), due_date=due_date,
+                check_number=f'CHK{i}', created_by=self.user
+            )
+        today = datetime.date.today().isoformat()
+        self.params = {'start_date': today, 'end_date': today}
+
+    def test_report_streams_csv_export(self):
+        response = self.client.post(self.report_url, {**self.params, 'export': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0].split(',')[0], 'Receipt Number')
+        self.assertEqual(len(lines), 6)
+        self.assertIn('Export Client', lines[1])
+        self.assertIn(',Active,', lines[1])
+
+    def test_csv_export_quotes_formulas(self):
+        AccountReceivable.objects.update(notes='=HYPERLINK("http://example.com")')
+        response = self.client.post(self.report_url, {**self.params, 'export': 'csv'})
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertTrue(lines[1].endswith(',"\'=HYPERLINK(""http://example.com"")"'))
+
+    def test_report_xlsx_export(self):
+        response = self.client.post(self.report_url, {**self.params, 'export': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('receivables.xlsx', response['Content-Disposition'])
+
+    def test_summary_only_omits_detail_rows(self):
+        response = self.client.post(self.report_url, {**self.params, 'detail': 'none'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_count'], 5)
+        self.assertNotIn('receivables', response.data)
+
+    def test_cursor_pages_cover_every_row_once(self):
+        seen = []
+        params = {**self.params, 'detail': 'cursor', 'page_size': 2}
+        while True:
+            response = self.client.post(self.report_url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(row['id'] for row in response.data['receivables'])
+            cursor = response.data['pagination']['next_cursor']
+            if not cursor:
+                break
+            params['cursor'] = cursor
+        self.assertEqual(seen, sorted(AccountReceivable.objects.values_list('id', flat=True), reverse=True))
+
+    def test_offset_pages_cover_every_row_once(self):
+        seen = []
+        for page in (1, 2, 3):
+            response = self.client.post(self.report_url, {**self.params, 'detail': 'page', 'page': page, 'page_size': 2})
+            seen.extend(row['id'] for row in response.data['receivables'])
+        self.assertEqual(seen, sorted(AccountReceivable.objects.values_list('id', flat=True), reverse=True))
+
+    def test_malformed_cursor_is_rejected(self):
+        cursor = encode_cursor(['not-a-date', 1])
+        response = self.client.post(self.report_url, {**self.params, 'detail': 'cursor', 'cursor': cursor})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cursor', response.data)
+
+    def test_unsigned_or_foreign_cursors_are_rejected(self):
+        last = AccountReceivable.objects.order_by('-transaction_date', '-id')[1]
+        values = [last.transaction_date, last.pk]
+        unsigned = base64.urlsafe_b64encode(json.dumps([str(values[0]), values[1]]).encode()).decode()
+        for cursor in (unsigned, encode_cursor(values, salt='accounts_payable.upcoming_payments')):
+            response = self.client.post(self.report_url, {**self.params, 'detail': 'cursor', 'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('cursor', response.data)
+
+
+class ReceivableImportTestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='import@example.com', password='testpassword')
+        self.client.force_authenticate(self.user)
+        self.client_record = Client.objects.create(name="Import Client")
+        self.bank = Bank.objects.create(name="Import Bank", arabic_name="Import Bank")
+        self.due_date = (datetime.date.today() + datetime.timedelta(days=30)).isoformat()
+
+    def test_csv_upload_imports_valid_rows_and_reports_errors(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from finance_calendar.models import CalendarEvent
+        content = (
+            "client,bank,amount,due_date,check_number\n"
+            f"{self.client_record.pk},{self.bank.pk},1000,{self.due_date},CHK1\n"
+            f"999,{self.bank.pk},500,{self.due_date},CHK2\n"
+            f"{self.client_record.pk},{self.bank.pk},250,{self.due_date},CHK3\n"
+        )
+        upload = SimpleUploadedFile('batch.csv', content.encode('utf-8'), content_type='text/csv')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/v1/accounts-receivable/receivables/import/', {'file': upload}, format='multipart'
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2])
+        numbers = list(AccountReceivable.objects.values_list('receipt_number', flat=True))
+        self.assertEqual(len(set(numbers)), 2)
+        self.client_record.refresh_from_db()
+        self.assertEqual(self.client_record.outstanding_balance, 1250)
+        self.assertEqual(CalendarEvent.objects.filter(event_type='receivable').count(), 2)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        rows = [
+            {'client': self.client_record.pk, 'bank': self.bank.pk, 'amount': '10.00',
+             'due_date': self.due_date, 'check_number': f'CHK{i}'}
+            for i in range(50)
+        ]
+        with self.assertNumQueries(15):
+            result = import_receivables(rows, user=self.user)
+        self.assertEqual(result['created'], 50)
+
+
+class ReceivablePaidAmountTestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='paid@example.com', password='testpassword')
+        self.client.force_authenticate(self.user)
+        client = Client.objects.create(name="Paid Client")
+        bank = Bank.objects.create(name="Paid Bank", arabic_name="Paid Bank")
+        due_date = datetime.date.today() + datetime.timedelta(days=30)
+        self.receivable = AccountReceivable.objects.create(
+            client=client, bank=bank, amount=1000, due_date=due_date, check_number='CHK1'
+        )
+        AccountReceivable.objects.create(
+            client=client, bank=bank, amount=500, due_date=due_date, check_number='CHK2'
+        )
+
+    def assertBalances(self, paid, remaining):
+        self.receivable.refresh_from_db()
+        self.assertEqual(self.receivable.paid_amount, paid)
+        self.assertEqual(self.receivable.remaining_amount, remaining)
+
+    def test_postings_edits_and_deletes_update_balances(self):
+        self.assertBalances(0, 1000)
+        payment = ReceivableTransaction.objects.create(
+            receivable=self.receivable, transaction_type='partial_payment', amount=300
+        )
+        ReceivableTransaction.objects.create(
+            receivable=self.receivable, transaction_type='adjustment', amount=50
+        )
+        self.assertBalances(300, 700)
+
+        payment = ReceivableTransaction.objects.get(pk=payment.pk)
+        payment.amount = 400
+        payment.save()
+        self.assertBalances(400, 600)
+
+        ReceivableTransaction.objects.create(
+            receivable=self.receivable, transaction_type='return', amount=100
+        )
+        self.assertBalances(300, 700)
+
+        payment.delete()
+        self.assertBalances(-100, 1100)
+
+        AccountReceivable.objects.update(paid_amount=0, remaining_amount=0)
+        AccountReceivable.recalculate_paid()
+        self.assertBalances(-100, 1100)
+
+    def test_deferred_and_stale_transaction_saves_apply_no_delta(self):
+        payment = ReceivableTransaction.objects.create(
+            receivable=self.receivable, transaction_type='partial_payment', amount=300
+        )
+        deferred = ReceivableTransaction.objects.only('id', 'notes').get(pk=payment.pk)
+        deferred.notes = 'Edited from a deferred copy'
+        deferred.save()
+        self.assertBalances(300, 700)
+
+        stale = ReceivableTransaction.objects.get(pk=payment.pk)
+        ReceivableTransaction.objects.filter(pk=payment.pk).update(amount=400)
+        AccountReceivable.recalculate_paid([self.receivable.pk])
+        stale.notes = 'Edited from an old copy'
+        stale.save()
+        self.assertBalances(300, 700)
+
+        ReceivableTransaction.objects.only('id').get(pk=payment.pk).delete()
+        self.assertBalances(0, 1000)
+
+    def test_moving_a_transaction_moves_its_payment(self):
+        other = AccountReceivable.objects.exclude(pk=self.receivable.pk).get()
+        payment = ReceivableTransaction.objects.create(
+            receivable=self.receivable, transaction_type='partial_payment', amount=300
+        )
+        payment.receivable = other
+        payment.save()
+        self.assertBalances(0, 1000)
+        other.refresh_from_db()
+        self.assertEqual((other.paid_amount, other.remaining_amount), (300, 200))
+
+    def test_stale_save_keeps_maintained_amounts(self):
+        stale = AccountReceivable.objects.get(pk=self.receivable.pk)
+        ReceivableTransaction.objects.create(
+            receivable=self.receivable, transaction_type='partial_payment', amount=300
+        )
+        stale.notes = 'Edited from an old copy'
+        stale.save()
+        self.assertBalances(300, 700)
+        self.assertEqual((stale.paid_amount, stale.remaining_amount), (300, 700))
+
+        # Changing the amount moves only the remaining amount
+        stale.amount = 1200
+        stale.save()
+        self.assertBalances(300, 900)
+
+    def test_full_payment_keeps_paid_amount(self):
+        ReceivableTransaction.objects.create(
+            receivable=self.receivable, transaction_type='full_payment', amount=1000
+        )
+        self.assertBalances(1000, 0)
+        self.assertEqual(self.receivable.status, 'completed')
+
+    def test_settlement_batch_posts_payments_in_one_go(self):
+        other = AccountReceivable.objects.exclude(pk=self.receivable.pk).get()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/accounts-receivable/receivables/settlements/', {'payments': [
+                {'id': self.receivable.pk, 'transaction_type': 'partial_payment', 'amount': '400.00'},
+                {'id': self.receivable.pk, 'transaction_type': 'partial_payment', 'amount': '100.00'},
+                {'id': other.pk, 'transaction_type': 'full_payment', 'amount': '500.00', 'reference': 'BATCH-1'},
+            ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['posted'], response.data['settled']), (3, 1))
+        self.assertBalances(500, 500)
+        other.refresh_from_db()
+        self.assertEqual((other.status, other.remaining_amount, other.client.outstanding_balance), ('completed', 0, 1000))
+        self.assertFalse(other.calendar_events.exists())
+
+    def test_payments_that_cannot_settle_are_refused(self):
+        other = AccountReceivable.objects.exclude(pk=self.receivable.pk).get()
+        AccountReceivable.objects.filter(pk=other.pk).update(status='pending')
+        ReceivableTransaction.objects.create(
+            receivable=self.receivable, transaction_type='full_payment', amount=1000
+        )
+        response = self.client.post('/api/v1/accounts-receivable/receivables/settlements/', {'payments': [
+            {'id': self.receivable.pk, 'transaction_type': 'partial_payment', 'amount': '10.00'},
+            {'id': other.pk, 'transaction_type': 'full_payment', 'amount': '500.00'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [item['detail'] for item in response.data['results']],
+            ['Already settled.', 'Cannot move from pending to completed.']
+        )
+        self.assertEqual(ReceivableTransaction.objects.count(), 1)
+
+        response = self.client.post(f'/api/v1/accounts-receivable/receivables/{other.pk}/transactions/', {
+            'receivable': other.pk, 'transaction_type': 'full_payment', 'amount': '500.00'
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('transaction_type', response.data)
+        with self.assertRaises(SettlementRejected):
+            ReceivableTransaction.objects.create(receivable=self.receivable, transaction_type='partial_payment', amount=5)
+        other.refresh_from_db()
+        self.assertEqual((other.status, other.paid_amount), ('pending', 0))
+
+    def test_settled_receivables_still_take_returns_and_adjustments(self):
+        ReceivableTransaction.objects.create(
+            receivable=self.receivable, transaction_type='full_payment', amount=1000
+        )
+        ReceivableTransaction.objects.create(receivable=self.receivable, transaction_type='return', amount=100)
+        ReceivableTransaction.objects.create(receivable=self.receivable, transaction_type='adjustment', amount=5)
+        self.assertBalances(900, 100)
+
+        # Forms (the admin inlines) see the refusal as a field error
+        payment = ReceivableTransaction(receivable=self.receivable, transaction_type='partial_payment', amount=5)
+        with self.assertRaises(ValidationError) as raised:
+            payment.full_clean()
+        self.assertEqual(raised.exception.message_dict['transaction_type'], ['Already settled.'])
+
+    def test_moving_a_payment_onto_a_settled_receivable_is_refused(self):
+        other = AccountReceivable.objects.exclude(pk=self.receivable.pk).get()
+        ReceivableTransaction.objects.create(receivable=other, transaction_type='full_payment', amount=500)
+        payment = ReceivableTransaction.objects.create(
+            receivable=self.receivable, transaction_type='partial_payment', amount=300
+        )
+        response = self.client.patch(
+            f'/api/v1/accounts-receivable/receivables/transactions/{payment.pk}/', {'receivable': other.pk}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['transaction_type'], ['Already settled.'])
+        self.assertBalances(300, 700)
+
+        # Editing the rest of a posted payment is still allowed
+        response = self.client.patch(
+            f'/api/v1/accounts-receivable/receivables/transactions/{payment.pk}/', {'notes': 'Cheque 12'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_filters_on_payment_state(self):
+        ReceivableTransaction.objects.create(
+            receivable=self.receivable, transaction_type='partial_payment', amount=300
+        )
+        response = self.client.get(
+            '/api/v1/accounts-receivable/receivables/',
+            {'payment_state': 'partially_paid', 'ordering': '-remaining_amount'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data['results']], [self.receivable.pk])
+
+
+class ClientCreditLimitTestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='credit@example.com', password='testpassword')
+        self.client.force_authenticate(self.user)
+        self.limited = Client.objects.create(name="Limited Client", credit_limit=1000)
+        self.other = Client.objects.create(name="Roomy Client", credit_limit=10000)
+        self.bank = Bank.objects.create(name="Credit Bank", arabic_name="Credit Bank")
+        self.due_date = (datetime.date.today() + datetime.timedelta(days=30)).isoformat()
+        AccountReceivable.objects.create(
+            client=self.limited, bank=self.bank, amount=800, due_date=self.due_date, check_number='CHK'
+        )
+
+    def post_receivable(self, amount):
+        return self.client.post('/api/v1/accounts-receivable/receivables/', {
+            'client': self.limited.pk, 'bank': self.bank.pk, 'amount': amount,
+            'due_date': self.due_date, 'check_number': 'CHK2'
+        })
+
+    def test_over_limit_receivable_is_rejected(self):
+        response = self.post_receivable(300)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('amount', response.data)
+        self.assertEqual(self.post_receivable(200).status_code, status.HTTP_201_CREATED)
+
+    @override_settings(CREDIT_LIMIT_POLICY='flag')
+    def test_over_limit_receivable_is_flagged(self):
+        response = self.post_receivable(300)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data['over_credit_limit'])
+
+    def test_import_applies_running_exposure(self):
+        rows = [
+            {'client': self.limited.pk, 'bank': self.bank.pk, 'amount': amount,
+             'due_date': self.due_date, 'check_number': 'CHK'}
+            for amount in ('150', '100')
+        ]
+        result = import_receivables(rows)
+        self.assertEqual(result['created'], 1)
+        self.assertEqual([error['row'] for error in result['errors']], [2])
+
+    def pending_receivable(self, amount):
+        return AccountReceivable.objects.create(
+            client=self.limited, bank=self.bank, amount=amount, due_date=self.due_date,
+            check_number='CHK3', status='pending'
+        )
+
+    def test_activating_over_limit_receivable_is_rejected(self):
+        receivable = self.pending_receivable(300)
+        response = self.client.patch(
+            f'/api/v1/accounts-receivable/receivables/{receivable.pk}/', {'status': 'active'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('amount', response.data)
+        receivable.refresh_from_db()
+        self.assertEqual(receivable.status, 'pending')
+
+    def test_raising_amount_over_limit_is_rejected(self):
+        receivable = AccountReceivable.objects.get(client=self.limited, check_number='CHK')
+        receivable.amount = 1200
+        with self.assertRaises(CreditLimitExceeded):
+            receivable.save()
+        receivable.amount = 1000
+        receivable.save()
+
+    def test_bulk_activation_applies_running_exposure(self):
+        first, second = self.pending_receivable(150), self.pending_receivable(100)
+        response = self.client.post('/api/v1/accounts-receivable/receivables/transitions/', {
+            'transitions': [
+                {'id': first.pk, 'status': 'active'},
+                {'id': second.pk, 'status': 'active'},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['result'] for item in response.data['results']], ['applied', 'rejected'])
+        self.assertIn('Credit limit', response.data['results'][1]['detail'])
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'pending')
+        self.limited.refresh_from_db()
+        self.assertEqual(self.limited.outstanding_balance, 950)
+
+    def test_exposure_ranks_clients_by_utilization(self):
+        response = self.client.get('/api/v1/accounts-receivable/clients/exposure/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = response.data['results']
+        self.assertEqual([row['id'] for row in rows], [self.limited.pk, self.other.pk])
+        self.assertEqual(rows[0]['utilization'], '80.00')
+        self.assertEqual(rows[0]['available_credit'], '200.00')
+
+
+class ReceivableStatusTransitionTestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='transitions@example.com', password='testpassword')
+        self.client.force_authenticate(self.user)
+        self.customer = Client.objects.create(name="Transition Client")
+        bank = Bank.objects.create(name="Transition Bank", arabic_name="Transition Bank")
+        due_date = datetime.date.today() + datetime.timedelta(days=30)
+        self.first, self.second = [
+            AccountReceivable.objects.create(
+                client=self.customer, bank=bank, amount=100, due_date=due_date, check_number=f'CHK{index}'
+            )
+            for index in range(2)
+        ]
+
+    def test_bulk_transition_reports_each_item(self):
+        response = self.client.post('/api/v1/accounts-receivable/receivables/transitions/', {
+            'transitions': [
+                {'id': self.first.pk, 'status': 'treasury'},
+                {'id': self.second.pk, 'status': 'collected'},
+            ],
+            'note': 'Deposited',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['applied'], 1)
+        self.assertEqual([item['result'] for item in response.data['results']], ['applied', 'rejected'])
+
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.status, 'treasury')
+        history = self.first.status_history.get(to_status='treasury')
+        self.assertEqual((history.from_status, history.to_status), ('active', 'treasury'))
+        self.assertEqual(history.changed_by, self.user)
+        # A cheque in the treasury is still owed until it is collected
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.outstanding_balance, 200)
+
+
+class StatusDwellReportTestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.client.force_authenticate(User.objects.create_user(email='dwell@example.com', password='testpassword'))
+        customer = Client.objects.create(name="Dwell Client")
+        bank = Bank.objects.create(name="Dwell Bank", arabic_name="Dwell Bank")
+        due_date = datetime.date.today() + datetime.timedelta(days=30)
+        receivables = [
+            AccountReceivable.objects.create(
+                client=customer, bank=bank, amount=100, due_date=due_date, check_number=f'CHK{index}'
+            )
+            for index in range(4)
+        ]
+        deposited_at = timezone.now() + datetime.timedelta(days=1)
+        record_status_changes(
+            AccountReceivable, [(r.pk, 'active', 'treasury') for r in receivables], changed_at=deposited_at
+        )
+        for receivable, hours in zip(receivables, (1, 2, 3, 10)):
+            record_status_changes(
+                AccountReceivable, [(receivable.pk, 'treasury', 'collected')],
+                changed_at=deposited_at + datetime.timedelta(hours=hours)
+            )
+
+    def test_history_is_written_on_save(self):
+        receivable = AccountReceivable.objects.first()
+        self.assertEqual(
+            list(receivable.status_history.order_by('changed_at').values_list('to_status', flat=True)),
+            ['active', 'treasury', 'collected']
+        )
+
+    def test_median_and_p90_per_status(self):
+        response = self.client.get(
+            '/api/v1/accounts-receivable/reports/status-dwell/', {'status': 'treasury', 'group_by': 'bank'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [row] = response.data['results']
+        self.assertEqual(row['group_name'], "Dwell Bank")
+        self.assertEqual((row['count'], row['median_hours'], row['p90_hours']), (4, 2.0, 10.0))
+
+
+class CollectionForecastTestCase(APITestCase):
+    def setUp(self):
+        self.today = datetime.date.today()
+        bank = Bank.objects.create(name="Forecast Bank", arabic_name="Forecast Bank")
+        self.slow = Client.objects.create(name="Slow Payer")
+        self.new = Client.objects.create(name="New Client")
+        settled = AccountReceivable.objects.create(
+            client=self.slow, bank=bank, amount=100, check_number='OLD',
+            transaction_date=self.today - datetime.timedelta(days=60),
+            due_date=self.today + datetime.timedelta(days=1)
+        )
+        # The full payment settles it; then backdate the due date, which open receivables cannot have
+        ReceivableTransaction.objects.create(
+            receivable=settled, transaction_type='full_payment', amount=100,
+            transaction_date=self.today - datetime.timedelta(days=23)
+        )
+        AccountReceivable.objects.filter(pk=settled.pk).update(due_date=self.today - datetime.timedelta(days=30))
+        for client, amount, days in ((self.slow, 100, 10), (self.new, 50, 2), (self.slow, 30, 200)):
+            AccountReceivable.objects.create(
+                client=client, bank=bank, amount=amount, check_number='CHK',
+                due_date=self.today + datetime.timedelta(days=days)
+            )
+
+    def test_open_receivables_are_shifted_by_client_delay(self):
+        forecast = collection_forecast(self.today)
+        self.assertEqual(forecast['default_delay_days'], 7)
+        self.assertEqual(len(forecast['buckets']), 13)
+        # Due in 10 and 2 days, both expected a week late
+        self.assertEqual(forecast['buckets'][1]['expected_amount'], 50)
+        self.assertEqual(forecast['buckets'][2]['expected_amount'], 100)
+        self.assertEqual(forecast['total_expected'], 150)
+        self.assertEqual(forecast['beyond_horizon'], 30)
+
+    def test_daily_buckets(self):
+        forecast = collection_forecast(self.today, granularity='daily')
+        self.assertEqual(len(forecast['buckets']), 91)
+        self.assertEqual(forecast['buckets'][17]['count'], 1)
+
+    def test_rejected_receivables_are_not_expected(self):
+        bank = Bank.objects.get(name="Forecast Bank")
+        for rejected in ('client_rejected', 'treasury_rejected'):
+            AccountReceivable.objects.create(
+                client=self.new, bank=bank, amount=70, status=rejected, check_number='BOUNCED',
+                due_date=self.today + datetime.timedelta(days=2)
+            )
+        self.assertEqual(collection_forecast(self.today)['total_expected'], 150)
+
+    def test_forecast_endpoint_is_cached_for_the_day(self):
+        cache.clear()
+        User = get_user_model()
+        self.client.force_authenticate(User.objects.create_user(email='forecast@example.com', password='testpassword'))
+        url = '/api/v1/accounts-receivable/reports/collection-forecast/'
+        self.assertEqual(self.client.get(url).data['total_expected'], 150)
+        with self.assertNumQueries(1):
+            self.client.get(url)
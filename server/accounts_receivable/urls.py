@@ -8,10 +8,14 @@ urlpatterns = [
     
     # Client endpoints
     path('clients/', views.ClientListCreateView.as_view(), name='client-list-create'),
+    path('clients/exposure/', views.ClientExposureView.as_view(), name='client-exposure'),
     path('clients/<int:pk>/', views.ClientRetrieveUpdateDestroyView.as_view(), name='client-detail'),
     
     # Account Receivable endpoints
     path('receivables/', views.AccountReceivableListCreateView.as_view(), name='receivable-list-create'),
+    path('receivables/transitions/', views.AccountReceivableStatusTransitionView.as_view(), name='receivable-status-transitions'),
+    path('receivables/settlements/', views.AccountReceivableSettlementView.as_view(), name='receivable-settlements'),
+    path('receivables/import/', views.ReceivableImportView.as_view(), name='receivable-import'),
     path('receivables/<int:pk>/', views.AccountReceivableRetrieveUpdateDestroyView.as_view(), name='receivable-detail'),
     path('receivables/<int:receivable_id>/transactions/', views.ReceivableTransactionListCreateView.as_view(), name='receivable-transaction-list-create'),
     path('receivables/transactions/<int:pk>/', views.ReceivableTransactionRetrieveUpdateDestroyView.as_view(), name='receivable-transaction-detail'),
@@ -19,4 +23,7 @@ urlpatterns = [
     # Dashboard and reporting endpoints
     path('dashboard/summary/', views.DashboardSummaryView.as_view(), name='dashboard-summary'),
     path('reports/receivables/', views.ReceivablesReportView.as_view(), name='receivables-report'),
+    path('reports/aging/', views.AgingReportView.as_view(), name='aging-report'),
+    path('reports/collection-forecast/', views.CollectionForecastView.as_view(), name='collection-forecast'),
+    path('reports/status-dwell/', views.StatusDwellReportView.as_view(), name='status-dwell-report'),
 ]
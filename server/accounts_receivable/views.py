@@ -1,14 +1,37 @@
-from django.db.models import Sum, Count
+from django.db.models import Sum, Count, DecimalField, ExpressionWrapper, F
 from django.utils import timezone
-from rest_framework import generics, permissions, status, filters
+from rest_framework import generics, permissions, status, filters, serializers
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Bank, Client, AccountReceivable, ReceivableTransaction
+from finance_system.exports import export_response
+from finance_system.pagination import attach_detail
+from search_index.filters import IndexedSearchFilter
+from finance_system.loading import LoadingProfile, LoadingProfileMixin
+from finance_system.rollups import status_rollup, get_cached, with_labels
+from finance_system.settlements import SettlementView
+from finance_system.transitions import bulk_transition
+from finance_system.dwell import dwell_statistics
+from .models import (
+    Bank, Client, AccountReceivable, ReceivableTransaction, ReceivableStatusHistory, CreditLimitExceeded
+)
 from .serializers import (
     BankSerializer, ClientSerializer, AccountReceivableSerializer,
     ReceivableTransactionSerializer, DashboardSummarySerializer,
-    ReceivablesReportSerializer
+    ReceivablesReportSerializer, AgingReportSerializer, ReceivableImportSerializer,
+    ClientExposureSerializer, BulkStatusTransitionSerializer, StatusDwellReportSerializer,
+    CollectionForecastSerializer
+)
+from .aging import aging_report
+from .forecast import cached_collection_forecast
+from .importers import import_receivables
+from .filters import AccountReceivableFilter
+from .signals import DASHBOARD_CACHE_KEY, DASHBOARD_CACHE_TIMEOUT
+
+
+RECEIVABLE_LOADING_PROFILE = LoadingProfile(
+    select_related=('bank', 'client'),
+    prefetch_related=('transactions',),
 )
 
 
@@ -32,15 +55,20 @@ class BankRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
 
 # Client views
-class ClientListCreateView(generics.ListCreateAPIView):
+class ClientListCreateView(LoadingProfileMixin, generics.ListCreateAPIView):
     """API view to retrieve list of clients or create new client."""
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['is_active']
-    search_fields = ['name', 'arabic_name', 'phone', 'email', 'tax_number']
-    ordering_fields = ['name', 'created_at']
+    # The serializer reads only client columns, so there is nothing to eager-load
+    query_budget = 2
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
+    filterset_fields = {
+        'is_active': ['exact'],
+        'outstanding_balance': ['gte', 'lte'],
+    }
+    search_index_kind = 'client'
+    ordering_fields = ['name', 'created_at', 'outstanding_balance']
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -53,26 +81,59 @@ class ClientRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
 
+class ClientExposureView(generics.ListAPIView):
+    """API view to rank clients with a credit limit by utilization of that limit."""
+    serializer_class = ClientExposureSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['is_active']
+    
+    def get_queryset(self):
+        # Reads the maintained balance only; receivables are never aggregated here
+        queryset = Client.objects.filter(credit_limit__gt=0).annotate(
+            utilization=ExpressionWrapper(
+                F('outstanding_balance') * 100 / F('credit_limit'),
+                output_field=DecimalField(max_digits=14, decimal_places=2)
+            ),
+            available_credit=F('credit_limit') - F('outstanding_balance')
+        )
+        if self.request.query_params.get('over_limit') in ('true', '1'):
+            queryset = queryset.filter(outstanding_balance__gt=F('credit_limit'))
+        return queryset.order_by('-utilization', 'name')
+
+
 # Account Receivable views
-class AccountReceivableListCreateView(generics.ListCreateAPIView):
+class AccountReceivableListCreateView(LoadingProfileMixin, generics.ListCreateAPIView):
     """API view to retrieve list of account receivables or create new account receivable."""
     queryset = AccountReceivable.objects.all()
     serializer_class = AccountReceivableSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['status', 'bank', 'client', 'transaction_date']
-    search_fields = ['receipt_number', 'check_number', 'client__name', 'notes']
-    ordering_fields = ['transaction_date', 'due_date', 'amount', 'created_at']
+    loading_profile = RECEIVABLE_LOADING_PROFILE
+    query_budget = 5
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
+    filterset_class = AccountReceivableFilter
+    search_index_kind = 'receivable'
+    ordering_fields = ['transaction_date', 'due_date', 'amount', 'paid_amount', 'remaining_amount', 'created_at']
     
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        try:
+            serializer.save(created_by=self.request.user)
+        except CreditLimitExceeded as exc:
+            raise serializers.ValidationError({'amount': [str(exc)]})
 
 
-class AccountReceivableRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class AccountReceivableRetrieveUpdateDestroyView(LoadingProfileMixin, generics.RetrieveUpdateDestroyAPIView):
     """API view to retrieve, update or delete account receivable."""
     queryset = AccountReceivable.objects.all()
     serializer_class = AccountReceivableSerializer
     permission_classes = [permissions.IsAuthenticated]
+    loading_profile = RECEIVABLE_LOADING_PROFILE
+    
+    def perform_update(self, serializer):
+        try:
+            serializer.save()
+        except CreditLimitExceeded as exc:
+            raise serializers.ValidationError({'amount': [str(exc)]})
 
 
 # Receivable Transaction views
@@ -99,40 +160,103 @@ class ReceivableTransactionRetrieveUpdateDestroyView(generics.RetrieveUpdateDest
 
 
 # Dashboard and reporting views
+class ReceivableImportView(APIView):
+    """API view to bulk import receivables from a CSV/JSON file or a list of rows."""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = ReceivableImportSerializer(data=request.data)
+        if serializer.is_valid():
+            result = import_receivables(
+                serializer.validated_data['rows'],
+                user=request.user,
+                dry_run=serializer.validated_data['dry_run']
+            )
+            if result['failed'] and not result['created'] and not serializer.validated_data['dry_run']:
+                return Response(result, status=status.HTTP_400_BAD_REQUEST)
+            return Response(result, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AccountReceivableStatusTransitionView(APIView):
+    """API view to move many receivables between statuses in one request."""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = BulkStatusTransitionSerializer(data=request.data)
+        if serializer.is_valid():
+            results = bulk_transition(
+                AccountReceivable,
+                [(item['id'], item['status']) for item in serializer.validated_data['transitions']],
+                user=request.user,
+                note=serializer.validated_data['note']
+            )
+            return Response({
+                'applied': sum(1 for result in results if result['result'] == 'applied'),
+                'rejected': sum(1 for result in results if result['result'] == 'rejected'),
+                'results': results,
+            })
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AccountReceivableSettlementView(SettlementView):
+    """API view to post a batch of payments against receivables in one transaction."""
+    model = AccountReceivable
+
+
 class DashboardSummaryView(APIView):
-    """API view to retrieve summary data for dashboard."""
+    """
+    API view to retrieve summary data for dashboard.
+    
+    The payload is cached until the next receivable, transaction or client
+    write, and at most for a few minutes.
+    """
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        # Get summary data
-        total_receivables = AccountReceivable.objects.aggregate(total=Sum('amount'))['total'] or 0
-        active_receivables = AccountReceivable.objects.filter(status='active').aggregate(total=Sum('amount'))['total'] or 0
-        completed_receivables = AccountReceivable.objects.filter(status='completed').aggregate(total=Sum('amount'))['total'] or 0
-        overdue_receivables = AccountReceivable.objects.filter(status='overdue').aggregate(total=Sum('amount'))['total'] or 0
-        pending_receivables = AccountReceivable.objects.filter(status='pending').aggregate(total=Sum('amount'))['total'] or 0
-        total_clients = Client.objects.count()
+        data = get_cached(DASHBOARD_CACHE_KEY, self.build_summary, DASHBOARD_CACHE_TIMEOUT)
+        return Response(dict(data, by_status=with_labels(data['by_status'], AccountReceivable.STATUS_CHOICES)))
+    
+    def build_summary(self):
+        # Count and sum every status in a single conditional-aggregation pass
+        rollup = status_rollup(AccountReceivable.objects.all(), AccountReceivable.STATUS_CHOICES)
+        totals = {item['status']: item['total'] for item in rollup['by_status']}
         
         # Get recent transactions
         recent_transactions = ReceivableTransaction.objects.order_by('-created_at')[:10]
         
         # Prepare data for serializer
         data = {
-            'total_receivables': total_receivables,
-            'active_receivables': active_receivables,
-            'completed_receivables': completed_receivables,
-            'overdue_receivables': overdue_receivables,
-            'pending_receivables': pending_receivables,
-            'total_clients': total_clients,
+            'total_receivables': rollup['total_amount'],
+            'total_count': rollup['total_count'],
+            'active_receivables': totals['active'],
+            'completed_receivables': totals['completed'],
+            'overdue_receivables': totals['overdue'],
+            'pending_receivables': totals['pending'],
+            'by_status': rollup['by_status'],
+            'total_clients': Client.objects.count(),
             'recent_transactions': recent_transactions
         }
         
-        serializer = DashboardSummarySerializer(data)
-        return Response(serializer.data)
+        return DashboardSummarySerializer(data).data
 
 
 class ReceivablesReportView(APIView):
-    """API view to generate reports for receivables."""
+    """API view to generate reports for receivables, or stream them as CSV/XLSX."""
     permission_classes = [permissions.IsAuthenticated]
+    export_columns = [
+        ('Receipt Number', 'receipt_number'),
+        ('Client', 'client__name'),
+        ('Bank', 'bank__name'),
+        ('Check Number', 'check_number'),
+        ('Transaction Date', 'transaction_date'),
+        ('Due Date', 'due_date'),
+        ('Amount', 'amount'),
+        ('Paid Amount', 'paid_amount'),
+        ('Remaining Amount', 'remaining_amount'),
+        ('Status', 'status'),
+        ('Notes', 'notes'),
+    ]
     
     def post(self, request):
         serializer = ReceivablesReportSerializer(data=request.data)
@@ -142,6 +266,7 @@ class ReceivablesReportView(APIView):
             status_filter = serializer.validated_data.get('status')
             client_filter = serializer.validated_data.get('client')
             bank_filter = serializer.validated_data.get('bank')
+            payment_state = serializer.validated_data.get('payment_state')
             
             # Base queryset
             queryset = AccountReceivable.objects.filter(
@@ -156,11 +281,18 @@ class ReceivablesReportView(APIView):
                 queryset = queryset.filter(client_id=client_filter)
             if bank_filter:
                 queryset = queryset.filter(bank_id=bank_filter)
+            if payment_state:
+                queryset = queryset.filter(AccountReceivable.payment_state_q(payment_state))
+            
+            export_format = serializer.validated_data.get('export')
+            if export_format:
+                return export_response(export_format, 'receivables', self.export_columns, queryset)
             
             # Generate report data
             report_data = {
                 'total_count': queryset.count(),
                 'total_amount': queryset.aggregate(total=Sum('amount'))['total'] or 0,
+                'total_remaining': queryset.aggregate(total=Sum('remaining_amount'))['total'] or 0,
                 'by_status': queryset.values('status').annotate(
                     count=Count('id'),
                     total=Sum('amount')
@@ -172,9 +304,72 @@ class ReceivablesReportView(APIView):
                 'by_bank': queryset.values('bank__name').annotate(
                     count=Count('id'),
                     total=Sum('amount')
-                ),
-                'receivables': AccountReceivableSerializer(queryset, many=True).data
+                )
             }
+            attach_detail(
+                report_data, 'receivables', RECEIVABLE_LOADING_PROFILE.apply(queryset),
+                serializer.validated_data, AccountReceivableSerializer,
+                keyset=serializer.detail_keyset
+            )
             
             return Response(report_data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AgingReportView(APIView):
+    """API view to retrieve the receivables aging by client or bank."""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        serializer = AgingReportSerializer(data=request.query_params)
+        if serializer.is_valid():
+            return Response(aging_report(
+                serializer.validated_data.get('as_of'),
+                serializer.validated_data['group_by']
+            ))
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+
+class CollectionForecastView(APIView):
+    """API view to retrieve expected collections over the next 13 weeks."""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        serializer = CollectionForecastSerializer(data=request.query_params)
+        if serializer.is_valid():
+            return Response(cached_collection_forecast(serializer.validated_data['granularity']))
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class StatusDwellReportView(APIView):
+    """API view reporting median and p90 time spent in each receivable status."""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    # group_by value -> (history field to group on, field naming the group)
+    group_fields = {
+        'status': (None, None),
+        'client': ('receivable__client', 'receivable__client__name'),
+        'bank': ('receivable__bank', 'receivable__bank__name'),
+    }
+    
+    def get(self, request):
+        serializer = StatusDwellReportSerializer(data=request.query_params)
+        if serializer.is_valid():
+            data = serializer.validated_data
+            history = ReceivableStatusHistory.objects.all()
+            if data.get('status'):
+                history = history.filter(to_status=data['status'])
+            if data.get('start_date'):
+                history = history.filter(changed_at__date__gte=data['start_date'])
+            if data.get('end_date'):
+                history = history.filter(changed_at__date__lte=data['end_date'])
+            
+            group_field, label_field = self.group_fields[data['group_by']]
+            return Response({
+                'group_by': data['group_by'],
+                'results': dwell_statistics(
+                    history, group_field, label_field, include_open=data['include_open']
+                ),
+            })
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
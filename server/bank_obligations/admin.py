@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
-from .models import BankObligation, ObligationPayment
+from .models import BankObligation, ObligationPayment, ObligationInstallment
 
 
 class ObligationPaymentInline(admin.TabularInline):
@@ -13,12 +13,23 @@ class ObligationPaymentInline(admin.TabularInline):
     max_num = 10
 
 
+class ObligationInstallmentInline(admin.TabularInline):
+    model = ObligationInstallment
+    extra = 0
+    fields = ('installment_number', 'due_date', 'principal', 'interest', 'amount', 'paid_amount', 'status')
+    readonly_fields = fields
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(BankObligation)
 class BankObligationAdmin(admin.ModelAdmin):
     list_display = ('obligation_number', 'obligation_type', 'bank', 'principal_amount', 
                    'interest_rate', 'payment_frequency', 'start_date', 'end_date', 
                    'remaining_balance', 'progress_percentage', 'is_active')
-    list_filter = ('obligation_type', 'payment_frequency', 'is_active', 'bank')
+    list_filter = ('obligation_type', 'payment_frequency', 'amortization_method', 'is_active', 'bank')
     search_fields = ('obligation_number', 'bank__name', 'account_number', 'notes')
     readonly_fields = ('obligation_number', 'created_by', 'created_at', 'updated_at', 
                        'remaining_balance', 'progress_percentage', 'next_payment_date')
@@ -28,14 +39,14 @@ class BankObligationAdmin(admin.ModelAdmin):
         (_('Bank Details'), {'fields': ('bank', 'branch', 'account_number')}),
         (_('Financial Details'), {
             'fields': ('principal_amount', 'interest_rate', 'payment_frequency', 
-                      'payment_amount', 'total_payments', 'remaining_balance', 
+                      'amortization_method', 'payment_amount', 'total_payments', 'remaining_balance', 
                       'progress_percentage')
         }),
         (_('Schedule'), {'fields': ('start_date', 'end_date', 'next_payment_date')}),
         (_('Additional Information'), {'fields': ('purpose', 'collateral', 'guarantors', 'notes')}),
         (_('System Information'), {'fields': ('created_by', 'created_at', 'updated_at')}),
     )
-    inlines = [ObligationPaymentInline]
+    inlines = [ObligationInstallmentInline, ObligationPaymentInline]
     
     def save_model(self, request, obj, form, change):
         if not change:  # Only set created_by when creating a new object
@@ -0,0 +1,174 @@
+"""
+Amortization schedules for bank obligations.
+
+Schedules for any number of obligations are built together: the inputs
+become NumPy arrays (one element per obligation) and the engine steps
+through the periods once, updating every obligation with array operations.
+All amounts are whole cents in int64. Interest is rounded half up to the
+cent each period on the rounded balance, and the final installment pays off
+whatever principal is left, so every schedule repays the principal exactly.
+"""
+from decimal import Decimal
+
+import numpy as np
+
+
+# Methods, in the order of their array codes
+AMORTIZATION_METHODS = ('annuity', 'equal_principal', 'interest_only', 'lump_sum')
+ANNUITY, EQUAL_PRINCIPAL, INTEREST_ONLY, LUMP_SUM = range(len(AMORTIZATION_METHODS))
+
+# Months between installments for each payment frequency
+FREQUENCY_MONTHS = {
+    'monthly': 1,
+    'quarterly': 3,
+    'semi_annually': 6,
+    'annually': 12,
+}
+DAYS_PER_YEAR = 365
+
+
+def installment_dates(start_dates, step_months, width):
+    """
+    Dates of the first ``width`` installments after each start date, every
+    ``step_months`` months, as a ``datetime64[D]`` array of shape
+    (obligations, width). Days past the end of a month fall on its last day.
+    """
+    start_months = start_dates.astype('datetime64[M]')
+    days = (start_dates - start_months.astype('datetime64[D]')).astype(np.int64)
+    offsets = step_months[:, None] * np.arange(1, width + 1)
+    months = start_months[:, None] + offsets.astype('timedelta64[M]')
+    month_starts = months.astype('datetime64[D]')
+    month_lengths = ((months + 1).astype('datetime64[D]') - month_starts).astype(np.int64)
+    return month_starts + np.minimum(days[:, None], month_lengths - 1).astype('timedelta64[D]')
+
+
+def round_cents(values):
+    """Round non-negative cent amounts half up to whole cents."""
+    return np.floor(np.asarray(values, dtype=np.float64) + 0.5).astype(np.int64)
+
+
+def level_payments(principal, rates, periods):
+    """Rounded level (annuity) installment that repays ``principal`` over ``periods``."""
+    periods = np.maximum(periods, 1)
+    safe_rates = np.where(rates > 0, rates, 1.0)
+    with np.errstate(over='ignore', invalid='ignore'):
+        annuity = principal * safe_rates / (1 - (1 + safe_rates) ** -periods.astype(np.float64))
+    return round_cents(np.where(rates > 0, annuity, principal / periods))
+
+
+def amortize(principal, rates, periods, methods):
+    """
+    Amortize obligations given as arrays of principal (cents), rate per
+    period, number of periods and method code.
+
+    Returns ``(principal_paid, interest, balance)`` cent arrays of shape
+    (obligations, max periods); entries past an obligation's last period
+    are zero.
+    """
+    count = len(principal)
+    width = int(periods.max()) if count else 0
+    principal_paid = np.zeros((count, width), dtype=np.int64)
+    interest = np.zeros((count, width), dtype=np.int64)
+    balances = np.zeros((count, width), dtype=np.int64)
+
+    level = level_payments(principal, rates, periods)
+    straight = round_cents(principal / np.maximum(periods, 1))
+    balance = principal.copy()
+    for period in range(width):
+        active = period < periods
+        due = np.where(active, round_cents(balance * rates), 0)
+        scheduled = np.select(
+            [methods == ANNUITY, methods == EQUAL_PRINCIPAL],
+            [level - due, straight],
+            default=0
+        )
+        # The last installment pays off the rest, absorbing every rounding difference
+        paid = np.where(period == periods - 1, balance, np.clip(scheduled, 0, balance))
+        paid = np.where(active, paid, 0)
+        balance = balance - paid
+        principal_paid[:, period] = paid
+        interest[:, period] = due
+        balances[:, period] = balance
+    return principal_paid, interest, balances
+
+
+def schedule_terms(obligation):
+    """
+    Engine inputs for one obligation: ``(principal cents, rate per period,
+    periods, method code, months per period, start date, lump-sum date)``.
+    """
+    start_date = obligation.start_date or obligation.created_at.date()
+    annual_rate = float(obligation.interest_rate) / 100
+    principal = int(obligation.principal_amount * 100)
+    method = AMORTIZATION_METHODS.index(obligation.amortization_method)
+    step = FREQUENCY_MONTHS.get(obligation.payment_frequency)
+    if method == LUMP_SUM or step is None:
+        # One payment at maturity with simple interest for the whole term
+        end_date = obligation.end_date or start_date
+        rate = annual_rate * max((end_date - start_date).days, 0) / DAYS_PER_YEAR
+        return principal, rate, 1, LUMP_SUM, 0, start_date, end_date
+    return principal, annual_rate * step / 12, max(obligation.total_payments, 1), method, step, start_date, None
+
+
+def schedule_arrays(obligations):
+    """
+    Schedule arrays for ``obligations`` (a list): ``(dates, principal_paid,
+    interest, balances, periods)``, one row per obligation.
+    """
+    principal, rates, periods, methods, steps, starts, maturities = zip(
+        *(schedule_terms(obligation) for obligation in obligations)
+    ) if obligations else ((),) * 7
+    periods = np.array(periods, dtype=np.int64)
+    principal_paid, interest, balances = amortize(
+        np.array(principal, dtype=np.int64), np.array(rates, dtype=np.float64),
+        periods, np.array(methods, dtype=np.int64)
+    )
+    dates = installment_dates(
+        np.array(starts, dtype='datetime64[D]'), np.array(steps, dtype=np.int64), principal_paid.shape[1]
+    )
+    for row, maturity in enumerate(maturities):
+        if maturity is not None:
+            dates[row, 0] = np.datetime64(maturity, 'D')
+    return dates, principal_paid, interest, balances, periods
+
+
+def build_schedules(obligations):
+    """
+    Return obligation id -> list of installment dicts (``payment_number``,
+    ``payment_date``, ``payment_amount``, ``principal_portion``,
+    ``interest_portion``, ``remaining_balance``) for ``obligations``.
+    """
+    obligations = list(obligations)
+    dates, principal_paid, interest, balances, periods = schedule_arrays(obligations)
+    schedules = {}
+    for row, obligation in enumerate(obligations):
+        count = periods[row]
+        schedules[obligation.pk] = [
+            {
+                'payment_number': number + 1,
+                'payment_date': date,
+                'payment_amount': _amount(paid + due),
+                'principal_portion': _amount(paid),
+                'interest_portion': _amount(due),
+                'remaining_balance': _amount(balance),
+            }
+            for number, (date, paid, due, balance) in enumerate(zip(
+                dates[row, :count].tolist(), principal_paid[row, :count].tolist(),
+                interest[row, :count].tolist(), balances[row, :count].tolist()
+            ))
+        ]
+    return schedules
+
+
+def allocate_paid(amounts, paid):
+    """
+    Spread ``paid`` cents over installments of ``amounts`` cents in order:
+    each installment takes what is left after the earlier ones are covered.
+    """
+    amounts = np.asarray(amounts, dtype=np.int64)
+    covered_before = np.cumsum(amounts) - amounts
+    return np.clip(paid - covered_before, 0, amounts)
+
+
+def _amount(cents):
+    return Decimal(int(cents)) / 100
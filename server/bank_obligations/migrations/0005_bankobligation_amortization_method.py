@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank_obligations', '0004_bank'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankobligation',
+            name='amortization_method',
+            field=models.CharField(choices=[('annuity', 'Annuity (Level Payments)'), ('equal_principal', 'Equal Principal'), ('interest_only', 'Interest Only / Balloon'), ('lump_sum', 'Lump Sum')], default='annuity', max_length=20, verbose_name='amortization method'),
+        ),
+    ]
@@ -0,0 +1,169 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:38
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+import numpy as np
+
+
+# A frozen copy of bank_obligations.amortization as of this migration, so
+# later changes to the engine cannot alter what this migration generates
+AMORTIZATION_METHODS = ('annuity', 'equal_principal', 'interest_only', 'lump_sum')
+ANNUITY, EQUAL_PRINCIPAL, INTEREST_ONLY, LUMP_SUM = range(len(AMORTIZATION_METHODS))
+FREQUENCY_MONTHS = {'monthly': 1, 'quarterly': 3, 'semi_annually': 6, 'annually': 12}
+DAYS_PER_YEAR = 365
+
+
+def installment_dates(start_dates, step_months, width):
+    start_months = start_dates.astype('datetime64[M]')
+    days = (start_dates - start_months.astype('datetime64[D]')).astype(np.int64)
+    offsets = step_months[:, None] * np.arange(1, width + 1)
+    months = start_months[:, None] + offsets.astype('timedelta64[M]')
+    month_starts = months.astype('datetime64[D]')
+    month_lengths = ((months + 1).astype('datetime64[D]') - month_starts).astype(np.int64)
+    return month_starts + np.minimum(days[:, None], month_lengths - 1).astype('timedelta64[D]')
+
+
+def round_cents(values):
+    return np.floor(np.asarray(values, dtype=np.float64) + 0.5).astype(np.int64)
+
+
+def amortize(principal, rates, periods, methods):
+    count = len(principal)
+    width = int(periods.max()) if count else 0
+    principal_paid = np.zeros((count, width), dtype=np.int64)
+    interest = np.zeros((count, width), dtype=np.int64)
+    balances = np.zeros((count, width), dtype=np.int64)
+
+    safe_periods = np.maximum(periods, 1)
+    safe_rates = np.where(rates > 0, rates, 1.0)
+    with np.errstate(over='ignore', invalid='ignore'):
+        annuity = principal * safe_rates / (1 - (1 + safe_rates) ** -safe_periods.astype(np.float64))
+    level = round_cents(np.where(rates > 0, annuity, principal / safe_periods))
+    straight = round_cents(principal / safe_periods)
+    balance = principal.copy()
+    for period in range(width):
+        active = period < periods
+        due = np.where(active, round_cents(balance * rates), 0)
+        scheduled = np.select(
+            [methods == ANNUITY, methods == EQUAL_PRINCIPAL],
+            [level - due, straight],
+            default=0
+        )
+        paid = np.where(period == periods - 1, balance, np.clip(scheduled, 0, balance))
+        paid = np.where(active, paid, 0)
+        balance = balance - paid
+        principal_paid[:, period] = paid
+        interest[:, period] = due
+        balances[:, period] = balance
+    return principal_paid, interest, balances
+
+
+def schedule_terms(obligation):
+    start_date = obligation.start_date or obligation.created_at.date()
+    annual_rate = float(obligation.interest_rate) / 100
+    principal = int(obligation.principal_amount * 100)
+    method = AMORTIZATION_METHODS.index(obligation.amortization_method)
+    step = FREQUENCY_MONTHS.get(obligation.payment_frequency)
+    if method == LUMP_SUM or step is None:
+        end_date = obligation.end_date or start_date
+        rate = annual_rate * max((end_date - start_date).days, 0) / DAYS_PER_YEAR
+        return principal, rate, 1, LUMP_SUM, 0, start_date, end_date
+    return principal, annual_rate * step / 12, max(obligation.total_payments, 1), method, step, start_date, None
+
+
+def build_schedules(obligations):
+    """Obligation id -> list of ``(number, date, principal, interest, balance)`` cent rows."""
+    obligations = list(obligations)
+    if not obligations:
+        return {}
+    principal, rates, periods, methods, steps, starts, maturities = zip(
+        *(schedule_terms(obligation) for obligation in obligations)
+    )
+    periods = np.array(periods, dtype=np.int64)
+    principal_paid, interest, balances = amortize(
+        np.array(principal, dtype=np.int64), np.array(rates, dtype=np.float64),
+        periods, np.array(methods, dtype=np.int64)
+    )
+    dates = installment_dates(
+        np.array(starts, dtype='datetime64[D]'), np.array(steps, dtype=np.int64), principal_paid.shape[1]
+    )
+    for row, maturity in enumerate(maturities):
+        if maturity is not None:
+            dates[row, 0] = np.datetime64(maturity, 'D')
+    return {
+        obligation.pk: list(zip(
+            range(1, periods[row] + 1), dates[row, :periods[row]].tolist(),
+            principal_paid[row, :periods[row]].tolist(), interest[row, :periods[row]].tolist(),
+            balances[row, :periods[row]].tolist()
+        ))
+        for row, obligation in enumerate(obligations)
+    }
+
+
+def generate_installments(apps, schema_editor):
+    """Store the schedule of every existing obligation with its payments applied."""
+    BankObligation = apps.get_model('bank_obligations', 'BankObligation')
+    ObligationPayment = apps.get_model('bank_obligations', 'ObligationPayment')
+    ObligationInstallment = apps.get_model('bank_obligations', 'ObligationInstallment')
+    paid = dict(
+        ObligationPayment.objects.values('obligation_id').annotate(total=Sum('amount')).values_list('obligation_id', 'total')
+    )
+    installments = []
+    for obligation_id, rows in build_schedules(BankObligation.objects.all()).items():
+        # Payments cover the installments in order
+        unallocated = int(paid.get(obligation_id, 0) * 100)
+        for number, due_date, principal, interest, balance in rows:
+            amount = principal + interest
+            paid_cents = min(max(unallocated, 0), amount)
+            unallocated -= amount
+            installments.append(ObligationInstallment(
+                obligation_id=obligation_id,
+                installment_number=number,
+                due_date=due_date,
+                principal=Decimal(principal) / 100,
+                interest=Decimal(interest) / 100,
+                amount=Decimal(amount) / 100,
+                remaining_balance=Decimal(balance) / 100,
+                paid_amount=Decimal(paid_cents) / 100,
+                status='paid' if paid_cents >= amount else 'partially_paid' if paid_cents else 'pending',
+            ))
+    ObligationInstallment.objects.bulk_create(installments, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank_obligations', '0005_bankobligation_amortization_method'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ObligationInstallment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('installment_number', models.PositiveIntegerField(verbose_name='installment number')),
+                ('due_date', models.DateField(db_index=True, verbose_name='due date')),
+                ('principal', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='principal')),
+                ('interest', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='interest')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='amount')),
+                ('remaining_balance', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='remaining balance')),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='paid amount')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('partially_paid', 'Partially Paid'), ('paid', 'Paid')], default='pending', max_length=20, verbose_name='status')),
+                ('obligation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installments', to='bank_obligations.bankobligation', verbose_name='obligation')),
+            ],
+            options={
+                'verbose_name': 'obligation installment',
+                'verbose_name_plural': 'obligation installments',
+                'ordering': ['obligation', 'installment_number'],
+                'indexes': [models.Index(fields=['status', 'due_date'], name='bank_obliga_status_281a49_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='obligationinstallment',
+            constraint=models.UniqueConstraint(fields=('obligation', 'installment_number'), name='unique_obligation_installment'),
+        ),
+        migrations.RunPython(generate_installments, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,13 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from django.conf import settings
-import datetime
+from document_numbers.models import DocumentSequence, last_issued_seed
+from .amortization import allocate_paid, build_schedules
+from decimal import Decimal
 
 
 class Bank(models.Model):
@@ -43,25 +47,24 @@ class BankObligation(models.Model):
         ('lump_sum', _('Lump Sum')),
     )
     
+    AMORTIZATION_METHODS = (
+        ('annuity', _('Annuity (Level Payments)')),
+        ('equal_principal', _('Equal Principal')),
+        ('interest_only', _('Interest Only / Balloon')),
+        ('lump_sum', _('Lump Sum')),
+    )
+    
+    # Fields the installment schedule is generated from
+    TERM_FIELDS = (
+        'principal_amount', 'interest_rate', 'payment_frequency', 'amortization_method',
+        'total_payments', 'start_date', 'end_date',
+    )
+    
     # Auto-generate obligation number
     def generate_obligation_number():
-        today = datetime.date.today()
-        year = today.year
-        last_obligation = BankObligation.objects.filter(
-            created_at__year=year
-        ).order_by('-obligation_number').first()
-        
-        if last_obligation and last_obligation.obligation_number:
-            try:
-                # Extract the numeric part of the obligation number
-                last_number = int(last_obligation.obligation_number.split('-')[-1])
-                new_number = last_number + 1
-            except (ValueError, IndexError):
-                new_number = 1
-        else:
-            new_number = 1
-        
-        return f"BO-{year}-{new_number:05d}"
+        return DocumentSequence.objects.next_number(
+            'BO', seed=last_issued_seed(BankObligation, 'obligation_number')
+        )
     
     obligation_type = models.CharField(
         _('obligation type'),
@@ -103,6 +106,12 @@ class BankObligation(models.Model):
         choices=PAYMENT_FREQUENCY,
         default='monthly'
     )
+    amortization_method = models.CharField(
+        _('amortization method'),
+        max_length=20,
+        choices=AMORTIZATION_METHODS,
+        default='annuity'
+    )
     payment_amount = models.DecimalField(
         _('payment amount'),
         max_digits=14,
@@ -155,73 +164,55 @@ class BankObligation(models.Model):
     
     def save(self, *args, **kwargs):
         self.clean()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if getattr(self, '_original_terms', None) != self.terms():
+                ObligationInstallment.generate([self.pk])
+                self._original_terms = self.terms()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the terms the stored installments were generated from
+        if set(cls.TERM_FIELDS).issubset(field_names):
+            instance._original_terms = instance.terms()
+        return instance
+    
+    def terms(self):
+        return tuple(getattr(self, field) for field in self.TERM_FIELDS)
+    
+    def get_paid_amount(self):
+        """Return the total paid so far, preferring the list-view annotation."""
+        if hasattr(self, 'paid_total'):
+            return self.paid_total or 0
+        return self.payments.aggregate(
+            total=models.Sum('amount')
+        )['total'] or 0
     
     @property
     def remaining_balance(self):
         """Calculate the remaining balance of the obligation."""
-        paid_amount = self.payments.aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
-        return self.principal_amount - paid_amount
+        return self.principal_amount - self.get_paid_amount()
     
     @property
     def progress_percentage(self):
         """Calculate the percentage of the obligation that has been paid."""
         if self.principal_amount == 0:
             return 0
-        paid_amount = self.payments.aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
-        return min(100, (paid_amount / self.principal_amount) * 100)
+        return min(100, (self.get_paid_amount() / self.principal_amount) * 100)
     
     @property
     def next_payment_date(self):
-        """Calculate the next payment date based on the payment schedule."""
-        today = datetime.date.today()
-        
-        # If obligation is completed or not started yet
-        if not self.is_active or today < self.start_date:
+        """Due date of the first installment not yet fully paid."""
+        if not self.is_active:
             return None
         
-        # If obligation has ended
-        if today > self.end_date:
-            return None
-        
-        # Get the last payment date
-        last_payment = self.payments.order_by('-payment_date').first()
-        
-        if not last_payment:
-            return self.start_date
-        
-        # Calculate next payment date based on frequency
-        last_date = last_payment.payment_date
-        
-        def add_months(date, months):
-            """Helper function to add months to a date while handling month/year overflow"""
-            year = date.year + (date.month + months - 1) // 12
-            month = (date.month + months - 1) % 12 + 1
-            # Handle the case where the day might not exist in the target month
-            day = min(date.day, [31, 29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28,
-                               31, 30, 31, 30, 31, 31, 30, 31, 30, 31][month-1])
-            return datetime.date(year, month, day)
-        
-        if self.payment_frequency == 'monthly':
-            next_date = add_months(last_date, 1)
-        elif self.payment_frequency == 'quarterly':
-            next_date = add_months(last_date, 3)
-        elif self.payment_frequency == 'semi_annually':
-            next_date = add_months(last_date, 6)
-        elif self.payment_frequency == 'annually':
-            next_date = add_months(last_date, 12)
-        else:  # lump_sum
-            next_date = self.end_date
-        
-        # If next payment date is after end date, return end date
-        if next_date > self.end_date:
-            return self.end_date
-        
-        return next_date
+        # Annotated on list views
+        if hasattr(self, 'next_installment_date'):
+            return self.next_installment_date
+        return self.installments.exclude(status='paid').order_by(
+            'installment_number'
+        ).values_list('due_date', flat=True).first()
 
 
 class ObligationPayment(models.Model):
@@ -275,4 +266,127 @@ class ObligationPayment(models.Model):
         if self.principal_portion + self.interest_portion != self.amount:
             raise ValueError(_('Principal portion plus interest portion must equal the total amount'))
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # A payment moved to another obligation is taken off the old one too
+            ObligationInstallment.reconcile(
+                {self.obligation_id, getattr(self, '_original_obligation_id', self.obligation_id)}
+            )
+            self._original_obligation_id = self.obligation_id
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'obligation_id' in field_names:
+            instance._original_obligation_id = instance.obligation_id
+        return instance
+
+
+@receiver(post_delete, sender=ObligationPayment)
+def release_installment_payment(sender, instance, **kwargs):
+    """Take a deleted payment back off its obligation's installments."""
+    ObligationInstallment.reconcile([instance.obligation_id])
+
+
+class ObligationInstallment(models.Model):
+    """One expected payment of a bank obligation's schedule."""
+    
+    STATUS_CHOICES = (
+        ('pending', _('Pending')),
+        ('partially_paid', _('Partially Paid')),
+        ('paid', _('Paid')),
+    )
+    
+    obligation = models.ForeignKey(
+        BankObligation,
+        on_delete=models.CASCADE,
+        related_name='installments',
+        verbose_name=_('obligation')
+    )
+    installment_number = models.PositiveIntegerField(_('installment number'))
+    due_date = models.DateField(_('due date'), db_index=True)
+    principal = models.DecimalField(_('principal'), max_digits=14, decimal_places=2)
+    interest = models.DecimalField(_('interest'), max_digits=14, decimal_places=2)
+    amount = models.DecimalField(_('amount'), max_digits=14, decimal_places=2)
+    remaining_balance = models.DecimalField(_('remaining balance'), max_digits=14, decimal_places=2)
+    paid_amount = models.DecimalField(_('paid amount'), max_digits=14, decimal_places=2, default=0)
+    status = models.CharField(_('status'), max_length=20, choices=STATUS_CHOICES, default='pending')
+    
+    class Meta:
+        verbose_name = _('obligation installment')
+        verbose_name_plural = _('obligation installments')
+        ordering = ['obligation', 'installment_number']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['obligation', 'installment_number'],
+                name='unique_obligation_installment'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['status', 'due_date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.obligation.obligation_number} #{self.installment_number} - {self.due_date} - {self.amount}"
+    
+    @staticmethod
+    def lock_obligations(obligation_ids):
+        """Lock ``obligation_ids`` in a fixed order so concurrent writers queue up."""
+        list(BankObligation.objects.select_for_update().filter(
+            pk__in=obligation_ids
+        ).order_by('pk').values_list('pk', flat=True))
+    
+    @classmethod
+    def generate(cls, obligation_ids):
+        """Replace the installments of ``obligation_ids`` from their current terms and re-apply payments."""
+        with transaction.atomic():
+            cls.lock_obligations(obligation_ids)
+            schedules = build_schedules(BankObligation.objects.filter(pk__in=obligation_ids))
+            cls.objects.filter(obligation_id__in=obligation_ids).delete()
+            cls.objects.bulk_create([
+                cls(
+                    obligation_id=obligation_id,
+                    installment_number=row['payment_number'],
+                    due_date=row['payment_date'],
+                    principal=row['principal_portion'],
+                    interest=row['interest_portion'],
+                    amount=row['payment_amount'],
+                    remaining_balance=row['remaining_balance'],
+                )
+                for obligation_id, rows in schedules.items()
+                for row in rows
+            ], batch_size=500)
+            cls.reconcile(obligation_ids)
+    
+    @classmethod
+    def reconcile(cls, obligation_ids):
+        """
+        Spread each obligation's payments over its installments in order and
+        write back only the installments whose paid amount or status moved.
+        The obligations are locked first, so a payment committed meanwhile is
+        counted by whichever reconcile runs last.
+        """
+        with transaction.atomic():
+            cls.lock_obligations(obligation_ids)
+            paid = dict(
+                ObligationPayment.objects.filter(obligation_id__in=obligation_ids).values(
+                    'obligation_id'
+                ).annotate(total=models.Sum('amount')).values_list('obligation_id', 'total')
+            )
+            installments = {}
+            for installment in cls.objects.filter(obligation_id__in=obligation_ids).order_by('installment_number'):
+                installments.setdefault(installment.obligation_id, []).append(installment)
+            
+            changed = []
+            for obligation_id, rows in installments.items():
+                allocated = allocate_paid(
+                    [int(row.amount * 100) for row in rows], int(paid.get(obligation_id, 0) * 100)
+                )
+                for row, cents in zip(rows, allocated.tolist()):
+                    paid_amount = Decimal(cents) / 100
+                    status = 'paid' if paid_amount >= row.amount else 'partially_paid' if paid_amount else 'pending'
+                    if (row.paid_amount, row.status) != (paid_amount, status):
+                        row.paid_amount, row.status = paid_amount, status
+                        changed.append(row)
+            cls.objects.bulk_update(changed, ['paid_amount', 'status'], batch_size=500)
+            return len(changed)
@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import BankObligation, ObligationPayment
+from finance_system.exports import ExportOptionsSerializer
+from finance_system.pagination import DetailOptionsSerializer
+from .models import BankObligation, ObligationPayment, ObligationInstallment
 from accounts_receivable.serializers import BankSerializer
 
 
@@ -12,6 +14,22 @@ class ObligationPaymentSerializer(serializers.ModelSerializer):
         read_only_fields = ('created_by', 'created_at')
 
 
+class ObligationInstallmentSerializer(serializers.ModelSerializer):
+    """Serializer for the ObligationInstallment model, keyed like a payment schedule row."""
+    
+    payment_number = serializers.IntegerField(source='installment_number', read_only=True)
+    payment_date = serializers.DateField(source='due_date', read_only=True)
+    payment_amount = serializers.DecimalField(source='amount', max_digits=14, decimal_places=2, read_only=True)
+    principal_portion = serializers.DecimalField(source='principal', max_digits=14, decimal_places=2, read_only=True)
+    interest_portion = serializers.DecimalField(source='interest', max_digits=14, decimal_places=2, read_only=True)
+    
+    class Meta:
+        model = ObligationInstallment
+        fields = ('id', 'obligation', 'payment_number', 'payment_date', 'payment_amount', 'principal_portion',
+                  'interest_portion', 'remaining_balance', 'paid_amount', 'status')
+        read_only_fields = fields
+
+
 class BankObligationSerializer(serializers.ModelSerializer):
     """Serializer for the BankObligation model."""
     
@@ -48,7 +66,7 @@ class ObligationSummarySerializer(serializers.Serializer):
     upcoming_payments = serializers.ListField(child=serializers.DictField())
 
 
-class ObligationReportSerializer(serializers.Serializer):
+class ObligationReportSerializer(ExportOptionsSerializer, DetailOptionsSerializer):
     """Serializer for the obligation report data."""
     
     start_date = serializers.DateField()
@@ -56,10 +74,13 @@ class ObligationReportSerializer(serializers.Serializer):
     obligation_type = serializers.CharField(required=False)
     bank = serializers.IntegerField(required=False)
     is_active = serializers.BooleanField(required=False)
+    
+    detail_keyset = ('-start_date', '-id')
+    keyset_fields = {'start_date': serializers.DateField(), 'id': serializers.IntegerField()}
 
 
 class PaymentScheduleSerializer(serializers.Serializer):
     """Serializer for the payment schedule data."""
     
     obligation_id = serializers.IntegerField()
-    months = serializers.IntegerField(default=12)  # Number of months to generate schedule for
+    months = serializers.IntegerField(default=12, min_value=1)  # Number of upcoming installments to return
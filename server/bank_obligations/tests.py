@@ -1,9 +1,14 @@
-from django.test import TestCase
+from importlib import import_module
+from django.apps import apps
+from django.test import TestCase, override_settings
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from accounts_receivable.models import Bank
-from .models import BankObligation
+from .models import BankObligation, ObligationInstallment, ObligationPayment
+from .amortization import build_schedules
+import datetime
+from decimal import Decimal
 
 class BankObligationsAPITestCase(APITestCase):
     def setUp(self):
@@ -51,3 +56,173 @@ class BankObligationsAPITestCase(APITestCase):
         self.assertGreater(len(response.data['results']), 0)  # Ensure the list is not empty
 
 # Create your tests here.
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class BankObligationListQueryBudgetTestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='budget@example.com', password='testpassword')
+        self.client.force_authenticate(self.user)
+        bank = Bank.objects.create(name="Budget Bank", arabic_name="Budget Bank")
+        for i in range(10):
+            obligation = BankObligation.objects.create(
+                bank=bank,
+                obligation_type='loan',
+                principal_amount=10000,
+                interest_rate=5.0,
+                payment_frequency='monthly',
+                payment_amount=1000,
+                total_payments=12,
+                start_date="2025-05-01",
+                end_date="2026-05-01",
+                created_by=self.user
+            )
+            ObligationPayment.objects.create(
+                obligation=obligation,
+                payment_date="2025-06-01",
+                amount=1000,
+                principal_portion=900,
+                interest_portion=100
+            )
+
+    def test_list_stays_within_query_budget(self):
+        response = self.client.get('/api/v1/bank-obligations/obligations/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 10)
+        self.assertEqual(response.data['results'][0]['remaining_balance'], '9000.00')
+
+
+class ObligationScheduleMixin:
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='amortize@example.com', password='testpassword')
+        self.client.force_authenticate(self.user)
+        self.bank = Bank.objects.create(name="Amortization Bank", arabic_name="Amortization Bank")
+
+    def obligation(self, method, frequency='monthly', total_payments=12, **extra):
+        return BankObligation.objects.create(
+            bank=self.bank, obligation_type='loan', principal_amount=10000, interest_rate=12,
+            payment_frequency=frequency, amortization_method=method, payment_amount=1,
+            total_payments=total_payments, start_date=datetime.date(2026, 1, 31),
+            end_date=datetime.date(2027, 1, 31), **extra
+        )
+
+
+class AmortizationEngineTestCase(ObligationScheduleMixin, APITestCase):
+    def test_methods_repay_the_principal_to_the_cent(self):
+        obligations = [
+            self.obligation('annuity'),
+            self.obligation('equal_principal', frequency='quarterly', total_payments=4),
+            self.obligation('interest_only'),
+            self.obligation('lump_sum'),
+        ]
+        annuity, straight, balloon, lump = [build_schedules(obligations)[o.pk] for o in obligations]
+        for schedule in (annuity, straight, balloon, lump):
+            self.assertEqual(sum(row['principal_portion'] for row in schedule), Decimal('10000'))
+            self.assertEqual(schedule[-1]['remaining_balance'], 0)
+
+        # 1% a month: level payment of 888.49, the last one trued up
+        self.assertEqual({row['payment_amount'] for row in annuity[:-1]}, {Decimal('888.49')})
+        self.assertEqual(annuity[-1]['payment_amount'], Decimal('888.47'))
+        self.assertEqual([row['payment_date'] for row in annuity[:2]], [datetime.date(2026, 2, 28), datetime.date(2026, 3, 31)])
+        # 3% a quarter on a declining balance
+        self.assertEqual([row['interest_portion'] for row in straight], [300, 225, 150, 75])
+        self.assertEqual([row['principal_portion'] for row in balloon[:-1]], [0] * 11)
+        self.assertEqual(balloon[-1]['payment_amount'], Decimal('10100'))
+        self.assertEqual(len(lump), 1)
+        self.assertEqual((lump[0]['payment_date'], lump[0]['interest_portion']), (datetime.date(2027, 1, 31), 1200))
+
+    def test_migration_copy_matches_the_engine(self):
+        frozen = import_module('bank_obligations.migrations.0006_obligationinstallment')
+        obligations = [
+            self.obligation('annuity'),
+            self.obligation('annuity', total_payments=7),
+            self.obligation('equal_principal', frequency='quarterly', total_payments=4),
+            self.obligation('interest_only', frequency='semi_annually', total_payments=5),
+            self.obligation('lump_sum'),
+            self.obligation('annuity', frequency='annually', total_payments=3),
+        ]
+        obligations[1].interest_rate = 0
+        obligations[5].start_date = None
+        for obligation in obligations[1], obligations[5]:
+            obligation.save()
+        ObligationPayment.objects.create(
+            obligation=obligations[0], payment_date=datetime.date(2026, 2, 28), amount=Decimal('1500'),
+            principal_portion=Decimal('1400'), interest_portion=100
+        )
+        engine = {
+            pk: [
+                (row['payment_number'], row['payment_date'], int(row['principal_portion'] * 100),
+                 int(row['interest_portion'] * 100), int(row['remaining_balance'] * 100))
+                for row in rows
+            ]
+            for pk, rows in build_schedules(obligations).items()
+        }
+        self.assertEqual(frozen.build_schedules(obligations), engine)
+
+        # Payments are spread the same way as ObligationInstallment.reconcile
+        fields = ('obligation_id', 'installment_number', 'due_date', 'amount', 'remaining_balance', 'paid_amount', 'status')
+        stored = list(ObligationInstallment.objects.order_by('obligation_id', 'installment_number').values_list(*fields))
+        ObligationInstallment.objects.all().delete()
+        frozen.generate_installments(apps, None)
+        self.assertEqual(
+            list(ObligationInstallment.objects.order_by('obligation_id', 'installment_number').values_list(*fields)),
+            stored
+        )
+
+    def test_schedule_view_skips_paid_installments(self):
+        obligation = self.obligation('annuity')
+        ObligationPayment.objects.create(
+            obligation=obligation, payment_date=datetime.date(2026, 2, 28),
+            amount=Decimal('888.49'), principal_portion=Decimal('788.49'), interest_portion=100
+        )
+        response = self.client.post('/api/v1/bank-obligations/payment-schedule/', {
+            'obligation_id': obligation.pk, 'months': 3
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = response.data['payment_schedule']
+        self.assertEqual([row['payment_number'] for row in rows], [2, 3, 4])
+        self.assertEqual(rows[0]['remaining_balance'], '8415.14')
+        self.assertEqual(response.data['remaining_balance'], Decimal('9111.51'))
+
+    def test_schedule_view_reads_payments_once(self):
+        obligation = self.obligation('annuity')
+        with self.assertNumQueries(3):
+            self.client.post('/api/v1/bank-obligations/payment-schedule/', {
+                'obligation_id': obligation.pk, 'months': 3
+            }, format='json')
+
+
+class ObligationInstallmentTestCase(ObligationScheduleMixin, APITestCase):
+    def statuses(self, obligation):
+        return list(obligation.installments.order_by('installment_number').values_list('status', flat=True)[:3])
+
+    def test_installments_follow_terms_and_payments(self):
+        obligation = self.obligation('annuity')
+        self.assertEqual(obligation.installments.count(), 12)
+
+        obligation.total_payments = 6
+        obligation.save()
+        self.assertEqual(obligation.installments.count(), 6)
+
+        payment = ObligationPayment.objects.create(
+            obligation=obligation, payment_date=datetime.date(2026, 2, 28), amount=Decimal('2000'),
+            principal_portion=Decimal('1900'), interest_portion=100
+        )
+        self.assertEqual(self.statuses(obligation), ['paid', 'partially_paid', 'pending'])
+        obligation = BankObligation.objects.get(pk=obligation.pk)
+        self.assertEqual(obligation.next_payment_date, datetime.date(2026, 3, 31))
+
+        payment.delete()
+        self.assertEqual(self.statuses(obligation), ['pending'] * 3)
+
+    def test_due_date_range_across_obligations(self):
+        self.obligation('annuity')
+        self.obligation('equal_principal', frequency='quarterly', total_payments=4)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/bank-obligations/installments/', {
+                'due_date__gte': '2026-04-01', 'due_date__lte': '2026-04-30'
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['payment_date'] for row in response.data['results']], ['2026-04-30', '2026-04-30'])
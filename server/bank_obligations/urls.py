@@ -10,6 +10,9 @@ urlpatterns = [
     path('obligations/<int:obligation_id>/payments/', views.ObligationPaymentListCreateView.as_view(), name='obligation-payment-list-create'),
     path('obligations/payments/<int:pk>/', views.ObligationPaymentRetrieveUpdateDestroyView.as_view(), name='obligation-payment-detail'),
     
+    # Installment schedule endpoints
+    path('installments/', views.ObligationInstallmentListView.as_view(), name='obligation-installment-list'),
+    
     # Dashboard and reporting endpoints
     path('dashboard/summary/', views.ObligationSummaryView.as_view(), name='obligation-summary'),
     path('reports/obligations/', views.ObligationReportView.as_view(), name='obligation-report'),
@@ -1,24 +1,43 @@
-from django.db.models import Sum, Count, F, ExpressionWrapper, DecimalField
+from django.db.models import Sum, Count, F, ExpressionWrapper, DecimalField, OuterRef, Subquery
 from django.utils import timezone
 import datetime
 from rest_framework import generics, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import BankObligation, ObligationPayment
+from finance_system.exports import export_response
+from finance_system.pagination import attach_detail
+from finance_system.loading import LoadingProfile, LoadingProfileMixin
+from .models import BankObligation, ObligationPayment, ObligationInstallment
 from .serializers import (
     BankObligationSerializer, ObligationPaymentSerializer,
     ObligationSummarySerializer, ObligationReportSerializer,
-    PaymentScheduleSerializer
+    PaymentScheduleSerializer, ObligationInstallmentSerializer
+)
+
+
+OBLIGATION_LOADING_PROFILE = LoadingProfile(
+    select_related=('bank',),
+    prefetch_related=('payments',),
+    annotations={
+        'paid_total': Sum('payments__amount'),
+        'next_installment_date': Subquery(
+            ObligationInstallment.objects.filter(
+                obligation=OuterRef('pk')
+            ).exclude(status='paid').order_by('installment_number').values('due_date')[:1]
+        ),
+    },
 )
 
 
 # Bank Obligation views
-class BankObligationListCreateView(generics.ListCreateAPIView):
+class BankObligationListCreateView(LoadingProfileMixin, generics.ListCreateAPIView):
     """API view to retrieve list of bank obligations or create new bank obligation."""
     queryset = BankObligation.objects.all()
     serializer_class = BankObligationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    loading_profile = OBLIGATION_LOADING_PROFILE
+    query_budget = 5
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['obligation_type', 'bank', 'is_active']
     search_fields = ['obligation_number', 'bank__name', 'purpose', 'notes']
@@ -28,11 +47,12 @@ class BankObligationListCreateView(generics.ListCreateAPIView):
         serializer.save(created_by=self.request.user)
 
 
-class BankObligationRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class BankObligationRetrieveUpdateDestroyView(LoadingProfileMixin, generics.RetrieveUpdateDestroyAPIView):
     """API view to retrieve, update or delete bank obligation."""
     queryset = BankObligation.objects.all()
     serializer_class = BankObligationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    loading_profile = OBLIGATION_LOADING_PROFILE
 
 
 # Obligation Payment views
@@ -58,6 +78,23 @@ class ObligationPaymentRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyA
     permission_classes = [permissions.IsAuthenticated]
 
 
+class ObligationInstallmentListView(generics.ListAPIView):
+    """API view to list scheduled installments across all obligations, e.g. by due date range."""
+    queryset = ObligationInstallment.objects.select_related('obligation')
+    serializer_class = ObligationInstallmentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = {
+        'due_date': ['gte', 'lte'],
+        'status': ['exact', 'in'],
+        'obligation': ['exact'],
+        'obligation__bank': ['exact'],
+        'obligation__is_active': ['exact'],
+    }
+    ordering_fields = ['due_date', 'amount']
+    ordering = ['due_date', 'obligation_id']
+
+
 # Dashboard and reporting views
 class ObligationSummaryView(APIView):
     """API view to retrieve summary data for bank obligations dashboard."""
@@ -94,29 +131,26 @@ class ObligationSummaryView(APIView):
         today = timezone.now().date()
         next_month = today + datetime.timedelta(days=30)
         
-        # This is a simplified approach - in a real application, you would calculate
-        # the actual next payment dates based on payment frequency and last payment
-        active_obligations = BankObligation.objects.filter(
-            is_active=True,
-            start_date__lte=next_month,
-            end_date__gte=today
-        )
-        
-        upcoming_payments = []
-        for obligation in active_obligations:
-            next_payment_date = obligation.next_payment_date
-            if next_payment_date and next_payment_date <= next_month:
-                upcoming_payments.append({
-                    'id': obligation.id,
-                    'obligation_number': obligation.obligation_number,
-                    'bank': obligation.bank.name,
-                    'payment_date': next_payment_date,
-                    'amount': obligation.payment_amount,
-                    'days_away': (next_payment_date - today).days
-                })
+        # Unpaid installments of active obligations due in the next 30 days
+        installments = ObligationInstallment.objects.filter(
+            obligation__is_active=True,
+            due_date__gte=today,
+            due_date__lte=next_month
+        ).exclude(status='paid').select_related('obligation__bank').order_by('due_date', 'obligation_id')
         
-        # Sort by payment date
-        upcoming_payments.sort(key=lambda x: x['payment_date'])
+        upcoming_payments = [
+            {
+                'id': installment.obligation_id,
+                'obligation_number': installment.obligation.obligation_number,
+                'bank': installment.obligation.bank.name,
+                'payment_date': installment.due_date,
+                'amount': installment.amount - installment.paid_amount,
+                'principal_portion': installment.principal,
+                'interest_portion': installment.interest,
+                'days_away': (installment.due_date - today).days
+            }
+            for installment in installments
+        ]
         
         # Prepare data for serializer
         data = {
@@ -134,8 +168,22 @@ class ObligationSummaryView(APIView):
 
 
 class ObligationReportView(APIView):
-    """API view to generate reports for bank obligations."""
+    """API view to generate reports for bank obligations, or stream them as CSV/XLSX."""
     permission_classes = [permissions.IsAuthenticated]
+    export_columns = [
+        ('Obligation Number', 'obligation_number'),
+        ('Type', 'obligation_type'),
+        ('Bank', 'bank__name'),
+        ('Principal Amount', 'principal_amount'),
+        ('Interest Rate', 'interest_rate'),
+        ('Payment Frequency', 'payment_frequency'),
+        ('Payment Amount', 'payment_amount'),
+        ('Total Payments', 'total_payments'),
+        ('Start Date', 'start_date'),
+        ('End Date', 'end_date'),
+        ('Status', 'status'),
+        ('Active', 'is_active'),
+    ]
     
     def post(self, request):
         serializer = ObligationReportSerializer(data=request.data)
@@ -160,6 +208,10 @@ class ObligationReportView(APIView):
             if is_active is not None:
                 queryset = queryset.filter(is_active=is_active)
             
+            export_format = serializer.validated_data.get('export')
+            if export_format:
+                return export_response(export_format, 'obligations', self.export_columns, queryset)
+            
             # Calculate payments made during the period
             payments_in_period = ObligationPayment.objects.filter(
                 obligation__in=queryset,
@@ -169,11 +221,25 @@ class ObligationReportView(APIView):
             
             total_paid_in_period = payments_in_period.aggregate(total=Sum('amount'))['total'] or 0
             
+            # Installments falling due in the period according to the schedules
+            scheduled = ObligationInstallment.objects.filter(
+                obligation__in=queryset,
+                due_date__gte=start_date,
+                due_date__lte=end_date
+            ).aggregate(
+                principal=Sum('principal'),
+                interest=Sum('interest'),
+                total=Sum('amount'),
+                count=Count('id')
+            )
+            scheduled = {key: value or 0 for key, value in scheduled.items()}
+            
             # Generate report data
             report_data = {
                 'total_count': queryset.count(),
                 'total_principal': queryset.aggregate(total=Sum('principal_amount'))['total'] or 0,
                 'total_paid_in_period': total_paid_in_period,
+                'scheduled_in_period': scheduled,
                 'by_type': queryset.values('obligation_type').annotate(
                     count=Count('id'),
                     total=Sum('principal_amount')
@@ -187,9 +253,13 @@ class ObligationReportView(APIView):
                             'year': "EXTRACT(YEAR FROM payment_date)"}
                 ).values('month', 'year').annotate(
                     total=Sum('amount')
-                ).order_by('year', 'month'),
-                'obligations': BankObligationSerializer(queryset, many=True).data
+                ).order_by('year', 'month')
             }
+            attach_detail(
+                report_data, 'obligations', OBLIGATION_LOADING_PROFILE.apply(queryset),
+                serializer.validated_data, BankObligationSerializer,
+                keyset=serializer.detail_keyset
+            )
             
             return Response(report_data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -206,89 +276,29 @@ class PaymentScheduleView(APIView):
             months = serializer.validated_data.get('months', 12)
             
             try:
-                obligation = BankObligation.objects.get(id=obligation_id)
+                # Annotated like the list, so the balance and next date read no payments
+                obligation = OBLIGATION_LOADING_PROFILE.apply(BankObligation.objects.all()).get(id=obligation_id)
             except BankObligation.DoesNotExist:
                 return Response(
                     {'detail': 'Bank obligation not found.'},
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Get existing payments
-            existing_payments = ObligationPayment.objects.filter(
-                obligation=obligation
-            ).order_by('payment_date')
+            # Get existing payments (prefetched by the loading profile)
+            existing_payments = sorted(obligation.payments.all(), key=lambda payment: payment.payment_date)
             
             # Calculate remaining balance
             remaining_balance = obligation.remaining_balance
             
-            # Calculate next payment date
-            today = timezone.now().date()
-            next_payment_date = obligation.next_payment_date or today
-            
-            # Generate payment schedule
-            schedule = []
-            current_date = next_payment_date
-            current_balance = remaining_balance
-            
-            for i in range(months):
-                # Skip if we've reached the end date or balance is zero
-                if current_date > obligation.end_date or current_balance <= 0:
-                    break
-                
-                # Calculate interest for this payment
-                monthly_interest_rate = obligation.interest_rate / 100 / 12
-                interest_amount = current_balance * monthly_interest_rate
-                
-                # Calculate principal portion
-                principal_portion = min(obligation.payment_amount - interest_amount, current_balance)
-                
-                # Add to schedule
-                schedule.append({
-                    'payment_number': i + 1,
-                    'payment_date': current_date,
-                    'payment_amount': obligation.payment_amount,
-                    'principal_portion': principal_portion,
-                    'interest_portion': interest_amount,
-                    'remaining_balance': current_balance - principal_portion
-                })
-                
-                # Update balance and date for next iteration
-                current_balance -= principal_portion
-                
-                # Calculate next payment date based on frequency
-                if obligation.payment_frequency == 'monthly':
-                    # Handle month overflow
-                    year = current_date.year + (current_date.month + 1 - 1) // 12
-                    month = (current_date.month + 1 - 1) % 12 + 1
-                    day = min(current_date.day, [31, 29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31][month-1])
-                    current_date = datetime.date(year, month, day)
-                elif obligation.payment_frequency == 'quarterly':
-                    # Handle month overflow
-                    year = current_date.year + (current_date.month + 3 - 1) // 12
-                    month = (current_date.month + 3 - 1) % 12 + 1
-                    day = min(current_date.day, [31, 29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31][month-1])
-                    current_date = datetime.date(year, month, day)
-                elif obligation.payment_frequency == 'semi_annually':
-                    # Handle month overflow
-                    year = current_date.year + (current_date.month + 6 - 1) // 12
-                    month = (current_date.month + 6 - 1) % 12 + 1
-                    day = min(current_date.day, [31, 29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31][month-1])
-                    current_date = datetime.date(year, month, day)
-                elif obligation.payment_frequency == 'annually':
-                    # Handle leap year
-                    year = current_date.year + 1
-                    month = current_date.month
-                    day = min(current_date.day, [31, 29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31][month-1])
-                    current_date = datetime.date(year, month, day)
-                else:  # lump_sum
-                    current_date = obligation.end_date
+            # Stored installments not yet fully covered by recorded payments
+            schedule = obligation.installments.exclude(status='paid').order_by('installment_number')[:months]
             
             # Prepare response data
             response_data = {
                 'obligation': BankObligationSerializer(obligation).data,
                 'existing_payments': ObligationPaymentSerializer(existing_payments, many=True).data,
                 'remaining_balance': remaining_balance,
-                'payment_schedule': schedule
+                'payment_schedule': ObligationInstallmentSerializer(schedule, many=True).data
             }
             
             return Response(response_data)
@@ -2,6 +2,7 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 from django.conf import settings
+from document_numbers.models import DocumentSequence, last_issued_seed
 import datetime
 
 
@@ -58,23 +59,9 @@ class CashTransaction(models.Model):
     
     # Auto-generate reference number
     def generate_reference_number():
-        today = datetime.date.today()
-        year = today.year
-        last_transaction = CashTransaction.objects.filter(
-            created_at__year=year
-        ).order_by('-reference_number').first()
-        
-        if last_transaction and last_transaction.reference_number:
-            try:
-                # Extract the numeric part of the reference number
-                last_number = int(last_transaction.reference_number.split('-')[-1])
-                new_number = last_number + 1
-            except (ValueError, IndexError):
-                new_number = 1
-        else:
-            new_number = 1
-        
-        return f"CT-{year}-{new_number:05d}"
+        return DocumentSequence.objects.next_number(
+            'CT', seed=last_issued_seed(CashTransaction, 'reference_number')
+        )
     
     transaction_type = models.CharField(
         _('transaction type'),
@@ -163,6 +150,10 @@ class CashAccount(models.Model):
     @property
     def current_balance(self):
         """Calculate the current balance of the account."""
+        # Use the totals annotated by the list views when available
+        if hasattr(self, 'income_total'):
+            return self.initial_balance + (self.income_total or 0) - (self.expense_total or 0)
+        
         # Get all transactions for this account
         account_transactions = self.account_transactions.all()
         
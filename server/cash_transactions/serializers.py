@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from finance_system.exports import ExportOptionsSerializer
+from finance_system.pagination import DetailOptionsSerializer
 from .models import TransactionCategory, CashTransaction, CashAccount, CashAccountTransaction
 
 
@@ -75,7 +77,7 @@ class TransactionSummarySerializer(serializers.Serializer):
     recent_transactions = CashTransactionSerializer(many=True)
 
 
-class TransactionReportSerializer(serializers.Serializer):
+class TransactionReportSerializer(ExportOptionsSerializer, DetailOptionsSerializer):
     """Serializer for the transaction report data."""
     
     start_date = serializers.DateField()
@@ -83,6 +85,9 @@ class TransactionReportSerializer(serializers.Serializer):
     transaction_type = serializers.CharField(required=False)
     category = serializers.IntegerField(required=False)
     account = serializers.IntegerField(required=False)
+    
+    detail_keyset = ('-transaction_date', '-id')
+    keyset_fields = {'transaction_date': serializers.DateField(), 'id': serializers.IntegerField()}
 
 
 class CashFlowSerializer(serializers.Serializer):
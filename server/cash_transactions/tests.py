@@ -1,8 +1,8 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from .models import CashTransaction, TransactionCategory
+from .models import CashTransaction, TransactionCategory, CashAccount, CashAccountTransaction
 
 class CashTransactionsAPITestCase(APITestCase):
     def setUp(self):
@@ -40,3 +40,31 @@ class CashTransactionsAPITestCase(APITestCase):
         self.assertEqual(response.data['count'], 10)  # Ensure count matches the number of items
         self.assertIsInstance(response.data['results'], list)  # Ensure 'results' is a list
         self.assertGreater(len(response.data['results']), 0)  # Ensure the list is not empty
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class CashAccountListQueryBudgetTestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='budget@example.com', password='testpassword')
+        self.client.force_authenticate(self.user)
+        income = TransactionCategory.objects.create(name="Sales", category_type="income")
+        expense = TransactionCategory.objects.create(name="Rent", category_type="expense")
+        for i in range(5):
+            account = CashAccount.objects.create(name=f"Account {i}", initial_balance=1000)
+            for category, amount in [(income, 300), (expense, 100)]:
+                transaction = CashTransaction.objects.create(
+                    category=category,
+                    transaction_type=category.category_type,
+                    amount=amount,
+                    created_by=self.user
+                )
+                CashAccountTransaction.objects.create(
+                    account=account, transaction=transaction, amount=amount
+                )
+
+    def test_list_stays_within_query_budget(self):
+        response = self.client.get('/api/v1/cash-transactions/accounts/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(response.data['results'][0]['current_balance'], '1200.00')
@@ -1,10 +1,13 @@
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count, Q, Prefetch
 from django.utils import timezone
 import datetime
 from rest_framework import generics, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from finance_system.exports import export_response
+from finance_system.pagination import attach_detail
+from finance_system.loading import LoadingProfile, LoadingProfileMixin
 from .models import TransactionCategory, CashTransaction, CashAccount, CashAccountTransaction
 from .serializers import (
     TransactionCategorySerializer, CashTransactionSerializer,
@@ -14,6 +17,28 @@ from .serializers import (
 )
 
 
+CASH_ACCOUNT_LOADING_PROFILE = LoadingProfile(
+    prefetch_related=(
+        Prefetch(
+            'account_transactions',
+            queryset=CashAccountTransaction.objects.select_related(
+                'transaction__category', 'transaction__created_by'
+            )
+        ),
+    ),
+    annotations={
+        'income_total': Sum(
+            'account_transactions__amount',
+            filter=Q(account_transactions__transaction__transaction_type='income')
+        ),
+        'expense_total': Sum(
+            'account_transactions__amount',
+            filter=Q(account_transactions__transaction__transaction_type='expense')
+        ),
+    },
+)
+
+
 # Transaction Category views
 class TransactionCategoryListCreateView(generics.ListCreateAPIView):
     """API view to retrieve list of transaction categories or create new category."""
@@ -62,22 +87,25 @@ class CashTransactionRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPI
 
 
 # Cash Account views
-class CashAccountListCreateView(generics.ListCreateAPIView):
+class CashAccountListCreateView(LoadingProfileMixin, generics.ListCreateAPIView):
     """API view to retrieve list of cash accounts or create new account."""
     queryset = CashAccount.objects.all()
     serializer_class = CashAccountSerializer
     permission_classes = [permissions.IsAuthenticated]
+    loading_profile = CASH_ACCOUNT_LOADING_PROFILE
+    query_budget = 5
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['is_active']
     search_fields = ['name', 'arabic_name', 'description']
     ordering_fields = ['name', 'created_at']
 
 
-class CashAccountRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class CashAccountRetrieveUpdateDestroyView(LoadingProfileMixin, generics.RetrieveUpdateDestroyAPIView):
     """API view to retrieve, update or delete cash account."""
     queryset = CashAccount.objects.all()
     serializer_class = CashAccountSerializer
     permission_classes = [permissions.IsAuthenticated]
+    loading_profile = CASH_ACCOUNT_LOADING_PROFILE
 
 
 # Cash Account Transaction views
@@ -168,8 +196,16 @@ class TransactionSummaryView(APIView):
 
 
 class TransactionReportView(APIView):
-    """API view to generate reports for cash transactions."""
+    """API view to generate reports for cash transactions, or stream them as CSV/XLSX."""
     permission_classes = [permissions.IsAuthenticated]
+    export_columns = [
+        ('Reference Number', 'reference_number'),
+        ('Type', 'transaction_type'),
+        ('Category', 'category__name'),
+        ('Transaction Date', 'transaction_date'),
+        ('Amount', 'amount'),
+        ('Description', 'description'),
+    ]
     
     def post(self, request):
         serializer = TransactionReportSerializer(data=request.data)
@@ -202,6 +238,10 @@ class TransactionReportView(APIView):
                 ).values_list('transaction_id', flat=True)
                 queryset = queryset.filter(id__in=transaction_ids)
             
+            export_format = serializer.validated_data.get('export')
+            if export_format:
+                return export_response(export_format, 'transactions', self.export_columns, queryset)
+            
             # Generate report data
             report_data = {
                 'total_count': queryset.count(),
@@ -221,9 +261,13 @@ class TransactionReportView(APIView):
                 ).values('day', 'month', 'year').annotate(
                     count=Count('id'),
                     total=Sum('amount')
-                ).order_by('year', 'month', 'day'),
-                'transactions': CashTransactionSerializer(queryset, many=True).data
+                ).order_by('year', 'month', 'day')
             }
+            attach_detail(
+                report_data, 'transactions', queryset,
+                serializer.validated_data, CashTransactionSerializer,
+                keyset=serializer.detail_keyset
+            )
             
             return Response(report_data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class DocumentNumbersConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'document_numbers'
+    verbose_name = _('Document Numbers')
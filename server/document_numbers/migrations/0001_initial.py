@@ -0,0 +1,30 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=10, verbose_name='prefix')),
+                ('year', models.PositiveIntegerField(verbose_name='year')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='last value')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'verbose_name': 'document sequence',
+                'verbose_name_plural': 'document sequences',
+                'ordering': ['prefix', '-year'],
+                'unique_together': {('prefix', 'year')},
+            },
+        ),
+    ]
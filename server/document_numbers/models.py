@@ -0,0 +1,91 @@
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, IntegerField, Max
+from django.db.models.functions import Cast, Substr
+from django.utils.translation import gettext_lazy as _
+import datetime
+import re
+
+
+class DocumentSequenceManager(models.Manager):
+    """Allocate document numbers from per-prefix, per-year counters."""
+    
+    def allocate(self, prefix, count=1, year=None, seed=None):
+        """
+        Reserve ``count`` consecutive values and return the first one.
+        
+        The counter row is bumped with a single ``UPDATE ... SET last_value =
+        last_value + count``, which takes the row lock on PostgreSQL and the
+        write lock on SQLite, so concurrent callers never see the same values.
+        ``seed`` is called with the prefix and year to find the last number
+        already in use when the counter row does not exist yet.
+        """
+        if count < 1:
+            raise ValueError(_('At least one number must be allocated'))
+        year = year or datetime.date.today().year
+        
+        with transaction.atomic():
+            counter = self.filter(prefix=prefix, year=year)
+            if not counter.update(last_value=F('last_value') + count):
+                start = seed(prefix, year) if seed else 0
+                try:
+                    with transaction.atomic():
+                        self.create(prefix=prefix, year=year, last_value=start + count)
+                    return start + 1
+                except IntegrityError:
+                    # Another request created the counter first
+                    counter.update(last_value=F('last_value') + count)
+            last_value = counter.values_list('last_value', flat=True).get()
+        return last_value - count + 1
+    
+    def next_number(self, prefix, seed=None):
+        """Return the next formatted number for ``prefix`` in the current year."""
+        return self.allocate_numbers(prefix, 1, seed=seed)[0]
+    
+    def allocate_numbers(self, prefix, count, seed=None):
+        """Reserve a block of ``count`` formatted numbers in one round trip."""
+        year = datetime.date.today().year
+        first = self.allocate(prefix, count, year=year, seed=seed)
+        return [format_number(prefix, year, value) for value in range(first, first + count)]
+
+
+def format_number(prefix, year, value):
+    """Format a sequence value the way document numbers are stored."""
+    return f"{prefix}-{year}-{value:05d}"
+
+
+def last_issued_seed(model, field):
+    """
+    Build a ``seed`` callable that reads the highest number already issued
+    for a year, so existing documents keep their numbers when a counter is
+    first created. The numeric suffix is compared as an integer, since
+    suffixes past 99999 are wider than the padding and sort wrong as text.
+    """
+    def seed(prefix, year):
+        start = f'{prefix}-{year}-'
+        last_value = model.objects.filter(
+            **{f'{field}__regex': rf'^{re.escape(start)}[0-9]+$'}
+        ).aggregate(
+            last_value=Max(Cast(Substr(field, len(start) + 1), IntegerField()))
+        )['last_value']
+        return last_value or 0
+    return seed
+
+
+class DocumentSequence(models.Model):
+    """Counter for a document number prefix (AR, AP, BO, CT) within a year."""
+    
+    prefix = models.CharField(_('prefix'), max_length=10)
+    year = models.PositiveIntegerField(_('year'))
+    last_value = models.PositiveIntegerField(_('last value'), default=0)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    
+    objects = DocumentSequenceManager()
+    
+    class Meta:
+        verbose_name = _('document sequence')
+        verbose_name_plural = _('document sequences')
+        unique_together = ['prefix', 'year']
+        ordering = ['prefix', '-year']
+    
+    def __str__(self):
+        return f"{self.prefix}-{self.year}: {self.last_value}"
@@ -0,0 +1,56 @@
+import datetime
+from django.test import TestCase
+from accounts_receivable.models import AccountReceivable, Client, Bank
+from .models import DocumentSequence, format_number, last_issued_seed
+
+
+class DocumentSequenceTestCase(TestCase):
+    def test_block_allocation_is_consecutive(self):
+        first_block = DocumentSequence.objects.allocate_numbers('AR', 3)
+        second = DocumentSequence.objects.next_number('AR')
+        year = datetime.date.today().year
+        self.assertEqual(first_block, [format_number('AR', year, value) for value in (1, 2, 3)])
+        self.assertEqual(second, format_number('AR', year, 4))
+        self.assertEqual(DocumentSequence.objects.get(prefix='AR', year=year).last_value, 4)
+
+    def test_large_block_costs_constant_queries(self):
+        DocumentSequence.objects.next_number('CT')
+        # Savepoint, UPDATE, SELECT, release: independent of the block size
+        with self.assertNumQueries(4):
+            numbers = DocumentSequence.objects.allocate_numbers('CT', 5000)
+        self.assertEqual(len(set(numbers)), 5000)
+
+    def test_new_counter_is_seeded_from_existing_numbers(self):
+        year = datetime.date.today().year
+        client = Client.objects.create(name="Sequence Client")
+        bank = Bank.objects.create(name="Sequence Bank", arabic_name="Sequence Bank")
+        receivable = AccountReceivable.objects.create(
+            client=client, bank=bank, amount=100, check_number='CHK',
+            due_date=datetime.date.today() + datetime.timedelta(days=10)
+        )
+        AccountReceivable.objects.filter(pk=receivable.pk).update(
+            receipt_number=format_number('AR', year, 41)
+        )
+        DocumentSequence.objects.all().delete()
+
+        seed = last_issued_seed(AccountReceivable, 'receipt_number')
+        self.assertEqual(
+            DocumentSequence.objects.next_number('AR', seed=seed),
+            format_number('AR', year, 42)
+        )
+
+    def test_seed_compares_suffixes_as_numbers(self):
+        year = datetime.date.today().year
+        client = Client.objects.create(name="Sequence Client")
+        bank = Bank.objects.create(name="Sequence Bank", arabic_name="Sequence Bank")
+        for value in (99999, 100000, 'MANUAL'):
+            receivable = AccountReceivable.objects.create(
+                client=client, bank=bank, amount=100, check_number='CHK',
+                due_date=datetime.date.today() + datetime.timedelta(days=10)
+            )
+            AccountReceivable.objects.filter(pk=receivable.pk).update(
+                receipt_number=f'AR-{year}-{value}' if value == 'MANUAL' else format_number('AR', year, value)
+            )
+
+        seed = last_issued_seed(AccountReceivable, 'receipt_number')
+        self.assertEqual(seed('AR', year), 100000)
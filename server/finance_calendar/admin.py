@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CalendarEvent
+from .models import CalendarEvent, OverdueSweep
 
 
 @admin.register(CalendarEvent)
@@ -34,3 +34,11 @@ class CalendarEventAdmin(admin.ModelAdmin):
         if obj:  # editing an existing object
             readonly_fields.extend(['created_by', 'created_at', 'updated_at'])
         return readonly_fields
+
+
+@admin.register(OverdueSweep)
+class OverdueSweepAdmin(admin.ModelAdmin):
+    list_display = ('as_of', 'receivables_marked', 'payables_marked', 'events_created', 'events_deleted', 'finished_at')
+    list_filter = ('as_of',)
+    date_hierarchy = 'finished_at'
+    readonly_fields = [field.name for field in OverdueSweep._meta.fields]
@@ -0,0 +1,37 @@
+import datetime
+import time
+from django.core.management.base import BaseCommand, CommandError
+from finance_calendar.sweeper import sweep_overdue
+
+
+class Command(BaseCommand):
+    help = 'Mark past-due receivables and payables as overdue and reconcile their calendar events.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Treat this day (YYYY-MM-DD) as today.')
+        parser.add_argument(
+            '--every', type=int, default=0,
+            help='Keep running, sweeping every this many seconds (run in one dedicated process only).'
+        )
+    
+    def handle(self, *args, **options):
+        as_of = None
+        if options['date']:
+            try:
+                as_of = datetime.datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Date must be in YYYY-MM-DD format.')
+        if options['every'] < 0:
+            raise CommandError('--every must be a positive number of seconds.')
+        
+        while True:
+            self.report(sweep_overdue(as_of))
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+    
+    def report(self, sweep):
+        self.stdout.write(self.style.SUCCESS(
+            f'Marked {sweep.receivables_marked} receivables overdue, {sweep.payables_marked} payables past due; '
+            f'{sweep.events_created} events created, {sweep.events_deleted} deleted.'
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_calendar', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OverdueSweep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField(verbose_name='as of')),
+                ('receivables_marked', models.PositiveIntegerField(default=0, verbose_name='receivables marked overdue')),
+                ('receivables_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='receivables amount')),
+                ('payables_marked', models.PositiveIntegerField(default=0, verbose_name='payables marked overdue')),
+                ('payables_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='payables amount')),
+                ('events_created', models.PositiveIntegerField(default=0, verbose_name='events created')),
+                ('events_deleted', models.PositiveIntegerField(default=0, verbose_name='events deleted')),
+                ('started_at', models.DateTimeField(verbose_name='started at')),
+                ('finished_at', models.DateTimeField(auto_now_add=True, verbose_name='finished at')),
+            ],
+            options={
+                'verbose_name': 'overdue sweep',
+                'verbose_name_plural': 'overdue sweeps',
+                'ordering': ['-finished_at'],
+            },
+        ),
+    ]
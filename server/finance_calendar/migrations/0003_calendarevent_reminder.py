@@ -0,0 +1,43 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+
+
+REMINDER_ID = re.compile(r'Reminder ID: (\d+)')
+
+
+def link_reminder_events(apps, schema_editor):
+    """Point existing reminder events at their reminder instead of the ID in the text."""
+    CalendarEvent = apps.get_model('finance_calendar', 'CalendarEvent')
+    PaymentReminder = apps.get_model('accounts_payable', 'PaymentReminder')
+    events = list(CalendarEvent.objects.filter(event_type='reminder', reminder__isnull=True))
+    existing = set(PaymentReminder.objects.values_list('pk', flat=True))
+    linked, orphaned = [], []
+    for event in events:
+        match = REMINDER_ID.search(event.description)
+        if match and int(match.group(1)) in existing:
+            event.reminder_id = int(match.group(1))
+            linked.append(event)
+        else:
+            orphaned.append(event.pk)
+    CalendarEvent.objects.bulk_update(linked, ['reminder'], batch_size=500)
+    CalendarEvent.objects.filter(pk__in=orphaned).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts_payable', '0006_payablestatushistory_dwell'),
+        ('finance_calendar', '0002_overduesweep'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendarevent',
+            name='reminder',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='calendar_events', to='accounts_payable.paymentreminder'),
+        ),
+        migrations.RunPython(link_reminder_events, migrations.RunPython.noop),
+    ]
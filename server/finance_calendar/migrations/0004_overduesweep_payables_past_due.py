@@ -0,0 +1,23 @@
+# Generated by Django 4.2.10 on 2026-10-17 19:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_calendar', '0003_calendarevent_reminder'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='overduesweep',
+            name='payables_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='payables past due amount'),
+        ),
+        migrations.AlterField(
+            model_name='overduesweep',
+            name='payables_marked',
+            field=models.PositiveIntegerField(default=0, verbose_name='payables past due'),
+        ),
+    ]
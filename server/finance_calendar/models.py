@@ -2,7 +2,7 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from accounts_receivable.models import AccountReceivable
-from accounts_payable.models import AccountPayable
+from accounts_payable.models import AccountPayable, PaymentReminder
 from bank_obligations.models import BankObligation
 import datetime
 
@@ -55,6 +55,13 @@ class CalendarEvent(models.Model):
         blank=True,
         related_name='calendar_events'
     )
+    reminder = models.ForeignKey(
+        PaymentReminder,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='calendar_events'
+    )
     
     # Google Calendar integration
     google_calendar_id = models.CharField(_('Google Calendar ID'), max_length=255, blank=True)
@@ -83,40 +90,107 @@ class CalendarEvent(models.Model):
         return self.EVENT_COLORS.get(self.event_type, '#9C27B0')  # Default to purple
     
     @classmethod
-    def sync_receivable_events(cls):
-        """Sync events from accounts receivable."""
-        # Delete existing receivable events
-        cls.objects.filter(event_type='receivable').delete()
-        
-        # Create events for all active receivables
-        for receivable in AccountReceivable.objects.filter(status__in=['active', 'overdue']):
-            cls.objects.create(
+    def bulk_create_receivable_events(cls, receivables):
+        """Create the due-date events for ``receivables`` with one insert."""
+        return cls.objects.bulk_create([
+            cls(
                 title=f"Due: {receivable.client.name} - {receivable.amount}",
                 description=f"Receivable due from {receivable.client.name}",
                 event_type='receivable',
                 start_date=receivable.due_date,
                 all_day=True,
                 receivable=receivable,
-                created_by=receivable.created_by
+                created_by_id=receivable.created_by_id
             )
+            for receivable in receivables
+            if receivable.status in AccountReceivable.OUTSTANDING_STATUSES
+        ])
     
     @classmethod
-    def sync_payable_events(cls):
-        """Sync events from accounts payable."""
-        # Delete existing payable events
-        cls.objects.filter(event_type='payable').delete()
+    def sync_receivable_events(cls):
+        """Sync events from accounts receivable."""
+        # Delete existing receivable events
+        cls.objects.filter(event_type='receivable').delete()
         
-        # Create events for all scheduled payables
-        for payable in AccountPayable.objects.filter(status__in=['scheduled', 'in_process']):
-            cls.objects.create(
+        # Create events for all active receivables
+        cls.bulk_create_receivable_events(
+            AccountReceivable.objects.filter(
+                status__in=AccountReceivable.OUTSTANDING_STATUSES
+            ).select_related('client')
+        )
+    
+    @classmethod
+    def bulk_create_payable_events(cls, payables):
+        """Create the due-date events for ``payables`` with one insert."""
+        return cls.objects.bulk_create([
+            cls(
                 title=f"Pay: {payable.supplier.name} - {payable.amount}",
                 description=f"Payment due to {payable.supplier.name}",
                 event_type='payable',
                 start_date=payable.due_date,
                 all_day=True,
                 payable=payable,
-                created_by=payable.created_by
+                created_by_id=payable.created_by_id
             )
+            for payable in payables
+            if payable.status in AccountPayable.OUTSTANDING_STATUSES
+        ])
+    
+    @classmethod
+    def reconcile_receivable_events(cls, receivable_ids):
+        """
+        Make the events for ``receivable_ids`` match their status: drop events
+        of settled receivables and create missing ones for open receivables.
+        Returns ``(created, deleted)``.
+        """
+        deleted, _rows = cls.objects.filter(
+            event_type='receivable', receivable_id__in=receivable_ids
+        ).exclude(receivable__status__in=AccountReceivable.OUTSTANDING_STATUSES).delete()
+        missing = AccountReceivable.objects.filter(
+            pk__in=receivable_ids, status__in=AccountReceivable.OUTSTANDING_STATUSES
+        ).exclude(calendar_events__event_type='receivable').select_related('client')
+        return len(cls.bulk_create_receivable_events(missing)), deleted
+    
+    @classmethod
+    def reconcile_payable_events(cls, payable_ids):
+        """Payable counterpart of ``reconcile_receivable_events``."""
+        deleted, _rows = cls.objects.filter(
+            event_type='payable', payable_id__in=payable_ids
+        ).exclude(payable__status__in=AccountPayable.OUTSTANDING_STATUSES).delete()
+        missing = AccountPayable.objects.filter(
+            pk__in=payable_ids, status__in=AccountPayable.OUTSTANDING_STATUSES
+        ).exclude(calendar_events__event_type='payable').select_related('supplier')
+        return len(cls.bulk_create_payable_events(missing)), deleted
+    
+    @classmethod
+    def sync_reminder_events(cls, reminder_ids):
+        """Replace the events of ``reminder_ids`` with one delete and one insert."""
+        cls.objects.filter(event_type='reminder', reminder_id__in=reminder_ids).delete()
+        reminders = PaymentReminder.objects.filter(pk__in=reminder_ids).select_related('payable__supplier')
+        return cls.objects.bulk_create([
+            cls(
+                title=f"Reminder: {reminder.payable.supplier.name}",
+                description=f"Payment reminder for {reminder.payable.supplier.name}",
+                event_type='reminder',
+                start_date=reminder.reminder_date,
+                all_day=True,
+                reminder=reminder
+            )
+            for reminder in reminders
+        ])
+    
+    @classmethod
+    def sync_payable_events(cls):
+        """Sync events from accounts payable."""
+        # Delete existing payable events
+        cls.objects.filter(event_type='payable').delete()
+        
+        # Create events for all outstanding payables
+        cls.bulk_create_payable_events(
+            AccountPayable.objects.filter(
+                status__in=AccountPayable.OUTSTANDING_STATUSES
+            ).select_related('supplier')
+        )
     
     @classmethod
     def sync_obligation_events(cls):
@@ -142,3 +216,27 @@ class CalendarEvent(models.Model):
         cls.sync_receivable_events()
         cls.sync_payable_events()
         cls.sync_obligation_events()
+
+
+class OverdueSweep(models.Model):
+    """Summary of one run of the overdue sweep."""
+    
+    as_of = models.DateField(_('as of'))
+    receivables_marked = models.PositiveIntegerField(_('receivables marked overdue'), default=0)
+    receivables_amount = models.DecimalField(_('receivables amount'), max_digits=16, decimal_places=2, default=0)
+    # Payables are overdue by due date alone, so these count what was past due
+    payables_marked = models.PositiveIntegerField(_('payables past due'), default=0)
+    payables_amount = models.DecimalField(_('payables past due amount'), max_digits=16, decimal_places=2, default=0)
+    events_created = models.PositiveIntegerField(_('events created'), default=0)
+    events_deleted = models.PositiveIntegerField(_('events deleted'), default=0)
+    started_at = models.DateTimeField(_('started at'))
+    finished_at = models.DateTimeField(_('finished at'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('overdue sweep')
+        verbose_name_plural = _('overdue sweeps')
+        ordering = ['-finished_at']
+    
+    def __str__(self):
+        return f"{self.as_of}: {self.receivables_marked} receivables, {self.payables_marked} payables"
+
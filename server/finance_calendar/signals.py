@@ -1,7 +1,11 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from accounts_receivable.models import AccountReceivable
+from accounts_receivable.signals import receivables_imported
+from finance_system.transitions import status_transitioned
 from accounts_payable.models import AccountPayable, PaymentReminder
+from accounts_payable.reminders import reminders_scheduled
+from accounts_payable.signals import payables_imported
 from bank_obligations.models import BankObligation
 from .models import CalendarEvent
 
@@ -9,7 +13,7 @@ from .models import CalendarEvent
 @receiver(post_save, sender=AccountReceivable)
 def create_receivable_event(sender, instance, created, **kwargs):
     """Create or update calendar event when a receivable is created or updated."""
-    if instance.status in ['active', 'overdue']:
+    if instance.status in AccountReceivable.OUTSTANDING_STATUSES:
         # Check if event already exists
         event = CalendarEvent.objects.filter(
             event_type='receivable',
@@ -34,10 +38,34 @@ def create_receivable_event(sender, instance, created, **kwargs):
             )
 
 
+@receiver(receivables_imported)
+def create_imported_receivable_events(sender, receivables, **kwargs):
+    """Create the calendar events for a bulk import in one batch."""
+    CalendarEvent.bulk_create_receivable_events(receivables)
+
+
+@receiver(status_transitioned, sender=AccountReceivable)
+def reconcile_transitioned_receivable_events(sender, changes, **kwargs):
+    """Add or drop events for receivables moved by a bulk transition."""
+    CalendarEvent.reconcile_receivable_events([pk for pk, _source, _target in changes])
+
+
+@receiver(status_transitioned, sender=AccountPayable)
+def reconcile_transitioned_payable_events(sender, changes, **kwargs):
+    """Add or drop events for payables moved by a bulk transition."""
+    CalendarEvent.reconcile_payable_events([pk for pk, _source, _target in changes])
+
+
+@receiver(payables_imported)
+def create_imported_payable_events(sender, payables, **kwargs):
+    """Create the calendar events for a bulk payable import in one batch."""
+    CalendarEvent.reconcile_payable_events([payable.pk for payable in payables])
+
+
 @receiver(post_save, sender=AccountPayable)
 def create_payable_event(sender, instance, created, **kwargs):
     """Create or update calendar event when a payable is created or updated."""
-    if instance.status in ['scheduled', 'in_process']:
+    if instance.status in AccountPayable.OUTSTANDING_STATUSES:
         # Check if event already exists
         event = CalendarEvent.objects.filter(
             event_type='payable',
@@ -91,26 +119,18 @@ def create_obligation_event(sender, instance, created, **kwargs):
 @receiver(post_save, sender=PaymentReminder)
 def create_reminder_event(sender, instance, created, **kwargs):
     """Create or update calendar event when a payment reminder is created or updated."""
-    # Check if event already exists
-    event = CalendarEvent.objects.filter(
+    updated = CalendarEvent.objects.filter(
         event_type='reminder',
-        description__contains=f"Reminder ID: {instance.id}"
-    ).first()
-    
-    if event:
-        # Update existing event
-        event.start_date = instance.reminder_date
-        event.save()
-    else:
-        # Create new event
-        supplier_name = instance.payable.supplier.name if instance.payable else "Unknown"
-        CalendarEvent.objects.create(
-            title=f"Reminder: {supplier_name}",
-            description=f"Payment reminder for {supplier_name}. Reminder ID: {instance.id}",
-            event_type='reminder',
-            start_date=instance.reminder_date,
-            all_day=True
-        )
+        reminder=instance
+    ).update(start_date=instance.reminder_date)
+    if not updated:
+        CalendarEvent.sync_reminder_events([instance.pk])
+
+
+@receiver(reminders_scheduled)
+def sync_scheduled_reminder_events(sender, reminder_ids, **kwargs):
+    """Refresh the events of reminders created or moved by the scheduler."""
+    CalendarEvent.sync_reminder_events(reminder_ids)
 
 
 @receiver(post_delete, sender=AccountReceivable)
@@ -139,11 +159,3 @@ def delete_obligation_event(sender, instance, **kwargs):
         obligation=instance
     ).delete()
 
-
-@receiver(post_delete, sender=PaymentReminder)
-def delete_reminder_event(sender, instance, **kwargs):
-    """Delete calendar event when a payment reminder is deleted."""
-    CalendarEvent.objects.filter(
-        event_type='reminder',
-        description__contains=f"Reminder ID: {instance.id}"
-    ).delete()
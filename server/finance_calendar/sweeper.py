@@ -0,0 +1,74 @@
+"""
+Overdue sweep: move past-due open receivables to ``overdue`` with set-based
+statements, then reconcile their calendar events in bulk. Payables have no
+overdue status, so they are only counted.
+"""
+import datetime
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from accounts_payable.models import AccountPayable
+from accounts_receivable.models import AccountReceivable
+from accounts_receivable.signals import invalidate_dashboard
+from finance_system.transitions import history_model, record_queryset_status_change
+from .models import CalendarEvent, OverdueSweep
+
+
+SWEEP_NOTE = 'Overdue sweep'
+RECEIVABLE_SWEEP_STATUSES = ('active',)
+
+
+def mark_overdue(model, statuses, as_of):
+    """
+    Set ``status='overdue'`` on rows of ``model`` in ``statuses`` that fell due
+    before ``as_of``. Every step is one statement over the same filter, so no
+    ids are loaded. Returns ``(changed, count, amount)`` where ``changed`` is
+    a subquery of the ids moved, read from the history rows this run wrote.
+    """
+    due = model.objects.filter(status__in=statuses, due_date__lt=as_of)
+    now = timezone.now()
+    # Touching the rows first keeps them locked for the rest of the sweep
+    count = due.update(updated_at=now)
+    history, field_name = history_model(model)
+    changed = history.objects.filter(
+        to_status='overdue', note=SWEEP_NOTE, changed_at=now
+    ).values(f'{field_name}_id')
+    if not count:
+        return changed, 0, 0
+    amount = due.aggregate(total=Sum('amount'))['total'] or 0
+    record_queryset_status_change(due, 'overdue', note=SWEEP_NOTE, changed_at=now)
+    due.update(status='overdue')
+    return changed, count, amount
+
+
+def sweep_overdue(as_of=None):
+    """Run one sweep and return the recorded ``OverdueSweep``."""
+    as_of = as_of or datetime.date.today()
+    started_at = timezone.now()
+
+    with transaction.atomic():
+        receivable_ids, receivables_marked, receivables_amount = mark_overdue(
+            AccountReceivable, RECEIVABLE_SWEEP_STATUSES, as_of
+        )
+        past_due = AccountPayable.objects.filter(AccountPayable.due_in_q('overdue', as_of)).aggregate(
+            count=Count('pk'), amount=Sum('amount')
+        )
+        # Overdue stays outstanding, so client balances are unchanged
+        created, deleted = CalendarEvent.reconcile_receivable_events(receivable_ids)
+
+        if receivables_marked:
+            invalidate_dashboard()
+
+        return OverdueSweep.objects.create(
+            as_of=as_of,
+            receivables_marked=receivables_marked,
+            receivables_amount=receivables_amount,
+            payables_marked=past_due['count'],
+            payables_amount=past_due['amount'] or 0,
+            events_created=created,
+            events_deleted=deleted,
+            started_at=started_at
+        )
+
@@ -0,0 +1,64 @@
+import datetime
+from django.test import TestCase
+from accounts_receivable.models import AccountReceivable, Bank, Client, ReceivableStatusHistory
+from accounts_payable.models import AccountPayable, Supplier
+from .models import CalendarEvent
+from .sweeper import mark_overdue, sweep_overdue
+
+
+class OverdueSweepTestCase(TestCase):
+    def setUp(self):
+        self.today = datetime.date.today()
+        client = Client.objects.create(name="Sweep Client")
+        supplier = Supplier.objects.create(name="Sweep Supplier")
+        bank = Bank.objects.create(name="Sweep Bank", arabic_name="Sweep Bank")
+        due_date = self.today + datetime.timedelta(days=5)
+        for amount in (100, 200):
+            AccountReceivable.objects.create(
+                client=client, bank=bank, amount=amount, due_date=due_date, check_number='CHK'
+            )
+        AccountReceivable.objects.create(
+            client=client, bank=bank, amount=300, due_date=due_date + datetime.timedelta(days=30),
+            check_number='CHK'
+        )
+        AccountPayable.objects.create(
+            supplier=supplier, bank=bank, amount=400, due_date=due_date, check_number='CHK'
+        )
+        AccountPayable.objects.create(
+            supplier=supplier, bank=bank, amount=500, due_date=due_date, check_number='CHK',
+            status='disbursed'
+        )
+
+    def test_sweep_marks_past_due_items_in_bulk(self):
+        as_of = self.today + datetime.timedelta(days=10)
+        sweep = sweep_overdue(as_of)
+        self.assertEqual(sweep.receivables_marked, 2)
+        self.assertEqual(sweep.receivables_amount, 300)
+        self.assertEqual((sweep.payables_marked, sweep.payables_amount), (1, 400))
+        self.assertEqual(AccountReceivable.objects.filter(status='overdue').count(), 2)
+        # Payables keep their place in the lifecycle; overdue is read off the due date
+        self.assertEqual(AccountPayable.objects.get(amount=400).status, 'covered')
+        self.assertEqual(AccountPayable.objects.get(amount=500).status, 'disbursed')
+        self.assertTrue(AccountPayable.objects.filter(AccountPayable.due_in_q('overdue', as_of), amount=400).exists())
+        self.assertEqual(CalendarEvent.objects.filter(event_type='receivable').count(), 3)
+        self.assertEqual(CalendarEvent.objects.filter(event_type='payable').count(), 1)
+
+        # History is written set-based, closing the row each item leaves
+        history = ReceivableStatusHistory.objects.filter(to_status='overdue')
+        self.assertEqual(sorted(history.values_list('from_status', 'note')), [('active', 'Overdue sweep')] * 2)
+        self.assertEqual(ReceivableStatusHistory.objects.filter(to_status='active', left_at__isnull=True).count(), 1)
+        self.assertFalse(AccountPayable.objects.get(amount=400).status_history.filter(note='Overdue sweep').exists())
+
+        # A second run finds nothing left to change
+        self.assertEqual(sweep_overdue(as_of).receivables_marked, 0)
+
+    def test_changed_ids_are_read_from_the_sweep_history(self):
+        AccountReceivable.objects.filter(amount=300).update(status='overdue')
+        changed, count, _amount = mark_overdue(
+            AccountReceivable, ('active',), self.today + datetime.timedelta(days=10)
+        )
+        self.assertEqual(count, 2)
+        self.assertEqual(
+            sorted(row['receivable_id'] for row in changed),
+            sorted(AccountReceivable.objects.filter(amount__in=(100, 200)).values_list('pk', flat=True))
+        )
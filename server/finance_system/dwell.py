@@ -0,0 +1,80 @@
+"""
+Time-in-status analytics over the status history tables.
+
+Each history row carries how long its object stayed in ``to_status``
+(``duration``, or the time since ``changed_at`` for rows still open), so
+the median and 90th percentile per group are picked in the database with
+window functions: rows are ranked by dwell time within each group and only
+the nearest-rank rows for the two percentiles are returned.
+"""
+from django.db import models
+from django.db.models import Count, ExpressionWrapper, F, Q, Value, Window
+from django.db.models.functions import Ceil, Coalesce, RowNumber
+from django.utils import timezone
+
+
+PERCENTILES = (('median', 0.5), ('p90', 0.9))
+
+
+def _hours(duration):
+    return round(duration.total_seconds() / 3600, 2)
+
+
+def dwell_statistics(history, group_field=None, label_field=None, include_open=False):
+    """
+    Return median and p90 dwell time per ``to_status`` (and ``group_field``
+    when given, e.g. ``'receivable__bank'``) for the ``history`` queryset.
+
+    Closed rows are always counted; with ``include_open`` objects still in a
+    status count with the time spent there so far.
+    """
+    if include_open:
+        dwell = Coalesce(
+            F('duration'),
+            ExpressionWrapper(
+                Value(timezone.now(), output_field=models.DateTimeField()) - F('changed_at'),
+                output_field=models.DurationField()
+            )
+        )
+    else:
+        history = history.filter(duration__isnull=False)
+        dwell = F('duration')
+
+    partition = [F('to_status')]
+    fields = ['to_status']
+    if group_field:
+        partition.append(F(group_field))
+        fields.append(group_field)
+        if label_field:
+            fields.append(label_field)
+
+    ranked = history.order_by().annotate(dwell=dwell).annotate(
+        position=Window(RowNumber(), partition_by=partition, order_by=F('dwell').asc()),
+        group_size=Window(Count('pk'), partition_by=partition),
+    ).annotate(**{
+        f'{name}_position': Ceil(F('group_size') * fraction)
+        for name, fraction in PERCENTILES
+    })
+
+    picked = Q()
+    for name, _fraction in PERCENTILES:
+        picked |= Q(position=F(f'{name}_position'))
+    rows = ranked.filter(picked).values(
+        *fields, 'dwell', 'position', 'group_size',
+        *(f'{name}_position' for name, _fraction in PERCENTILES)
+    )
+
+    groups = {}
+    for row in rows:
+        key = tuple(row[field] for field in fields)
+        entry = groups.setdefault(key, {
+            'status': row['to_status'],
+            **({'group': row[group_field]} if group_field else {}),
+            **({'group_name': row[label_field]} if group_field and label_field else {}),
+            'count': row['group_size'],
+        })
+        for name, _fraction in PERCENTILES:
+            if row['position'] == row[f'{name}_position']:
+                entry[f'{name}_hours'] = _hours(row['dwell'])
+
+    return sorted(groups.values(), key=lambda entry: (entry['status'], str(entry.get('group_name', ''))))
@@ -0,0 +1,127 @@
+"""
+CSV/XLSX exports for report querysets.
+
+Rows are read with ``values_list(...).iterator(chunk_size=...)`` so memory
+stays flat regardless of the date range being exported. CSV is streamed
+as it is read; XLSX is spooled to a temporary file first, because a
+workbook can only be zipped once every row is written.
+"""
+import csv
+import tempfile
+
+from django.core.exceptions import FieldDoesNotExist
+from django.http import FileResponse, StreamingHttpResponse
+from rest_framework import serializers
+
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+EXPORT_CHUNK_SIZE = 2000
+# Spreadsheet applications evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def xlsx_available():
+    """Return True when openpyxl is installed."""
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class Echo:
+    """File-like object that hands back what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def choice_labels(model, path):
+    """Return value -> label for a column backed by a field with choices, else None."""
+    *relations, name = path.split('__')
+    try:
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if not field.choices:
+        return None
+    return {value: str(label) for value, label in field.flatchoices}
+
+
+def safe_cell(value):
+    """Quote text that a spreadsheet would otherwise run as a formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_rows(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield export rows with choice fields shown by label and text made formula-safe."""
+    fields = [field for _header, field in columns]
+    labels = [choice_labels(queryset.model, field) for field in fields]
+    for values in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+        yield [
+            safe_cell(mapping.get(value, value) if mapping else value)
+            for value, mapping in zip(values, labels)
+        ]
+
+
+def stream_csv(filename, columns, queryset):
+    """Stream ``queryset`` as CSV, one chunk of rows at a time."""
+    writer = csv.writer(Echo())
+
+    def rows():
+        # BOM so spreadsheet applications detect UTF-8 (Arabic names)
+        yield '\ufeff'
+        yield writer.writerow([header for header, _field in columns])
+        for values in iter_rows(queryset, columns):
+            yield writer.writerow(values)
+
+    response = StreamingHttpResponse(rows(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def stream_xlsx(filename, columns, queryset):
+    """
+    Write ``queryset`` to a write-only workbook spooled to a temporary file
+    and stream the finished file back. Memory stays flat, but the response
+    only starts once the whole workbook is written.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=filename[:31])
+    sheet.append([header for header, _field in columns])
+    for values in iter_rows(queryset, columns):
+        sheet.append(values)
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f'{filename}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
+
+class ExportOptionsSerializer(serializers.Serializer):
+    """Base for report serializers that accept an ``export`` format."""
+
+    export = serializers.ChoiceField(choices=EXPORT_FORMATS, required=False)
+
+    def validate_export(self, value):
+        if value == 'xlsx' and not xlsx_available():
+            raise serializers.ValidationError("XLSX export requires openpyxl.")
+        return value
+
+
+def export_response(export_format, filename, columns, queryset):
+    """Return a file response for ``queryset`` in ``export_format``."""
+    if export_format == 'xlsx':
+        return stream_xlsx(filename, columns, queryset)
+    return stream_csv(filename, columns, queryset)
@@ -0,0 +1,36 @@
+"""
+Database functions shared by the finance apps.
+"""
+from django.db.models import DateField, Func, IntegerField, Value
+
+
+class DaysUntil(Func):
+    """
+    Whole days from ``as_of`` (a date or another date expression) to a date
+    expression, negative once it has passed. Computed in the database so it
+    can be filtered and ordered on.
+    """
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = IntegerField()
+
+    def __init__(self, expression, as_of, **extra):
+        if not hasattr(as_of, 'resolve_expression'):
+            as_of = Value(as_of, output_field=DateField())
+        super().__init__(expression, as_of, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS integer)',
+            arg_joiner=') - julianday(',
+            **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='DATEDIFF(%(expressions)s)',
+            arg_joiner=', ',
+            **extra_context
+        )
@@ -0,0 +1,94 @@
+"""
+Declarative eager-loading profiles and per-endpoint query budgets.
+"""
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in strict mode when a request runs more queries than its budget."""
+
+
+class LoadingProfile:
+    """
+    Describe how a list endpoint should load its rows: the relations to join,
+    the relations to prefetch and any annotations the serializer reads.
+    """
+
+    def __init__(self, select_related=(), prefetch_related=(), annotations=None):
+        self.select_related = tuple(select_related)
+        self.prefetch_related = tuple(prefetch_related)
+        self.annotations = annotations or {}
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+            # Aggregate annotations drop Meta.ordering; restore it for stable pages
+            if not queryset.ordered:
+                queryset = queryset.order_by(*(queryset.model._meta.ordering or ['pk']))
+        return queryset
+
+
+class QueryCounter:
+    """Execute wrapper that counts the queries run on a connection."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class LoadingProfileMixin:
+    """
+    Apply ``loading_profile`` to the view queryset and hold read requests to
+    ``query_budget`` queries. Queries run while authenticating the request
+    (such as the JWT user lookup) and checking permissions are not counted.
+
+    Going over budget is logged as a warning; with ``QUERY_BUDGET_STRICT``
+    enabled (as the test suite does) it raises ``QueryBudgetExceeded``.
+    """
+
+    loading_profile = None
+    query_budget = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.loading_profile is not None:
+            queryset = self.loading_profile.apply(queryset)
+        return queryset
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.query_budget is None or request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+
+        counter = self.query_counter = QueryCounter()
+        self.queries_before_handler = 0
+        with connection.execute_wrapper(counter):
+            response = super().dispatch(request, *args, **kwargs)
+
+        count = counter.count - self.queries_before_handler
+        if count > self.query_budget:
+            message = '%s %s ran %d queries (budget %d)' % (
+                request.method, request.path, count, self.query_budget
+            )
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        counter = getattr(self, 'query_counter', None)
+        if counter is not None:
+            self.queries_before_handler = counter.count
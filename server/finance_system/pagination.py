@@ -0,0 +1,125 @@
+"""
+Detail modes for report endpoints: full list, summary only, offset pages or
+keyset (cursor) pages over the detail rows.
+"""
+import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from rest_framework import serializers
+
+
+DETAIL_MODES = ('full', 'none', 'page', 'cursor')
+MAX_DETAIL_PAGE_SIZE = 500
+REPORT_CURSOR_SALT = 'finance_system.report_detail'
+
+
+def _cursor_value(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values, salt=REPORT_CURSOR_SALT):
+    """Sign the keyset values of the last row as an opaque cursor."""
+    return signing.dumps([_cursor_value(value) for value in values], salt=salt)
+
+
+def decode_cursor(cursor, salt=REPORT_CURSOR_SALT):
+    """Return the values signed into ``cursor``, rejecting tampered or foreign ones."""
+    try:
+        values = signing.loads(cursor, salt=salt)
+    except signing.BadSignature:
+        raise serializers.ValidationError("Invalid cursor.")
+    if not isinstance(values, list):
+        raise serializers.ValidationError("Invalid cursor.")
+    return values
+
+
+def keyset_condition(keyset, values):
+    """
+    Build the "comes after" condition for ``values`` under the ordering in
+    ``keyset`` (e.g. ``('-transaction_date', '-id')``).
+    """
+    condition = Q()
+    equal = Q()
+    for key, value in zip(keyset, values):
+        field = key.lstrip('-')
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{field}__{lookup}': value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+class DetailOptionsSerializer(serializers.Serializer):
+    """Base for report serializers that let callers choose how detail rows are returned."""
+
+    detail = serializers.ChoiceField(choices=DETAIL_MODES, default='full')
+    page = serializers.IntegerField(min_value=1, default=1)
+    page_size = serializers.IntegerField(min_value=1, max_value=MAX_DETAIL_PAGE_SIZE, required=False)
+    cursor = serializers.CharField(required=False)
+
+    # Ordering of detail pages and the field each cursor value is parsed with
+    detail_keyset = ('-id',)
+    keyset_fields = {'id': serializers.IntegerField()}
+
+    def validate_cursor(self, value):
+        values = decode_cursor(value)
+        if len(values) != len(self.detail_keyset):
+            raise serializers.ValidationError("Invalid cursor.")
+        try:
+            return [
+                self.keyset_fields[key.lstrip('-')].to_internal_value(item)
+                for key, item in zip(self.detail_keyset, values)
+            ]
+        except serializers.ValidationError:
+            raise serializers.ValidationError("Invalid cursor.")
+
+
+def attach_detail(report_data, key, queryset, options, serializer_class, keyset=('-id',)):
+    """
+    Add the detail rows for ``queryset`` to ``report_data`` under ``key``
+    according to ``options['detail']``.
+
+    ``none`` leaves them out, ``page`` returns one offset page and ``cursor``
+    one keyset page, both ordered by ``keyset`` (which must end in a unique
+    field) and with a ``pagination`` entry. Cursor values are expected to be
+    parsed already, as ``DetailOptionsSerializer`` does.
+    """
+    mode = options.get('detail', 'full')
+    if mode == 'none':
+        return report_data
+    if mode == 'full':
+        report_data[key] = serializer_class(queryset, many=True).data
+        return report_data
+
+    page_size = options.get('page_size') or settings.REST_FRAMEWORK['PAGE_SIZE']
+    queryset = queryset.order_by(*keyset)
+    if mode == 'page':
+        page = options.get('page', 1)
+        offset = (page - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        pagination = {'mode': mode, 'page': page, 'page_size': page_size}
+    else:
+        values = options.get('cursor')
+        if values:
+            queryset = queryset.filter(keyset_condition(keyset, values))
+        rows = list(queryset[:page_size + 1])
+        pagination = {'mode': mode, 'page_size': page_size, 'next_cursor': None}
+
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    pagination['has_next'] = has_next
+    if mode == 'cursor' and has_next:
+        last = rows[-1]
+        pagination['next_cursor'] = encode_cursor(
+            [getattr(last, key.lstrip('-')) for key in keyset]
+        )
+
+    report_data[key] = serializer_class(rows, many=True).data
+    report_data['pagination'] = pagination
+    return report_data
@@ -0,0 +1,88 @@
+"""
+Single-pass status rollups and write-invalidated caching for dashboards.
+"""
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+
+def status_rollup(queryset, choices, status_field='status', amount_field='amount', buckets=None):
+    """
+    Compute count and sum for every status in ``choices`` with one
+    conditional-aggregation query.
+
+    ``buckets`` is an optional mapping of name -> Q object for extra slices
+    (e.g. overdue or due this week) computed in the same pass.
+    """
+    aggregates = {
+        'total_count': Count('id'),
+        'total_amount': Sum(amount_field),
+    }
+    for value, _label in choices:
+        condition = Q(**{status_field: value})
+        aggregates[f'count_{value}'] = Count('id', filter=condition)
+        aggregates[f'sum_{value}'] = Sum(amount_field, filter=condition)
+    for name, condition in (buckets or {}).items():
+        aggregates[f'count_bucket_{name}'] = Count('id', filter=condition)
+        aggregates[f'sum_bucket_{name}'] = Sum(amount_field, filter=condition)
+
+    row = queryset.aggregate(**aggregates)
+
+    return {
+        'total_count': row['total_count'],
+        'total_amount': row['total_amount'] or 0,
+        'by_status': [
+            {
+                'status': value,
+                'count': row[f'count_{value}'],
+                'total': row[f'sum_{value}'] or 0,
+            }
+            for value, _label in choices
+        ],
+        'buckets': {
+            name: {
+                'count': row[f'count_bucket_{name}'],
+                'total': row[f'sum_bucket_{name}'] or 0,
+            }
+            for name in (buckets or {})
+        },
+    }
+
+
+def with_labels(by_status, choices):
+    """
+    Add the display label of each status to a ``by_status`` rollup. Labels
+    are translated per request, so they are kept out of cached payloads.
+    """
+    labels = dict(choices)
+    return [dict(item, label=str(labels[item['status']])) for item in by_status]
+
+
+def is_shared_cache():
+    """Whether the default cache is seen by every worker process."""
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def get_cached(key, builder, timeout):
+    """
+    Return the cached value for ``key``, building and storing it on a miss.
+
+    A per-process cache cannot be invalidated from other workers, so with
+    one the value is always rebuilt.
+    """
+    if not is_shared_cache():
+        return builder()
+    data = cache.get(key)
+    if data is None:
+        data = builder()
+        cache.set(key, data, timeout)
+    return data
+
+
+def invalidate(key):
+    """
+    Drop a cached payload once the current transaction commits (right away
+    outside one), so a read racing the write cannot cache pre-commit data.
+    """
+    transaction.on_commit(lambda: cache.delete(key))
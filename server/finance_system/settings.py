@@ -62,6 +62,8 @@ INSTALLED_APPS = [
     'bank_obligations',
     'cash_transactions',
     'finance_calendar',
+    'document_numbers',
+    'search_index',
 ]
 
 MIDDLEWARE = [
@@ -217,6 +219,40 @@ SESSION_COOKIE_AGE = env.int('SESSION_COOKIE_AGE', default=1800)  # 30 minutes
 SESSION_SAVE_EVERY_REQUEST = True
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
+# Cache: dashboards and forecasts are cached across requests, so the backend
+# must be shared by every worker process. The default database cache table is
+# created by `migrate` (accounts_receivable 0010); set CACHE_URL (e.g.
+# redis://...) to use another shared backend. Per-process caches (locmemcache://) disable
+# that caching instead of serving stale data from other workers.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='dbcache://finance_cache'),
+}
+
+# Query budgets: over-budget list requests are logged, or raise when strict
+QUERY_BUDGET_STRICT = env.bool('QUERY_BUDGET_STRICT', default=False)
+
+# Credit limits: 'reject' new receivables over a client's limit, or 'flag' them
+CREDIT_LIMIT_POLICY = env.str('CREDIT_LIMIT_POLICY', default='reject')
+
+# Email: the console and file backends are local stand-ins for SMTP
+EMAIL_BACKEND = env.str('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+EMAIL_FILE_PATH = env.str('EMAIL_FILE_PATH', default=os.path.join(BASE_DIR, 'sent_emails'))
+EMAIL_HOST = env.str('EMAIL_HOST', default='localhost')
+EMAIL_PORT = env.int('EMAIL_PORT', default=25)
+EMAIL_HOST_USER = env.str('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = env.str('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = env.bool('EMAIL_USE_TLS', default=False)
+DEFAULT_FROM_EMAIL = env.str('DEFAULT_FROM_EMAIL', default='finance@localhost')
+
+# Payment reminders: who receives them (defaults to the payable's creator),
+# how many are sent per run and how many sends run in parallel
+PAYMENT_REMINDER_RECIPIENTS = env.list('PAYMENT_REMINDER_RECIPIENTS', default=[])
+REMINDER_DISPATCH_BATCH_SIZE = env.int('REMINDER_DISPATCH_BATCH_SIZE', default=200)
+REMINDER_DISPATCH_WORKERS = env.int('REMINDER_DISPATCH_WORKERS', default=4)
+REMINDER_MAX_ATTEMPTS = env.int('REMINDER_MAX_ATTEMPTS', default=5)
+# Seconds before a claimed reminder whose sender never reported back can be sent again
+REMINDER_CLAIM_TIMEOUT = env.int('REMINDER_CLAIM_TIMEOUT', default=600)
+
 # Security settings
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
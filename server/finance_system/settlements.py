@@ -0,0 +1,243 @@
+"""
+Batch settlement of payments against receivables or payables.
+
+Models taking part define ``SETTLED_STATUS`` (where a full payment moves
+them), a ``transactions`` reverse FK of their transaction model, a
+``payments_posted(pks)`` classmethod for totals derived from transactions
+and the ``statuses_changed(pks)`` hook used by bulk transitions.
+
+Payments (the transaction model's ``PAYMENT_TYPES``) are refused against
+settled parents, and full payments against parents whose status cannot move
+to ``SETTLED_STATUS`` under ``STATUS_TRANSITIONS``. Returns and adjustments
+may still be posted against a settled parent.
+
+Transaction rows are written with ``bulk_create`` and parents with
+set-based UPDATEs, so no per-row ``save()`` or signal runs; listeners get
+one ``status_transitioned`` and one ``payments_settled`` per batch.
+"""
+import datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from rest_framework import permissions, serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .transitions import allowed_targets, record_status_changes, status_transitioned
+
+
+# Sent after commit with the created ``transactions``
+payments_settled = Signal()
+
+SETTLEMENT_BATCH_SIZE = 500
+MAX_SETTLEMENT_ITEMS = 1000
+
+
+class SettlementRejected(ValidationError):
+    """Raised when a payment cannot be posted against its parent."""
+
+
+def transaction_model(model):
+    relation = model._meta.get_field('transactions')
+    return relation.related_model, relation.field.name
+
+
+def settleable_statuses(model):
+    return [source for source, targets in model.STATUS_TRANSITIONS.items() if model.SETTLED_STATUS in targets]
+
+
+def settlement_error(model, current_status, transaction_type):
+    """Why a ``transaction_type`` payment cannot be posted against a parent in ``current_status``."""
+    transaction_class, _field_name = transaction_model(model)
+    if current_status == model.SETTLED_STATUS and transaction_type in transaction_class.PAYMENT_TYPES:
+        return 'Already settled.'
+    if transaction_type == 'full_payment' and model.SETTLED_STATUS not in allowed_targets(model, current_status):
+        return f'Cannot move from {current_status} to {model.SETTLED_STATUS}.'
+    return None
+
+
+def check_settlement(model, pk, transaction_type, lock=True):
+    """Lock parent ``pk`` and raise ``SettlementRejected`` if the payment cannot be posted."""
+    queryset = model.objects.select_for_update() if lock else model.objects.all()
+    current_status = queryset.filter(pk=pk).values_list('status', flat=True).first()
+    detail = settlement_error(model, current_status, transaction_type)
+    if detail:
+        raise SettlementRejected(detail)
+
+
+def check_posting(model, instance, lock=True):
+    """
+    Check a transaction of ``model`` about to be saved. Only new ones and
+    ones moved to another parent or type are checked, so the rest of a
+    posted transaction can still be edited after its parent settled.
+    """
+    _transaction_class, field_name = transaction_model(model)
+    posting = (getattr(instance, f'{field_name}_id'), instance.transaction_type)
+    if posting[0] is None:
+        return
+    if not instance._state.adding:
+        stored = type(instance).objects.filter(pk=instance.pk).values_list(
+            f'{field_name}_id', 'transaction_type'
+        ).first()
+        if stored == posting:
+            return
+    check_settlement(model, *posting, lock=lock)
+
+
+def mark_settled(model, pks, user=None, note='', changed_at=None):
+    """
+    Move those of ``pks`` whose status allows it to ``SETTLED_STATUS`` with
+    one UPDATE and record the changes, telling ``status_transitioned``
+    listeners after commit. Returns the ``(pk, from_status, to_status)``
+    changes made.
+    """
+    changed_at = changed_at or timezone.now()
+    changes = [
+        (pk, source, model.SETTLED_STATUS)
+        for pk, source in model.objects.filter(
+            pk__in=pks, status__in=settleable_statuses(model)
+        ).values_list('pk', 'status')
+    ]
+    if not changes:
+        return changes
+
+    changed = [pk for pk, _source, _target in changes]
+    model.objects.filter(pk__in=changed).update(status=model.SETTLED_STATUS, updated_at=changed_at)
+    record_status_changes(model, changes, user=user, note=note, changed_at=changed_at)
+    model.statuses_changed(changed)
+    transaction.on_commit(
+        lambda: status_transitioned.send(sender=model, changes=changes)
+    )
+    return changes
+
+
+def refresh_settled(instance):
+    """
+    Reload a parent settled by UPDATE, including what it remembers from the
+    database, so a later ``save()`` of the same object does not undo it.
+    """
+    fresh = type(instance)._base_manager.get(pk=instance.pk)
+    instance.__dict__.update({key: value for key, value in fresh.__dict__.items() if key != '_state'})
+
+
+def settle_payments(model, items, user=None, note=''):
+    """
+    Post ``items`` (dicts with ``id``, ``transaction_type``, ``amount`` and
+    optionally ``transaction_date``, ``reference`` and ``notes``) in one
+    transaction and return ``{'posted', 'settled', 'rejected', 'results'}``.
+
+    The batch is all or nothing: when any item refers to a missing parent or
+    cannot be posted in the parent's status, nothing is written and the
+    offending items are reported.
+    """
+    items = list(items)
+    transaction_class, field_name = transaction_model(model)
+
+    with transaction.atomic():
+        statuses = dict(
+            model.objects.select_for_update().filter(
+                pk__in={item['id'] for item in items}
+            ).values_list('pk', 'status')
+        )
+        results = [{'index': index, 'id': item['id']} for index, item in enumerate(items)]
+        errors = [
+            'Not found.' if item['id'] not in statuses
+            else settlement_error(model, statuses[item['id']], item['transaction_type'])
+            for item in items
+        ]
+        rejected = sum(1 for error in errors if error)
+        if rejected:
+            for result, error in zip(results, errors):
+                if error:
+                    result.update(result='rejected', detail=error)
+                else:
+                    result.update(result='skipped', detail='Batch was not posted.')
+            return {'posted': 0, 'settled': 0, 'rejected': rejected, 'results': results}
+
+        transactions = transaction_class.objects.bulk_create([
+            transaction_class(
+                **{f'{field_name}_id': item['id']},
+                transaction_type=item['transaction_type'],
+                amount=item['amount'],
+                reference=item.get('reference', ''),
+                notes=item.get('notes', ''),
+                transaction_date=item.get('transaction_date') or datetime.date.today(),
+                created_by=user
+            )
+            for item in items
+        ], batch_size=SETTLEMENT_BATCH_SIZE)
+
+        model.payments_posted({item['id'] for item in items})
+        changes = mark_settled(
+            model,
+            {item['id'] for item in items if item['transaction_type'] == 'full_payment'},
+            user=user,
+            note=note or 'Settlement'
+        )
+        settled = {pk for pk, _source, _target in changes}
+        for result, posted in zip(results, transactions):
+            result.update(result='posted', transaction=posted.pk)
+            result['status'] = model.SETTLED_STATUS if result['id'] in settled else statuses[result['id']]
+
+        transaction.on_commit(
+            lambda: payments_settled.send(sender=model, transactions=transactions)
+        )
+
+    return {'posted': len(transactions), 'settled': len(settled), 'rejected': 0, 'results': results}
+
+
+class PostingSerializerMixin:
+    """Report payments refused by ``check_posting`` as errors on ``transaction_type``."""
+    
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        except SettlementRejected as exc:
+            raise serializers.ValidationError({'transaction_type': exc.messages})
+
+
+class SettlementItemSerializer(serializers.Serializer):
+    """One payment to post against a receivable or payable."""
+    
+    id = serializers.IntegerField()
+    transaction_type = serializers.CharField()
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=Decimal('0.01'))
+    transaction_date = serializers.DateField(required=False)
+    reference = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    
+    def validate_transaction_type(self, value):
+        transaction_class, _field_name = transaction_model(self.context['model'])
+        if value not in dict(transaction_class.TRANSACTION_TYPES):
+            raise serializers.ValidationError(f'"{value}" is not a valid choice.')
+        return value
+
+
+class SettlementSerializer(serializers.Serializer):
+    """Serializer for a batch settlement request; ``context['model']`` is the parent model."""
+    
+    payments = SettlementItemSerializer(many=True, allow_empty=False, max_length=MAX_SETTLEMENT_ITEMS)
+    note = serializers.CharField(max_length=200, required=False, allow_blank=True, default='')
+
+
+class SettlementView(APIView):
+    """Base API view posting a batch of payments against ``model`` in one transaction."""
+    permission_classes = [permissions.IsAuthenticated]
+    model = None
+    
+    def post(self, request):
+        serializer = SettlementSerializer(data=request.data, context={'model': self.model})
+        if serializer.is_valid():
+            result = settle_payments(
+                self.model,
+                serializer.validated_data['payments'],
+                user=request.user,
+                note=serializer.validated_data['note']
+            )
+            if result['rejected']:
+                return Response(result, status=status.HTTP_400_BAD_REQUEST)
+            return Response(result, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
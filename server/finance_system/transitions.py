@@ -0,0 +1,171 @@
+"""
+Bulk status transitions validated against a model's transition table.
+
+Models taking part define ``STATUS_TRANSITIONS`` (source -> allowed
+targets), ``status_history`` (reverse FK of their history model) and a
+``statuses_changed(pks)`` classmethod for derived data such as balances.
+"""
+from collections import defaultdict
+
+from django.db import connection, models, transaction
+from django.db.models import ExpressionWrapper, F, Value
+from django.dispatch import Signal
+from django.utils import timezone
+
+
+# Sent after commit with ``changes``: a list of (pk, from_status, to_status)
+status_transitioned = Signal()
+
+
+def allowed_targets(model, source):
+    return model.STATUS_TRANSITIONS.get(source, ())
+
+
+def history_model(model):
+    relation = model._meta.get_field('status_history')
+    return relation.related_model, relation.field.name
+
+
+def record_status_changes(model, changes, user=None, note='', changed_at=None):
+    """
+    Append history rows for ``changes`` (``(pk, from_status, to_status)``)
+    in bulk, closing each object's open row with its ``left_at`` and
+    ``duration`` first so dwell times never have to be derived per row.
+    """
+    if not changes:
+        return
+    history, field_name = history_model(model)
+    changed_at = changed_at or timezone.now()
+
+    # New objects (empty ``from_status``) have no open row to close
+    leaving = {pk for pk, source, _target in changes if source}
+    if leaving:
+        close_open_history(model, leaving, changed_at)
+    history.objects.bulk_create([
+        history(**{
+            f'{field_name}_id': pk,
+            'from_status': source,
+            'to_status': target,
+            'changed_at': changed_at,
+            'changed_by': user,
+            'note': note,
+        })
+        for pk, source, target in changes
+    ])
+
+
+def close_open_history(model, pks, changed_at):
+    """Close the open history rows of ``pks`` (ids or an id subquery) at ``changed_at``."""
+    history, field_name = history_model(model)
+    history.objects.filter(**{
+        f'{field_name}_id__in': pks,
+        'left_at__isnull': True,
+    }).update(
+        left_at=changed_at,
+        duration=ExpressionWrapper(
+            Value(changed_at, output_field=models.DateTimeField()) - F('changed_at'),
+            output_field=models.DurationField()
+        )
+    )
+
+
+def record_queryset_status_change(queryset, to_status, user=None, note='', changed_at=None):
+    """
+    Set-based ``record_status_changes`` for every row of ``queryset`` moving
+    to ``to_status``: open rows are closed with one UPDATE and the new rows
+    are written with one INSERT ... SELECT over the same filter, so no ids
+    are loaded. Call it before the rows' status is updated.
+    """
+    model = queryset.model
+    history, field_name = history_model(model)
+    changed_at = changed_at or timezone.now()
+    close_open_history(model, queryset.values('pk'), changed_at)
+
+    source_sql, source_params = queryset.values(
+        history_pk=F('pk'), history_status=F('status')
+    ).order_by().query.sql_with_params()
+    quote = connection.ops.quote_name
+    columns = [
+        history._meta.get_field(name).column
+        for name in (field_name, 'from_status', 'to_status', 'changed_at', 'changed_by', 'note')
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(history._meta.db_table)} ({", ".join(quote(column) for column in columns)}) '
+            f'SELECT source.history_pk, source.history_status, %s, %s, %s, %s FROM ({source_sql}) source',
+            [
+                to_status,
+                connection.ops.adapt_datetimefield_value(changed_at),
+                user.pk if user else None,
+                note,
+                *source_params,
+            ]
+        )
+
+
+def bulk_transition(model, items, user=None, note=''):
+    """
+    Apply ``items`` (an iterable of ``(pk, target_status)``) and return one
+    outcome dict per item in input order.
+
+    Rows are locked, each move is checked against ``STATUS_TRANSITIONS``,
+    accepted moves are written with one UPDATE per target status and every
+    change gets a history row, all inside one transaction.
+    """
+    items = list(items)
+    results = []
+    changes = []
+
+    with transaction.atomic():
+        current = dict(
+            model.objects.select_for_update().filter(
+                pk__in={pk for pk, _target in items}
+            ).values_list('pk', 'status')
+        )
+
+        by_target = defaultdict(list)
+        seen = set()
+        for pk, target in items:
+            outcome = {'id': pk, 'from': current.get(pk), 'to': target}
+            if pk not in current:
+                outcome.update(result='rejected', detail='Not found.')
+            elif pk in seen:
+                outcome.update(result='rejected', detail='Listed more than once.')
+            elif current[pk] == target:
+                outcome.update(result='unchanged')
+            elif target not in allowed_targets(model, current[pk]):
+                outcome.update(
+                    result='rejected',
+                    detail=f'Cannot move from {current[pk]} to {target}.'
+                )
+            else:
+                outcome.update(result='applied')
+                by_target[target].append(pk)
+                changes.append((pk, current[pk], target))
+            seen.add(pk)
+            results.append(outcome)
+
+        check = getattr(model, 'transition_errors', None)
+        errors = check(changes) if check and changes else {}
+        if errors:
+            changes = [change for change in changes if change[0] not in errors]
+            for target, pks in by_target.items():
+                by_target[target] = [pk for pk in pks if pk not in errors]
+            for outcome in results:
+                if outcome['result'] == 'applied' and outcome['id'] in errors:
+                    outcome.update(result='rejected', detail=errors[outcome['id']])
+
+        if changes:
+            now = timezone.now()
+            for target, pks in by_target.items():
+                if pks:
+                    model.objects.filter(pk__in=pks).update(status=target, updated_at=now)
+
+            record_status_changes(model, changes, user=user, note=note, changed_at=now)
+
+            model.statuses_changed([pk for pk, _source, _target in changes])
+            transaction.on_commit(
+                lambda: status_transitioned.send(sender=model, changes=changes)
+            )
+
+    return results
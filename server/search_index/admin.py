@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import SearchDocument
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'object_id', 'content', 'updated_at')
+    list_filter = ('kind',)
+    search_fields = ('content',)
+    readonly_fields = ('kind', 'object_id', 'content', 'updated_at')
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class SearchIndexConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'search_index'
+    verbose_name = _('Search Index')
+    
+    def ready(self):
+        # Import signal handlers
+        import search_index.signals
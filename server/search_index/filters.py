@@ -0,0 +1,19 @@
+from rest_framework import filters
+from .index import match_ids
+
+
+class IndexedSearchFilter(filters.SearchFilter):
+    """
+    ``SearchFilter`` that answers from the search index for views that set
+    ``search_index_kind``, instead of ``icontains`` over ``search_fields``.
+    """
+    
+    def filter_queryset(self, request, queryset, view):
+        kind = getattr(view, 'search_index_kind', None)
+        if kind is None:
+            return super().filter_queryset(request, queryset, view)
+        
+        object_ids = match_ids(kind, request.query_params.get(self.search_param, ''))
+        if object_ids is None:
+            return queryset
+        return queryset.filter(pk__in=object_ids)
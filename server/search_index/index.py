@@ -0,0 +1,114 @@
+"""
+Build, update and query the search index.
+
+Each source model is indexed from a flat ``values_list`` over the fields
+below, so a whole queryset is (re)indexed with one read and one upsert.
+"""
+from django.apps import apps
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+from .models import SearchDocument
+from .normalize import normalize_text, tokenize
+
+
+SOURCES = {
+    'client': ('accounts_receivable.Client', (
+        'name', 'arabic_name', 'contact_person', 'email', 'phone', 'tax_number', 'notes',
+    )),
+    'supplier': ('accounts_payable.Supplier', (
+        'name', 'arabic_name', 'contact_person', 'email', 'phone', 'tax_number', 'notes',
+    )),
+    'receivable': ('accounts_receivable.AccountReceivable', (
+        'receipt_number', 'check_number', 'client__name', 'client__arabic_name', 'notes',
+    )),
+    'payable': ('accounts_payable.AccountPayable', (
+        'payment_number', 'check_number', 'invoice_number', 'supplier__name',
+        'supplier__arabic_name', 'notes',
+    )),
+}
+
+FTS_TABLE = 'search_index_fts'
+INDEX_BATCH_SIZE = 1000
+
+
+def source_model(kind):
+    return apps.get_model(SOURCES[kind][0])
+
+
+def index_queryset(kind, queryset):
+    """Write the search documents for every row of ``queryset``."""
+    fields = SOURCES[kind][1]
+    documents = [
+        SearchDocument(kind=kind, object_id=values[0], content=normalize_text(' '.join(
+            str(value) for value in values[1:] if value
+        )))
+        for values in queryset.order_by().values_list('pk', *fields).iterator(chunk_size=INDEX_BATCH_SIZE)
+    ]
+    SearchDocument.objects.bulk_create(
+        documents,
+        batch_size=INDEX_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['content', 'updated_at']
+    )
+    return len(documents)
+
+
+def index_objects(kind, ids):
+    return index_queryset(kind, source_model(kind).objects.filter(pk__in=ids))
+
+
+def remove_objects(kind, ids):
+    SearchDocument.objects.filter(kind=kind, object_id__in=ids).delete()
+
+
+def rebuild(kinds=None):
+    """Drop and rebuild the documents for ``kinds`` (default: all)."""
+    counts = {}
+    for kind in kinds or SOURCES:
+        SearchDocument.objects.filter(kind=kind).delete()
+        counts[kind] = index_queryset(kind, source_model(kind).objects.all())
+    return counts
+
+
+_fts_tables = {}
+
+
+def fts_available():
+    """Return True when the SQLite FTS5 table exists (checked once per database)."""
+    if connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in _fts_tables:
+        _fts_tables[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_tables[name]
+
+
+def match_ids(kind, query):
+    """
+    Return a queryset of ``object_id`` values whose documents contain every
+    token of ``query`` (as a prefix), or None when the query has no tokens.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    
+    documents = SearchDocument.objects.filter(kind=kind)
+    if connection.vendor == 'postgresql':
+        # Tokens only hold word characters, so they are safe tsquery terms
+        documents = documents.filter(RawSQL(
+            "search_vector @@ to_tsquery('simple', %s) OR %s <%% content",
+            (' & '.join(f'{token}:*' for token in tokens), ' '.join(tokens)),
+            output_field=BooleanField()
+        ))
+    elif fts_available():
+        documents = documents.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (' '.join(f'"{token}"*' for token in tokens),)
+        ))
+    else:
+        for token in tokens:
+            documents = documents.filter(content__icontains=token)
+    return documents.values('object_id')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from search_index.index import SOURCES, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index for clients, suppliers, receivables and payables.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', action='append', choices=list(SOURCES), help='Only rebuild this kind (repeatable).')
+    
+    def handle(self, *args, **options):
+        counts = rebuild(options['kind'])
+        for kind, count in counts.items():
+            self.stdout.write(f'{kind}: {count} documents')
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
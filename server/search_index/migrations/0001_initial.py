@@ -0,0 +1,94 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:12
+
+from django.db import migrations, models
+
+
+SQLITE_FTS = [
+    """CREATE VIRTUAL TABLE search_index_fts USING fts5(
+        content, content='search_index_searchdocument', content_rowid='id', tokenize='unicode61'
+    )""",
+    """CREATE TRIGGER search_index_fts_ai AFTER INSERT ON search_index_searchdocument BEGIN
+        INSERT INTO search_index_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER search_index_fts_ad AFTER DELETE ON search_index_searchdocument BEGIN
+        INSERT INTO search_index_fts(search_index_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER search_index_fts_au AFTER UPDATE ON search_index_searchdocument BEGIN
+        INSERT INTO search_index_fts(search_index_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO search_index_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+]
+
+SQLITE_FTS_DROP = [
+    'DROP TRIGGER IF EXISTS search_index_fts_ai',
+    'DROP TRIGGER IF EXISTS search_index_fts_ad',
+    'DROP TRIGGER IF EXISTS search_index_fts_au',
+    'DROP TABLE IF EXISTS search_index_fts',
+]
+
+POSTGRES_INDEXES = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """ALTER TABLE search_index_searchdocument ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED""",
+    'CREATE INDEX search_index_vector_idx ON search_index_searchdocument USING gin (search_vector)',
+    'CREATE INDEX search_index_trgm_idx ON search_index_searchdocument USING gin (content gin_trgm_ops)',
+]
+
+POSTGRES_INDEXES_DROP = [
+    'DROP INDEX IF EXISTS search_index_trgm_idx',
+    'DROP INDEX IF EXISTS search_index_vector_idx',
+    'ALTER TABLE search_index_searchdocument DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def run_statements(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_backend_index(apps, schema_editor):
+    """Add the full-text structures for the database in use; other backends fall back to icontains."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute('PRAGMA compile_options')
+            options = {row[0] for row in cursor.fetchall()}
+        if 'ENABLE_FTS5' in options:
+            run_statements(schema_editor, SQLITE_FTS)
+    elif vendor == 'postgresql':
+        run_statements(schema_editor, POSTGRES_INDEXES)
+
+
+def drop_backend_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        run_statements(schema_editor, SQLITE_FTS_DROP)
+    elif vendor == 'postgresql':
+        run_statements(schema_editor, POSTGRES_INDEXES_DROP)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('client', 'Client'), ('supplier', 'Supplier'), ('receivable', 'Account Receivable'), ('payable', 'Account Payable')], max_length=20, verbose_name='kind')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='object id')),
+                ('content', models.TextField(blank=True, verbose_name='content')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'verbose_name': 'search document',
+                'verbose_name_plural': 'search documents',
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_backend_index, drop_backend_index),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+from search_index.normalize import normalize_text
+
+
+SOURCES = {
+    'client': ('accounts_receivable', 'Client', (
+        'name', 'arabic_name', 'contact_person', 'email', 'phone', 'tax_number', 'notes',
+    )),
+    'supplier': ('accounts_payable', 'Supplier', (
+        'name', 'arabic_name', 'contact_person', 'email', 'phone', 'tax_number', 'notes',
+    )),
+    'receivable': ('accounts_receivable', 'AccountReceivable', (
+        'receipt_number', 'check_number', 'client__name', 'client__arabic_name', 'notes',
+    )),
+    'payable': ('accounts_payable', 'AccountPayable', (
+        'payment_number', 'check_number', 'invoice_number', 'supplier__name',
+        'supplier__arabic_name', 'notes',
+    )),
+}
+
+
+def populate(apps, schema_editor):
+    SearchDocument = apps.get_model('search_index', 'SearchDocument')
+    for kind, (app_label, model_name, fields) in SOURCES.items():
+        model = apps.get_model(app_label, model_name)
+        SearchDocument.objects.bulk_create([
+            SearchDocument(kind=kind, object_id=values[0], content=normalize_text(' '.join(
+                str(value) for value in values[1:] if value
+            )))
+            for values in model.objects.order_by().values_list('pk', *fields).iterator(chunk_size=1000)
+        ], batch_size=1000)
+
+
+def clear(apps, schema_editor):
+    apps.get_model('search_index', 'SearchDocument').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search_index', '0001_initial'),
+        ('accounts_receivable', '0005_accountreceivable_paid_remaining'),
+        ('accounts_payable', '0004_alter_accountpayable_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, clear),
+    ]
@@ -0,0 +1,31 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class SearchDocument(models.Model):
+    """
+    Normalized searchable text for one client, supplier, receivable or payable.
+    
+    ``content`` is mirrored into an FTS5 table on SQLite and indexed as a
+    tsvector plus trigrams on PostgreSQL (see the initial migration).
+    """
+    
+    KIND_CHOICES = (
+        ('client', _('Client')),
+        ('supplier', _('Supplier')),
+        ('receivable', _('Account Receivable')),
+        ('payable', _('Account Payable')),
+    )
+    
+    kind = models.CharField(_('kind'), max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField(_('object id'))
+    content = models.TextField(_('content'), blank=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('search document')
+        verbose_name_plural = _('search documents')
+        unique_together = ['kind', 'object_id']
+    
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}"
@@ -0,0 +1,35 @@
+"""
+Text normalization shared by indexing and querying, so Arabic spelling
+variants and Latin case differences match each other.
+"""
+import re
+
+
+# Harakat, superscript alef and tatweel carry no meaning for matching
+ARABIC_MARKS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+
+ARABIC_LETTERS = str.maketrans({
+    '\u0622': '\u0627',  # alef with madda -> alef
+    '\u0623': '\u0627',  # alef with hamza above -> alef
+    '\u0625': '\u0627',  # alef with hamza below -> alef
+    '\u0671': '\u0627',  # alef wasla -> alef
+    '\u0629': '\u0647',  # taa marbuta -> haa
+    '\u0649': '\u064a',  # alef maksura -> yaa
+    '\u0624': '\u0648',  # waw with hamza -> waw
+    '\u0626': '\u064a',  # yaa with hamza -> yaa
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic-Indic digits
+    **{chr(0x06f0 + digit): str(digit) for digit in range(10)},  # Eastern Arabic-Indic digits
+})
+
+NON_WORD = re.compile(r'[^\w]+')
+
+
+def normalize_text(text):
+    """Return ``text`` case-folded, with Arabic variants unified and punctuation removed."""
+    text = ARABIC_MARKS.sub('', str(text or '')).translate(ARABIC_LETTERS).casefold()
+    return ' '.join(NON_WORD.sub(' ', text).replace('_', ' ').split())
+
+
+def tokenize(text):
+    """Split ``text`` into normalized search tokens."""
+    return normalize_text(text).split()
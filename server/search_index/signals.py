@@ -0,0 +1,51 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from accounts_receivable.models import Client, AccountReceivable
+from accounts_receivable.signals import receivables_imported
+from accounts_payable.models import Supplier, AccountPayable
+from accounts_payable.signals import payables_imported
+from .index import index_objects, index_queryset, remove_objects
+
+
+KINDS = {
+    Client: 'client',
+    Supplier: 'supplier',
+    AccountReceivable: 'receivable',
+    AccountPayable: 'payable',
+}
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=Supplier)
+@receiver(post_save, sender=AccountReceivable)
+@receiver(post_save, sender=AccountPayable)
+def index_on_save(sender, instance, **kwargs):
+    """Refresh the search document of a saved record."""
+    index_objects(KINDS[sender], [instance.pk])
+    
+    # Receivable and payable documents include the party name
+    if sender is Client:
+        index_queryset('receivable', AccountReceivable.objects.filter(client_id=instance.pk))
+    elif sender is Supplier:
+        index_queryset('payable', AccountPayable.objects.filter(supplier_id=instance.pk))
+
+
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Supplier)
+@receiver(post_delete, sender=AccountReceivable)
+@receiver(post_delete, sender=AccountPayable)
+def remove_on_delete(sender, instance, **kwargs):
+    """Drop the search document of a deleted record."""
+    remove_objects(KINDS[sender], [instance.pk])
+
+
+@receiver(receivables_imported)
+def index_imported_receivables(sender, receivables, **kwargs):
+    """Index a bulk import in one pass."""
+    index_objects('receivable', [receivable.pk for receivable in receivables])
+
+
+@receiver(payables_imported)
+def index_imported_payables(sender, payables, **kwargs):
+    """Index a bulk import in one pass."""
+    index_objects('payable', [payable.pk for payable in payables])
@@ -0,0 +1,60 @@
+import datetime
+from django.contrib.auth import get_user_model
+from django.db import connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+from accounts_payable.importers import import_payables
+from accounts_payable.models import Supplier
+from accounts_receivable.models import AccountReceivable, Bank, Client
+from .index import fts_available
+from .models import SearchDocument
+from .normalize import normalize_text
+
+
+class SearchIndexTestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='search@example.com', password='testpassword')
+        self.client.force_authenticate(self.user)
+        self.client_record = Client.objects.create(name="Al Amal Trading", arabic_name="مؤسسة الأمل")
+        Client.objects.create(name="Other Client", arabic_name="شركة النور")
+        bank = Bank.objects.create(name="Search Bank", arabic_name="Search Bank")
+        self.receivable = AccountReceivable.objects.create(
+            client=self.client_record, bank=bank, amount=100, check_number='CHK-7781',
+            due_date=datetime.date.today() + datetime.timedelta(days=30)
+        )
+
+    def search(self, url, query):
+        response = self.client.get(url, {'search': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['id'] for row in response.data['results']]
+
+    def test_normalization_unifies_arabic_variants(self):
+        self.assertEqual(normalize_text('مُؤَسَّسَة الأمل'), normalize_text('موسسه الامل'))
+        self.assertEqual(normalize_text('Acme-Trading ١٢٣'), 'acme trading 123')
+
+    def test_arabic_variants_and_prefixes_match(self):
+        url = '/api/v1/accounts-receivable/clients/'
+        self.assertEqual(fts_available(), connection.vendor == 'sqlite')
+        self.assertEqual(self.search(url, 'موسسه الامل'), [self.client_record.pk])
+        self.assertEqual(self.search(url, 'amal trad'), [self.client_record.pk])
+        self.assertEqual(self.search(url, 'missing'), [])
+
+    def test_receivables_follow_client_renames(self):
+        url = '/api/v1/accounts-receivable/receivables/'
+        self.assertEqual(self.search(url, '7781'), [self.receivable.pk])
+        self.client_record.name = "Horizon Holdings"
+        self.client_record.save()
+        self.assertEqual(self.search(url, 'horizon'), [self.receivable.pk])
+        self.receivable.delete()
+        self.assertFalse(SearchDocument.objects.filter(kind='receivable').exists())
+
+    def test_imported_payables_are_indexed(self):
+        supplier = Supplier.objects.create(name="Imported Supplier")
+        with self.captureOnCommitCallbacks(execute=True):
+            result = import_payables([{
+                'supplier': supplier.pk, 'bank': Bank.objects.get().pk, 'amount': '75', 'check_number': 'IMP-5521',
+                'due_date': (datetime.date.today() + datetime.timedelta(days=30)).isoformat()
+            }])
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(len(self.search('/api/v1/accounts-payable/payables/', '5521')), 1)